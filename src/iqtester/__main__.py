@@ -1,10 +1,45 @@
+from typing import List, Optional
+import sys
+from .batch import main as batch_main
+from .formatter import init_terminal
+from .results import ResultsStore
+from .server import main as serve_main
 from .session import Session
+from .simulation import main as simulate_main
 
 
-def main():
-    """Start a new session of IQ Tester"""
+def main(argv: Optional[List[str]] = None):
+    """
+    Start a new session of IQ Tester, solve positions in batch with the
+    `solve` subcommand (see batch.py), simulate games with the `simulate`
+    subcommand (see simulation.py) or host sessions for many players with
+    the `serve` subcommand (see server.py)
 
-    s = Session()
+    Sessions started here keep the result of every game (see results.py)
+    """
+
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv and argv[0] == "solve":
+        batch_main(argv[1:])
+        return
+    if argv and argv[0] == "simulate":
+        simulate_main(argv[1:])
+        return
+    if argv and argv[0] == "serve":
+        serve_main(argv[1:])
+        return
+
+    # Keep the result of every game to show lifetime stats, unless the
+    # results directory can't be written to or read
+    try:
+        results: Optional[ResultsStore] = ResultsStore()
+    except (OSError, ValueError):
+        results = None
+
+    init_terminal()
+    s = Session(results=results)
     s.start()
 
 
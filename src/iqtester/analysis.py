@@ -0,0 +1,207 @@
+from array import array
+from collections import defaultdict
+from typing import DefaultDict, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+from .jumps import jump_table
+from .solver import Solver, State, symmetries
+
+# The vectorized engine needs the optional numpy dependency
+try:
+    from . import vectorized
+except ImportError:
+    vectorized = None  # type: ignore
+
+
+# === Type Aliases & Explanations ===
+
+# A layer is every position with the same number of pegs that can be reached
+# from a set of starting positions, stored as a sorted array of States (see
+# solver.py), which takes 4 bytes per position (8 above 32 holes) instead of
+# the ~100 bytes of a Python int in a set
+Layer = array
+
+# Number of positions with each number of pegs (by index) that can be reached
+# from the single hole starts of each board size, as counted by layers. Every
+# position of these boards fits in the solver's transposition table (1 million
+# entries), so they are all solved in well under a second.
+REACHABLE_POSITIONS: Dict[int, List[int]] = {
+    4: [0, 6, 18, 50, 69, 81, 53, 30, 15, 10, 0],
+    5: [0, 15, 69, 294, 855, 1749, 2586, 2964, 2562, 1650, 783, 282, 84, 27,
+        15, 0],
+    6: [0, 21, 147, 987, 4557, 15192, 40518, 87048, 150633, 212586, 241224,
+        213534, 146196, 78714, 33735, 11562, 3219, 750, 162, 42, 21, 0],
+}
+
+# The most rows, and the most pegs, of any board in REACHABLE_POSITIONS
+MAX_COUNTED_ROWS = max(REACHABLE_POSITIONS)
+MAX_COUNTED_PEGS = max(
+    len(counts) - 1 for counts in REACHABLE_POSITIONS.values()
+)
+
+
+def typecode(num_holes: int) -> str:
+    """Return the smallest array typecode that can store a State"""
+    if num_holes <= array("I").itemsize * 8:
+        return "I"
+    if num_holes <= 64:
+        return "Q"
+    raise ValueError(f"States of {num_holes} holes don't fit in an array")
+
+
+def layers(rows: int, starts: Iterable[State]) -> Iterator[Tuple[int, Layer]]:
+    """
+    Yield the number of pegs and the layer of positions reachable from
+    starts, one layer at a time from the most pegs to the fewest
+
+    Every position in starts must have the same number of pegs. Only the
+    current layer is kept, so memory is bounded by the two largest layers.
+    If NumPy is installed, each layer is expanded in one batch (see
+    vectorized.py), which is about 10 times faster.
+    """
+
+    table = jump_table(rows)
+    moves = list(zip(table.masks, table.patterns))
+    code = typecode(table.num_holes)
+
+    if vectorized is not None:
+        for pegs, batch in vectorized.layers(rows, starts):
+            layer = array(code)
+            layer.frombytes(batch.astype(f"u{layer.itemsize}").tobytes())
+            yield pegs, layer
+        return
+
+    layer = array(code, sorted(set(starts)))
+    pegs = bin(layer[0]).count("1") if layer else 0
+    while layer:
+        yield pegs, layer
+
+        # Every position one jump away from the current layer
+        layer = array(code, sorted({
+            state ^ mask
+            for state in layer
+            for mask, pattern in moves
+            if state & mask == pattern
+        }))
+        pegs -= 1
+
+
+def single_hole_starts(rows: int) -> List[State]:
+    """Return the position with a single hole in each hole of the board"""
+    num_holes = rows * (rows + 1) // 2
+    full = (1 << num_holes) - 1
+    return [full ^ (1 << hole) for hole in range(num_holes)]
+
+
+def count_layers(rows: int) -> List[int]:
+    """
+    Return the number of positions with each number of pegs (by index) that
+    can be reached from any single hole start
+    """
+    counts = [0] * (rows * (rows + 1) // 2 + 1)
+    for pegs, layer in layers(rows, single_hole_starts(rows)):
+        counts[pegs] = len(layer)
+    return counts
+
+
+def fewest_pegs(rows: int) -> List[int]:
+    """
+    Return the fewest pegs that can be left from the single hole start of
+    each hole, by finding the last layer that can be reached from it
+
+    Starts that are symmetric to an earlier start are not enumerated again.
+    """
+
+    syms = symmetries(rows)
+    results: List[int] = []
+    for hole in range(len(syms[0])):
+        earlier = [sym[hole] for sym in syms if sym[hole] < hole]
+        if earlier:
+            results.append(results[min(earlier)])
+            continue
+        full = (1 << len(syms[0])) - 1
+        for pegs, _ in layers(rows, [full ^ (1 << hole)]):
+            fewest = pegs
+        results.append(fewest)
+
+    return results
+
+
+def count_outcomes(
+    solver: Solver,
+    state: State,
+    max_positions: Optional[int] = None,
+) -> Optional[Dict[int, int]]:
+    """
+    Return the number of distinct complete sequences of moves from state
+    that end with each number of pegs, or None if more than max_positions
+    positions would have to be held at once
+
+    Rather than walking every sequence, the number of sequences that reach
+    each position is counted one layer at a time, so the work grows with
+    the number of positions. Symmetric positions have symmetric futures, so
+    their counts are merged under the canonical form (see Solver.canonical).
+    """
+
+    masks, patterns = solver.masks, solver.patterns
+    outcomes: Dict[int, int] = {}
+
+    pegs = bin(state).count("1")
+    layer: Dict[State, int] = {solver.canonical(state)[0]: 1}
+    while layer:
+        next_layer: DefaultDict[State, int] = defaultdict(int)
+        for position, count in layer.items():
+            has_jump = False
+            for mask, pattern in zip(masks, patterns):
+                if position & mask == pattern:
+                    has_jump = True
+                    next_layer[solver.canonical(position ^ mask)[0]] += count
+            if max_positions is not None and len(next_layer) > max_positions:
+                return None
+
+            # Every sequence that reaches a position with no jumps ends there
+            if not has_jump:
+                outcomes[pegs] = outcomes.get(pegs, 0) + count
+
+        layer = next_layer
+        pegs -= 1
+
+    return outcomes
+
+
+def report(rows: int) -> str:
+    """Return a report of the positions reachable on a board with rows rows"""
+
+    table = jump_table(rows)
+    counts = count_layers(rows)
+    lines = [f"=== {rows} rows ({table.num_holes} holes) ==="]
+    lines.append("Reachable positions by number of pegs:")
+    for pegs in range(table.num_holes - 1, 0, -1):
+        lines.append(f"  {pegs:>3} pegs: {counts[pegs]:>10,}")
+    lines.append(f"  Total:    {sum(counts):>10,}")
+    lines.append("Fewest pegs that can be left by start hole:")
+    for hole, fewest in enumerate(fewest_pegs(rows)):
+        i, j = table.locations[hole]
+        lines.append(f"  ({i}, {j}): {fewest}")
+
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Print reports of the reachable positions from the command line"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m iqtester.analysis",
+        description="Count every position that can be reached from a board "
+                    "with a single hole",
+    )
+    parser.add_argument(
+        "rows", type=int, nargs="+", help="number of rows of the board"
+    )
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        print(report(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+)
+from typing import Any, Dict, Iterable, List, Optional, Set, TextIO
+import argparse
+import json
+import sys
+from .board import Board, peg_label
+from .jumps import jump_table
+from .solver import Solver
+
+
+# === Type Aliases & Explanations ===
+
+# Each line of the input is a JSON object describing a position, with the
+# number of rows of the board and the labels of the holes that have a peg,
+# where holes are labelled with the peg that starts in them (see peg_label),
+# plus an optional id that is copied to the output, e.g.:
+#   {"id": 7, "rows": 5, "pegs": ["b", "c", "d", "f"]}
+# Each line of the output is the same object with the fewest pegs that can
+# be left and the moves needed to get there, as [from, over, into] labels:
+#   {"id": 7, "rows": 5, "pegs": [...], "result": 1, "moves": [[...], ...]}
+# or the id (or null) and an error message if the line can't be solved:
+#   {"id": 7, "error": "..."}
+Record = Dict[str, Any]
+
+
+# Number of lines being solved at once for each worker. Lines are only read
+# as results are written, so memory does not grow with the input.
+LINES_PER_WORKER = 4
+
+# Solvers of the current process, by number of rows
+_solvers: Dict[int, Solver] = {}
+
+
+def solve_line(line: str) -> Record:
+    """Solve the position described by a line of JSON and return the record"""
+
+    record: Record = {}
+    try:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("line must be a JSON object")
+        record = data
+
+        # bool is a subclass of int, but true is not a number of rows
+        rows = record.get("rows")
+        if (
+            not isinstance(rows, int)
+            or isinstance(rows, bool)
+            or not Board.MIN_ROWS <= rows <= Board.MAX_ROWS
+        ):
+            raise ValueError(
+                f"rows must be in [{Board.MIN_ROWS}:{Board.MAX_ROWS}]"
+            )
+        pegs = record.get("pegs")
+        if not isinstance(pegs, list) or not pegs:
+            raise ValueError("pegs must be a non-empty list of peg labels")
+
+        # Map peg labels to hole numbers to build the bitmask
+        table = jump_table(rows)
+        labels = [peg_label(k) for k in range(table.num_holes)]
+        holes = {label: k for k, label in enumerate(labels)}
+        state = 0
+        for peg in pegs:
+            if not isinstance(peg, str) or peg not in holes:
+                raise ValueError(f"{peg!r} is not a hole on {rows} rows")
+            state |= 1 << holes[peg]
+
+        if rows not in _solvers:
+            _solvers[rows] = Solver(rows)
+        result, path = _solvers[rows].solve(state, keep_table=True)
+
+    except (TypeError, ValueError) as e:
+
+        # Only the id of the line is copied, since it may not be an object
+        return {"id": record.get("id"), "error": str(e)}
+
+    record["result"] = result
+    record["moves"] = [
+        [labels[table.src[k]], labels[table.over[k]], labels[table.dst[k]]]
+        for k in path
+    ]
+    return record
+
+
+def write(record: Record, output: TextIO) -> None:
+    """Write record to output as a line of JSON"""
+    output.write(json.dumps(record) + "\n")
+    output.flush()
+
+
+def run(lines: Iterable[str], output: TextIO, workers: int = 1) -> int:
+    """
+    Solve each line of JSON from lines and write each result to output as it
+    completes, returning the number of lines solved
+
+    With more than 1 worker, lines are solved by a pool of processes, so the
+    results may be written in a different order than the lines were read.
+    """
+
+    count = 0
+    lines = (line for line in lines if line.strip())
+
+    if workers <= 1:
+        for line in lines:
+            write(solve_line(line), output)
+            count += 1
+        return count
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Set[Future] = set()
+        for line in lines:
+
+            # Wait for a result before reading more than a few lines ahead
+            if len(pending) >= workers * LINES_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result(), output)
+                    count += 1
+
+            pending.add(executor.submit(solve_line, line))
+
+        for future in pending:
+            write(future.result(), output)
+            count += 1
+
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Solve positions from the command line"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m iqtester solve",
+        description="Solve positions from lines of JSON and write the results "
+                    "as lines of JSON",
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        type=argparse.FileType("r"),
+        default=sys.stdin,
+        help="file of positions, one JSON object per line (default: stdin)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=argparse.FileType("w"),
+        default=sys.stdout,
+        help="file to write the results to (default: stdout)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes (default: 1)",
+    )
+    args = parser.parse_args(argv)
+
+    run(args.input, args.output, args.workers)
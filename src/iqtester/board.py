@@ -1,13 +1,18 @@
 from collections import defaultdict
-from typing import Dict, List, Set, Tuple
-import copy
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from .analysis import count_outcomes
 from .formatter import space, Formatter
+from .jumps import MoveId, hole_number, jump_table
+from .parallel import solve_parallel
+from .solver import Solver, SolverStats, State
+from . import tablebase
 
 
 # === Type Aliases & Explanations ===
 
-# A peg is represented by a single character (string of length 1), where ""
-# represents an empty hole
+# A peg is represented by a short string of lowercase letters (see peg_label),
+# where "" represents an empty hole
 Peg = str
 
 # The board is a 2D-array, where each element of the inner list corresponds to
@@ -31,16 +36,33 @@ Jump = Tuple[BoardLocation, BoardLocation]
 Move = Tuple[Peg, Jump]
 
 # All possible moves for a given board configuration can be represented by a
-# dictionary mapping each Peg to a list of its possible Jumps
+# dictionary mapping each Peg to a list of its possible Jumps, where pegs with
+# no possible Jumps are left out
 MovesMap = Dict[Peg, List[Jump]]
 
 
+def peg_label(hole: int) -> Peg:
+    """
+    Return the label of the peg that starts in hole (numbered row by row),
+    which is 'a' to 'z' for the first 26 holes, then 'aa' to 'az', 'ba' to
+    'bz' and so on, like the columns of a spreadsheet
+    """
+
+    label = ""
+    hole += 1
+    while hole:
+        hole, letter = divmod(hole - 1, 26)
+        label = chr(97 + letter) + label
+
+    return label
+
+
 class Board:
     """Manager of the board for a game of IQ Tester"""
 
     # Set the minimum and maximum number of rows allowed in a board
     MIN_ROWS = 1
-    MAX_ROWS = 8
+    MAX_ROWS = 12
 
     def __init__(self, rows: int, f: Formatter = Formatter()) -> None:
 
@@ -64,26 +86,47 @@ class Board:
 
         # Map each peg character to a list of its current possible jumps
         # Initially, there are no possible moves for a full board
-        # The MovesMap is recalculated any time the board state changes by
-        # the _update_moves_map method
+        # The MovesMap is updated any time the board state changes by the
+        # _update_moves_map method
         self.moves_map: MovesMap = {}
 
+        # Table of every jump that is possible on a board of this size, each
+        # identified by a move ID (see jumps.py)
+        self.jump_table = jump_table(self.num_rows)
+
         # Board is a 2D array, where each row represents a hole on the board
         # and each element is either a peg (peg_char) or 0 (empty hole)
         self.board: BoardMatrix = self.initiate()
 
-    def _is_location_valid(self, i: int, j: int) -> bool:
-        """Return True if i, j are valid row, column indices, respectively"""
+        # Length of the longest peg label, so every hole is printed with the
+        # same width
+        self.label_width = len(peg_label(self.num_holes - 1))
+
+        # Top and bottom borders of the printed board (see _borders method)
+        self._border_cache: Dict[Tuple[int, int], Tuple[str, str]] = {}
+
+        # Search engine used by the solve method, which works on a bitmask of
+        # the board rather than on the BoardMatrix. Its table of results is
+        # kept for the life of the board, so positions searched for one hint
+        # (such as those before an undo) are not searched again.
+        self.solver = Solver(self.num_rows)
 
-        # Row references must be in the range: [0, number of rows)
-        # Col references must be in the range: [0, row index]
-        return 0 <= i < self.num_rows and 0 <= j <= i
+        # Counters and timings of the solver for the most recent solution,
+        # or None if it was looked up in the tablebase or split between
+        # processes (see SolverStats)
+        self.search_stats: Optional[SolverStats] = None
+
+        # Tablebase of solved positions for this board size, if one has been
+        # built (see tablebase.py)
+        self.tablebase: Optional[tablebase.Tablebase] = None
+        if tablebase.MIN_ROWS <= self.num_rows <= tablebase.MAX_ROWS:
+            self.tablebase = tablebase.load(self.num_rows)
 
     def initiate(self) -> BoardMatrix:
         """Return a board (2D array) with a peg character in each hole"""
 
-        # Generate a list of the characters to be used as pegs
-        peg_chars = [chr(i) for i in range(97, 97 + self.num_holes)]
+        # Generate a list of the labels to be used as pegs
+        peg_chars = [peg_label(k) for k in range(self.num_holes)]
 
         # Generate and add one row at a time to the board
         board: BoardMatrix = []
@@ -106,6 +149,13 @@ class Board:
 
         return board
 
+    def parse_peg(self, user_input: str) -> str:
+        """
+        Return user_input as it would be written in a peg label, ignoring
+        surrounding spaces and case, so "AB " selects peg 'ab'
+        """
+        return user_input.strip().lower()
+
     def number_of_pegs(self) -> int:
         """Return the number of pegs remaining on the board"""
 
@@ -123,8 +173,9 @@ class Board:
             self.board[peg_location[0]][peg_location[1]] = ""
             del self.peg_locations_map[peg]
 
-            # Refresh moves map attribute
-            self._update_moves_map()
+            # Refresh moves map attribute around the removed peg
+            self.moves_map.pop(peg, None)
+            self._update_moves_map([peg_location])
 
     def make_move(self, peg: Peg, jump: Jump) -> None:
         """
@@ -155,8 +206,11 @@ class Board:
         self.board[landing_location[0]][landing_location[1]] = peg
         self.peg_locations_map[peg] = landing_location
 
-        # Refresh moves map attribute
-        self._update_moves_map()
+        # Refresh moves map attribute around the three changed holes
+        self.moves_map.pop(jumped_peg, None)
+        self._update_moves_map(
+            [peg_location, jumped_location, landing_location]
+        )
 
     def undo_move(
         self,
@@ -191,75 +245,99 @@ class Board:
         self.board[jump_from[0]][jump_from[1]] = peg
         self.peg_locations_map[peg] = jump_from
 
-        # Refresh moves map attribute
-        self._update_moves_map()
+        # Refresh moves map attribute around the three changed holes
+        self._update_moves_map([jump_from, jump[0], jump[1]])
 
-    def _update_moves_map(self) -> None:
+    def _update_moves_map(
+        self,
+        changed: Optional[List[BoardLocation]] = None
+    ) -> None:
         """
-        Generate a MovesMap, dictionary mapping every peg on the board a list
-        of its current possible jumps, and set it as the moves_map attribute
+        Maintain the moves_map attribute, the MovesMap mapping every peg on
+        the board to a list of its current possible jumps
 
         This method should be called any time the board state changes in order
         to maintain the moves_map attribute
 
-        Time Complexity: O(m) where m is the number of pegs on the board
+        Parameters
+        ----------
+        changed : List[BoardLocation]
+            The locations that changed since moves_map was last updated. If
+            given, only the pegs whose jumps could have changed are updated,
+            otherwise moves_map is generated from scratch. Pegs removed from
+            the board must already have been deleted from moves_map.
+
+        Time Complexity: O(m) where m is the number of pegs on the board, or
+        O(1) if changed is given
         """
 
-        # Initialize a new MovesMap with empty lists as default values
-        current_moves_map: MovesMap = defaultdict(list)
-
-        # Reference diagram of board indices:
-        # Row Index  Column Index
-        #     0           0
-        #     1          0 1
-        #     2         0 1 2
-        #     3        0 1 2 3
-        #     4       0 1 2 3 4
-
-        # Define each "direction" from peg's location (i, j) as a tuple, such
-        # that the adjacent hole location is: (i + row offset, j + col offset)
-        directions = [
-            (1, 0),     # Down and left
-            (1, 1),     # Down and right
-            (-1, -1),   # Up and left
-            (-1, 0),    # Up and right
-            (0, -1),    # Left
-            (0, 1),     # Right
-        ]
-
-        # Iterate over each peg on the board
-        for peg, location in self.peg_locations_map.items():
-
-            # Get row and column indices for location
-            i, j = location
-
-            # Check in each direction for possible jumps
-            for row_offset, col_offset in directions:
-
-                # Define the "jumped" and "landing" locations in direction
-                jumped_i, landing_i = i + row_offset, i + row_offset * 2
-                jumped_j, landing_j = j + col_offset, j + col_offset * 2
-
-                # Validate jumped and landing locations
-                if (
-                    not self._is_location_valid(jumped_i, jumped_j)
-                    or not self._is_location_valid(landing_i, landing_j)
-                ):
-                    # Peg cannot jump in this direction
-                    continue
-
-                # A jump is possible if there is a peg in the jumped location
-                # and the landing location is empty
-                if (
-                    self.board[jumped_i][jumped_j]
-                    and not self.board[landing_i][landing_j]
-                ):
-                    # Add this jump for peg to MovesMap
-                    jump = ((jumped_i, jumped_j), (landing_i, landing_j))
-                    current_moves_map[peg].append(jump)
-
-        # Update instance attribute with new MovesMap
-        self.moves_map = current_moves_map
+        # Generate a new MovesMap from scratch
+        if changed is None:
+
+            # Initialize a new MovesMap with empty lists as default values
+            current_moves_map: MovesMap = defaultdict(list)
+
+            # Iterate over each peg on the board
+            for peg, location in self.peg_locations_map.items():
+
+                # Add possible jumps for peg to MovesMap
+                jumps = self._jumps_from(*location)
+                if jumps:
+                    current_moves_map[peg] = jumps
+
+            # Update instance attribute with new MovesMap
+            self.moves_map = current_moves_map
+            return
+
+        # Only the pegs up to two holes away (in a line) from a changed
+        # location can have different jumps
+        locations = self.jump_table.locations
+        affected: Set[int] = set()
+        for location in changed:
+            affected.update(self.jump_table.nearby[hole_number(*location)])
+
+        # Update the jumps of each affected peg
+        for hole in affected:
+            i, j = locations[hole]
+            peg = self.board[i][j]
+            if not peg:
+                continue
+            jumps = self._jumps_from(i, j)
+            if jumps:
+                self.moves_map[peg] = jumps
+            elif peg in self.moves_map:
+                del self.moves_map[peg]
+
+    def _jumps_from(self, i: int, j: int) -> List[Jump]:
+        """Return a list of the possible jumps for the peg at (i, j)"""
+
+        jumps: List[Jump] = []
+
+        # Check each jump from the peg's location on an empty board
+        for move_id in self.jump_table.from_hole[hole_number(i, j)]:
+            jump = self.jump_table.jumps[move_id]
+            jumped, landing = jump
+
+            # A jump is possible if there is a peg in the jumped location
+            # and the landing location is empty
+            if (
+                self.board[jumped[0]][jumped[1]]
+                and not self.board[landing[0]][landing[1]]
+            ):
+                # Add this jump to list of jumps
+                jumps.append(jump)
+
+        return jumps
+
+    def move_id(self, peg: Peg, jump: Jump) -> MoveId:
+        """Return the move ID of the move of peg (on the board) by jump"""
+        src = hole_number(*self.peg_locations_map[peg])
+        return self.jump_table.ids[(src, hole_number(*jump[1]))]
+
+    def move(self, move_id: MoveId) -> Move:
+        """Return the Move for the move ID on the current board"""
+        i, j = self.jump_table.locations[self.jump_table.src[move_id]]
+        return self.board[i][j], self.jump_table.jumps[move_id]
 
     @space
     def print_board(
@@ -279,18 +357,22 @@ class Board:
             For options, see Formatter class
         """
 
-        # Set width of box to contain the board
-        width = 30
+        # Set width of box to contain the board, which is wider for boards
+        # whose longest row doesn't fit in the default width
+        cell_width = self.label_width + 1
+        width = max(30, self.num_rows * cell_width + 4)
 
         # Print header row followed by empty row
-        print(" IQ Tester Board ".center(width - 2, "-").center(self.f.width))
-        self.f.center("", inner_width=width, inner_border_char="|")
+        f = self.f
+        header, footer = self._borders(width)
+        f.write(header)
+        f.center("", inner_width=width, inner_border_char="|", cache=True)
 
         # Iterate over each row of the board
         for i in range(self.num_rows):
 
             # Assemble ouput string and count format characters
-            output = ""
+            cells = []
             format_chars = 0
 
             # Iterate over each peg and add it to output string
@@ -301,8 +383,11 @@ class Board:
                 # Handle case that there is a peg at this location
                 if hole_value:
 
+                    # Pad label to the width of the longest label
+                    hole_value = hole_value.ljust(self.label_width)
+
                     # Check if it should be highlighted
-                    if hole_value in highlight_pegs:
+                    if self.board[i][j] in highlight_pegs:
 
                         # Add formatting and increment format character count
                         hole_value, inc_format_chars = self.f.apply_formatting(
@@ -312,92 +397,258 @@ class Board:
                         format_chars += inc_format_chars
 
                     # Add hole value to output string
-                    output += hole_value + " "
+                    cells.append(hole_value + " ")
 
                 # Handle case of empty hole
                 else:
 
                     # Add period to output string
-                    output += ". "
+                    cells.append(".".ljust(self.label_width) + " ")
 
             # Print current row of board
-            self.f.center(
-                output,
+            f.center(
+                "".join(cells),
                 inner_width=width,
                 inner_border_char="|",
                 format_char_count=format_chars
             )
 
         # Print number of pegs on the board for reference
-        self.f.center("", inner_width=width, inner_border_char="|")
+        f.center("", inner_width=width, inner_border_char="|", cache=True)
         msg = f"{self.number_of_pegs()} pegs"
-        self.f.center(msg, inner_width=width, inner_border_char="|")
+        f.center(msg, inner_width=width, inner_border_char="|", cache=True)
 
         # Finish border of box
-        self.f.center("", inner_width=width, inner_border_char="|")
-        print(("-" * (width - 2)).center(self.f.width))
+        f.center("", inner_width=width, inner_border_char="|", cache=True)
+        f.write(footer)
+
+    def _borders(self, width: int) -> Tuple[str, str]:
+        """
+        Return the top border (with the header) and bottom border of the box
+        printed around the board, which are only built once per width
+        """
+        key = (width, self.f.width)
+        if key not in self._border_cache:
+            header = " IQ Tester Board ".center(width - 2, "-")
+            self._border_cache[key] = (
+                header.center(self.f.width) + "\n",
+                ("-" * (width - 2)).center(self.f.width) + "\n",
+            )
+        return self._border_cache[key]
 
-    def solve(self) -> Tuple[int, List[Move]]:
+    def bitmask(self) -> State:
+        """
+        Return the board state as an integer bitmask where bit k is set if
+        hole k (numbered row by row, from the top) has a peg in it
+        """
+
+        state = 0
+        for i, j in self.peg_locations_map.values():
+            state |= 1 << hole_number(i, j)
+
+        return state
+
+    def can_reach(self, k: int) -> bool:
+        """
+        Return False if it is proven that the board can never be reduced to
+        k pegs or fewer, otherwise True
+
+        The check uses invariants of the board rather than a search, so it
+        takes constant time for a given board size, but True does not
+        guarantee that k pegs can actually be reached
+        """
+        return self.solver.can_reach(self.bitmask(), k)
+
+    def solve_ids(self, workers: int = 1) -> Tuple[int, List[MoveId]]:
+        """
+        Find the optimal result for the current state of the board and return
+        the number of pegs and list of move IDs needed to get there
+
+        The solution is looked up in the tablebase if there is one, otherwise
+        it is searched for. With more than 1 worker, the search is split
+        between that many processes (see parallel.py)
+        """
+
+        state = self.bitmask()
+        self.search_stats = None
+        if self.tablebase is not None:
+            solution = self.tablebase.solve(state)
+            if solution is not None:
+                return solution
+        if workers > 1:
+            return solve_parallel(self.num_rows, state, workers)
+        solution = self.solver.solve(state, keep_table=True)
+        self.search_stats = self.solver.stats
+        return solution
+
+    def solve_anytime(
+        self,
+        deadline: Optional[float] = None,
+        cancel: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[int, List[MoveId], bool]:
+        """
+        Search the current state of the board until the search is complete,
+        the deadline passes or cancel returns True (see Solver.solve_anytime)
+        and return the fewest pegs found, the list of move IDs needed to get
+        there and whether the result is proven optimal
+        """
+
+        state = self.bitmask()
+        self.search_stats = None
+        if self.tablebase is not None:
+            solution = self.tablebase.solve(state)
+            if solution is not None:
+                return solution[0], solution[1], True
+        result = self.solver.solve_anytime(
+            state, deadline, cancel, keep_table=True
+        )
+        self.search_stats = self.solver.stats
+        return result
+
+    def count_outcomes(
+        self,
+        max_positions: Optional[int] = None
+    ) -> Optional[Dict[int, int]]:
+        """
+        Return the number of distinct complete sequences of moves from the
+        current state of the board that end with each number of pegs, or
+        None if more than max_positions positions would have to be held at
+        once (see analysis.count_outcomes)
+        """
+        return count_outcomes(self.solver, self.bitmask(), max_positions)
+
+    def best_first_peg(
+        self,
+        deadline: Optional[float] = None,
+    ) -> Tuple[Peg, int, bool]:
+        """
+        Return the peg to remove from a full board to be able to leave the
+        fewest pegs, the number of pegs that can be left, and whether that
+        number is proven to be the fewest
+
+        With a deadline (as time.monotonic), each start is searched for an
+        equal share of the time left, so on large boards the result is the
+        best found rather than proven optimal (see solve_anytime)
+        """
+
+        # Starts that are symmetric to an earlier start have the same result
+        full = (1 << self.num_holes) - 1
+        starts = []
+        seen = set()
+        for peg in sorted(self.peg_locations_map):
+            state = full ^ (1 << hole_number(*self.peg_locations_map[peg]))
+            key = self.solver.canonical(state)[0]
+            if key not in seen:
+                seen.add(key)
+                starts.append((peg, state))
+
+        # The best result is only proven if the result of every start is
+        best_peg, best_result, all_proven = "", self.num_holes, True
+        for n, (peg, state) in enumerate(starts):
+
+            entry = None
+            proven = True
+            if self.tablebase is not None:
+                entry = self.tablebase.lookup(state)
+            if entry is not None:
+                result = entry[0]
+            elif deadline is None:
+                result = self.solver.solve(state, keep_table=True)[0]
+            else:
+                share = (deadline - time.monotonic()) / (len(starts) - n)
+                result, _, proven = self.solver.solve_anytime(
+                    state, time.monotonic() + share, keep_table=True
+                )
+            all_proven = all_proven and proven
+
+            if result < best_result:
+                best_peg, best_result = peg, result
+
+            # No start can leave fewer than 1 peg
+            if best_result == 1:
+                return best_peg, best_result, True
+
+        return best_peg, best_result, all_proven
+
+    def solve(self, workers: int = 1) -> Tuple[int, List[Move]]:
         """
         Find the optimal result for the current state of the board and return
         the number of pegs and list of moves needed to get there
         """
 
-        # Initialize optimal outcome attributes
-        optimal_result: int = self.number_of_pegs()
-        optimal_moves: List[Move] = []
+        # Search the bitmask of the current board with the solver engine
+        optimal_result, path = self.solve_ids(workers)
 
-        def dfs(moves_taken: List[Move] = []):
+        # Map each hole number to the peg currently in that hole
+        holes: List[Peg] = [peg for row in self.board for peg in row]
 
-            # Base Case: There are no moves left
-            if not self.moves_map:
+        # Replay the jumps found by the solver to translate them into Moves
+        table = self.jump_table
+        optimal_moves: List[Move] = []
+        for move_id in path:
+            src = table.src[move_id]
+            over = table.over[move_id]
+            dst = table.dst[move_id]
+            peg = holes[src]
+            optimal_moves.append((peg, table.jumps[move_id]))
+            holes[src], holes[over], holes[dst] = "", "", peg
 
-                # Reference global optimal solution variables
-                nonlocal optimal_result
-                nonlocal optimal_moves
+        return optimal_result, optimal_moves
 
-                # Compare result to optimal result
-                result = self.number_of_pegs()
-                if result < optimal_result:
-                    optimal_result = result
-                    optimal_moves = copy.deepcopy(moves_taken)
 
-                return
+# Boards of the current process by number of rows, for searches sent to a
+# pool of processes (see Game), which keep the results of their searches
+# for the next one
+_boards: Dict[int, Board] = {}
 
-            # Recursive Case: There are moves left
 
-            # Get a list of the pegs with moves to iterate over each
-            pegs_with_moves = list(self.moves_map.keys())
-            for peg in pegs_with_moves:
+def _pool_board(rows: int) -> Board:
+    """Return the Board of the current process for rows rows"""
+    if rows not in _boards:
+        _boards[rows] = Board(rows)
+    return _boards[rows]
 
-                # Copy list of possible jumps to iterate over each jump
-                jumps = self.moves_map[peg].copy()
-                for jump in jumps:
 
-                    # Save peg's current location and the peg to be jumped
-                    jump_from = self.peg_locations_map[peg]
-                    peg_jumped = self.board[jump[0][0]][jump[0][1]]
+def search_position(
+    rows: int,
+    state: State,
+    seconds: float,
+) -> Tuple[int, List[MoveId], bool]:
+    """
+    Search state on a board with rows rows for up to seconds, in a process
+    of a pool (see Board.solve_anytime)
+    """
+    solver = _pool_board(rows).solver
+    return solver.solve_anytime(
+        state, time.monotonic() + seconds, keep_table=True
+    )
 
-                    # Make the move and add it to list of moves taken
-                    self.make_move(peg, jump)
-                    moves_taken.append((peg, jump))
 
-                    # DFS to continue this search path
-                    dfs(moves_taken)
+def count_position_outcomes(
+    rows: int,
+    state: State,
+    max_positions: Optional[int] = None,
+) -> Optional[Dict[int, int]]:
+    """
+    Count the ways to finish from state on a board with rows rows, in a
+    process of a pool (see Board.count_outcomes)
+    """
+    solver = _pool_board(rows).solver
+    return count_outcomes(solver, state, max_positions)
 
-                    # Undo the move before the next iteration
-                    self.undo_move((peg, jump), peg_jumped, jump_from)
-                    moves_taken.pop()
 
-        # Begin DFS from the current board
-        dfs()
-        return optimal_result, optimal_moves
+def search_first_peg(rows: int, seconds: float) -> Tuple[Peg, int, bool]:
+    """
+    Find the best peg to remove first on a board with rows rows, searching
+    for up to seconds in a process of a pool (see Board.best_first_peg)
+    """
+    return _pool_board(rows).best_first_peg(time.monotonic() + seconds)
 
 
 if __name__ == "__main__":
 
     # Demos for testing solve method
-    # Note: for debugging, need to change:
+    # Note: for debugging, need to change the relative imports, e.g.:
     # `from .formatter space, Formatter`
     # to
     # `from formatter import space, Formatter`
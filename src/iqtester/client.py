@@ -0,0 +1,134 @@
+from typing import List, Optional, Tuple
+import argparse
+import asyncio
+import re
+import time
+from .server import PORT
+
+
+# === Type Aliases & Explanations ===
+
+# A script is the list of lines a client sends, one line each time the
+# server prompts for input (see Formatter.prompt), e.g. the DEFAULT_SCRIPT
+# starts a new game, removes peg 'a', asks for a hint, quits the game and
+# then quits the session.
+Script = List[str]
+
+DEFAULT_SCRIPT: Script = ["", "a", ">", "!", "q"]
+
+# End of the text sent by a prompt, with or without ANSI formatting codes
+PROMPT = re.compile(rb">>(\x1b\[0m)? $")
+
+
+async def read_prompt(
+    reader: asyncio.StreamReader,
+    transcript: bytearray,
+) -> None:
+    """Read from reader into transcript until the server prompts for input"""
+
+    seen = len(transcript)
+    while len(transcript) == seen or not PROMPT.search(transcript[-16:]):
+        data = await reader.read(4096)
+        if not data:
+            raise EOFError("connection closed before a prompt")
+        transcript += data
+
+
+async def play(
+    script: Script = DEFAULT_SCRIPT,
+    host: str = "127.0.0.1",
+    port: int = PORT,
+    path: Optional[str] = None,
+) -> str:
+    """
+    Connect to a server (on host and port, or on the Unix socket at path),
+    send each line of script when prompted and return everything received
+    """
+
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    transcript = bytearray()
+    try:
+        for line in script:
+            await read_prompt(reader, transcript)
+            writer.write(line.encode() + b"\n")
+            await writer.drain()
+
+        # Read the rest, until the server closes the connection
+        transcript += await reader.read()
+    finally:
+        writer.close()
+
+    return transcript.decode(errors="replace")
+
+
+async def load_test(
+    connections: int,
+    script: Script = DEFAULT_SCRIPT,
+    host: str = "127.0.0.1",
+    port: int = PORT,
+    path: Optional[str] = None,
+) -> List[Tuple[float, Optional[str]]]:
+    """
+    Play script with many connections at once, and return the seconds taken
+    by each connection and the error it ended with, if any
+    """
+
+    async def timed() -> Tuple[float, Optional[str]]:
+        start = time.perf_counter()
+        try:
+            await play(script, host, port, path)
+            error = None
+        except (EOFError, OSError) as e:
+            error = repr(e)
+        return time.perf_counter() - start, error
+
+    return list(await asyncio.gather(*(timed() for _ in range(connections))))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Load test a server from the command line"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m iqtester.client",
+        description="Play the same script with many connections to an IQ "
+                    "Tester server at once and report how long they took",
+    )
+    parser.add_argument(
+        "-n",
+        "--connections",
+        type=int,
+        default=100,
+        help="number of connections at once (default: 100)",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=PORT)
+    parser.add_argument("-u", "--unix", help="path of a Unix socket")
+    parser.add_argument(
+        "--script",
+        nargs="*",
+        default=DEFAULT_SCRIPT,
+        help="lines to send, one per prompt (default: play 1 hint and quit)",
+    )
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(load_test(
+        args.connections, args.script, args.host, args.port, args.unix
+    ))
+    times = sorted(seconds for seconds, error in results if error is None)
+    errors = [error for _, error in results if error is not None]
+    print(f"{len(times)} of {len(results)} connections completed")
+    if times:
+        print(
+            f"Seconds per connection: median {times[len(times) // 2]:.3f},"
+            f" max {times[-1]:.3f}"
+        )
+    for error in sorted(set(errors)):
+        print(f"{errors.count(error)} failed with {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,41 @@
-from typing import Callable, List, Tuple
+from contextlib import contextmanager
+from typing import (
+    Callable, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+)
 from functools import wraps
+import sys
+import time
 import colorama  # type: ignore
 
 
-# Colorama library is used to convert Mac and Unix ANSI escape characters to
-# the appropriate win32 calls to modify standard output
-colorama.init()
+def init_terminal() -> None:
+    """
+    Prepare standard output of a terminal for ANSI escape characters
+
+    Colorama library is used to convert Mac and Unix ANSI escape characters
+    to the appropriate win32 calls to modify standard output. It wraps
+    sys.stdout, so it is only called when the game is played in a terminal
+    (see __main__.py), rather than whenever iqtester is imported.
+    """
+    colorama.init()
 
 
 def space(func: Callable) -> Callable:
-    """Decorator for class methods to print new lines before and after"""
+    """
+    Decorator for class methods to print new lines before and after, where
+    everything printed is sent as one frame (see Formatter.frame)
+
+    The class must be a Formatter or have its Formatter as attribute f
+    """
 
     # wraps decorator needed so space can be applied to class methods
     @wraps(func)
     def wrapped(self, *args, **kwargs):
-        print()
-        res = func(self, *args, **kwargs)
-        print()
+        f = self if isinstance(self, Formatter) else self.f
+        with f.frame():
+            f.write("\n")
+            res = func(self, *args, **kwargs)
+            f.write("\n")
 
         return res
 
@@ -39,7 +58,30 @@ class Formatter:
         "END": ("\033[0m", 4),
     }
 
-    def __init__(self, width: int = 78, prompt_color: str = "BLUE") -> None:
+    def __init__(
+        self,
+        width: int = 78,
+        prompt_color: str = "BLUE",
+        output: Optional[TextIO] = None,
+        input_stream: Optional[TextIO] = None,
+        plain: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        width : int
+            The max width for all lines printed
+        prompt_color : str
+            The text color for the prompt method
+        output : TextIO
+            Text stream to print to, such as an io.StringIO, a socket file or
+            os.devnull, or None to print to standard output
+        input_stream : TextIO
+            Text stream to read user input from, one line at a time, or None
+            to read standard input with the built-in input function
+        plain : bool
+            Whether to print plain text, without ANSI formatting codes
+        """
 
         # The max width for all lines printed
         self.width = width
@@ -47,6 +89,71 @@ class Formatter:
         # The text color for the prompt method
         self.prompt_color = prompt_color
 
+        # Text written while a frame is open, and the number of open frames
+        # (see frame method)
+        self.buffer: List[str] = []
+        self.frames = 0
+
+        # Lines that are printed on every redraw, such as borders and
+        # headers, by the arguments of the center method
+        self.line_cache: Dict[Tuple, str] = {}
+
+        # Where text is printed and input is read from (see above)
+        self.output = output
+        self.input_stream = input_stream
+        self.plain = plain
+
+    def stream(self) -> TextIO:
+        """Return the text stream to print to"""
+
+        # Standard output is looked up on every call, since it may have been
+        # replaced (e.g. by colorama or while testing)
+        return sys.stdout if self.output is None else self.output
+
+    def is_terminal(self) -> bool:
+        """
+        Return whether text is printed to a terminal, where the user can
+        press keys such as Ctrl-C, rather than to a file or a connection
+        """
+        isatty = getattr(self.stream(), "isatty", None)
+        return isatty is not None and isatty()
+
+    def write(self, text: str) -> None:
+        """Write text to the output, or to the frame if one is open"""
+        if self.frames:
+            self.buffer.append(text)
+        else:
+            self.stream().write(text)
+
+    def flush(self) -> None:
+        """Send the text of the frame so far with one write and one flush"""
+        text = "".join(self.buffer)
+        self.buffer.clear()
+        stream = self.stream()
+        if text:
+            stream.write(text)
+        stream.flush()
+
+    def pause(self, seconds: float) -> None:
+        """Send the text of the frame so far, then wait for seconds"""
+        self.flush()
+        time.sleep(seconds)
+
+    @contextmanager
+    def frame(self) -> Iterator[None]:
+        """
+        Collect everything written inside the with block, and send it all
+        at once when the outermost frame is closed, so a redraw of the
+        screen is one write rather than one per line
+        """
+        self.frames += 1
+        try:
+            yield
+        finally:
+            self.frames -= 1
+            if not self.frames:
+                self.flush()
+
     def center(
         self,
         msg: str,
@@ -55,7 +162,8 @@ class Formatter:
         inner_width: int = 0,
         inner_border_char: str = "",
         format_char_count: int = 0,
-        end: str = "\n"
+        end: str = "\n",
+        cache: bool = False
     ) -> None:
         """
         Print msg across self.width with optional styling and inner container
@@ -76,9 +184,40 @@ class Formatter:
             The number of printed characters in msg that represent formatting,
             such that len(msg) - fc is the actual printed length of msg
         end : str
-            The character(s) passed as the 'end' parameter of 'print'
+            The character(s) printed after msg
+        cache : bool
+            Whether to keep the formatted line to print it again, which is
+            for lines that don't change between redraws
         """
 
+        if cache:
+
+            # The line also depends on the width and the plain mode, which
+            # may change after it is cached (e.g. in the settings)
+            args = (msg, tuple(styles), fill_char, inner_width,
+                    inner_border_char, format_char_count)
+            key = (self.width, self.plain) + args
+            if key not in self.line_cache:
+                self.line_cache[key] = self.line(*args)
+            self.write(self.line_cache[key] + end)
+            return
+
+        self.write(self.line(
+            msg, styles, fill_char, inner_width, inner_border_char,
+            format_char_count
+        ) + end)
+
+    def line(
+        self,
+        msg: str,
+        styles: Sequence[str],
+        fill_char: str,
+        inner_width: int,
+        inner_border_char: str,
+        format_char_count: int,
+    ) -> str:
+        """Return msg formatted as a line of self.width (see center)"""
+
         # Calculate the actual printed length of msg less formatting characters
         true_len = len(msg) - format_char_count
 
@@ -104,14 +243,11 @@ class Formatter:
             right_padding = 0
 
         # Assemble entire formatted_msg
-        formatted_msg = (
+        return (
             f"{' ' * left_margin}{inner_border_char}{fill_char * left_padding}"
             f"{msg}{fill_char * right_padding}{inner_border_char}"
         )
 
-        # Print formatted message with custom end
-        print(formatted_msg, end=end)
-
     def apply_formatting(self, msg: str, styles=["BOLD"]) -> Tuple[str, int]:
         """
         Apply multiple styles to a msg and return the formatted string
@@ -130,6 +266,13 @@ class Formatter:
             The number of characters added to msg (when printed) by formatting
         """
 
+        # Plain text has no formatting, but styles are still checked
+        if self.plain:
+            for style in styles:
+                if style not in self.format_codes_map:
+                    raise NotImplementedError(f'"{style}" is not implemented')
+            return msg, 0
+
         # Apply styles to msg by adding formatting prefix and suffix
         formatting_prefix = ""
         format_char_count = 0
@@ -165,4 +308,21 @@ class Formatter:
         self.center(f">> {msg} >>", [color], " ", 0, "", -1, "")
 
         # Request input with cursor immediately following printed message
-        return input(" ")
+        return self.input(" ")
+
+    def input(self, msg: str = "") -> str:
+        """
+        Print msg and return the next line of user input, without its line
+        ending, like the built-in input function
+        """
+
+        if self.input_stream is None:
+            self.flush()
+            return input(msg)
+
+        self.write(msg)
+        self.flush()
+        line = self.input_stream.readline()
+        if not line:
+            raise EOFError("no more input")
+        return line.rstrip("\r\n")
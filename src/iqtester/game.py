@@ -1,18 +1,37 @@
+from concurrent.futures import Executor
 from typing import Dict, List, Optional, Set, Tuple
 import time
 from .formatter import space, Formatter
-from .board import Board, BoardLocation, Jump, Move, Peg
+from .analysis import MAX_COUNTED_PEGS, MAX_COUNTED_ROWS, count_outcomes
+from .board import (
+    Board, BoardLocation, Jump, Move, MoveId, Peg, count_position_outcomes,
+    search_first_peg, search_position,
+)
+from .solver import State
+from .jumps import hole_number
+from .results import GameResult
+from . import replay
+from .speculation import Speculator
 
 
 class Game:
     """Manager for a game of IQ Tester"""
 
+    # Most positions with the same number of pegs to hold at once when
+    # counting the ways to finish a game, to rate how hard a position is
+    # without a noticeable wait. This covers every position of a 5 row board.
+    RATING_MAX_POSITIONS = 5_000
+
     def __init__(
         self,
         f: Formatter,
         size: int = 5,
         game_over_pause: float = 2,
-        msg_pause: float = 0.75
+        msg_pause: float = 0.75,
+        hint_time_limit: float = 10,
+        speculator: Optional[Speculator] = None,
+        show_stats: bool = False,
+        executor: Optional[Executor] = None,
     ) -> None:
 
         # The Formatter instance used to format print statements
@@ -25,17 +44,50 @@ class Game:
         # displayed, like invalid selection or updated settings
         self.msg_pause = msg_pause
 
+        # Setting for the most time (in seconds) to search for a hint, after
+        # which the best move found so far is shown
+        self.hint_time_limit = hint_time_limit
+
         # The game board
         self.b = Board(size, self.f)
 
+        # Background thread to solve positions while the user is thinking,
+        # so hints are ready when they are requested (see speculation.py)
+        self.speculator = speculator
+
+        # Setting to show the counters and timings of each hint search, to
+        # tune how long hints take (see SolverStats)
+        self.show_stats = show_stats
+
+        # Pool of processes to run every hint search and rating that isn't
+        # looked up in a tablebase, so they don't hold up other games played
+        # by the same process (see server.py). Without one, they run here.
+        self.executor = executor
+
+        # Bitmask of the board after the first peg is removed, and the hole
+        # of that peg (numbered row by row, see jumps.py)
+        self.start_state: Optional[int] = None
+        self.start_hole: Optional[int] = None
+
+        # Number of hints shown, and the time the game started and how long
+        # it took (in seconds), once it is over
+        self.hints_used = 0
+        self.started = time.monotonic()
+        self.seconds: Optional[float] = None
+
         # Keep a list of moves taken during this game. For each move, store the
         # Move object (Peg, Jump), the Peg that was jumped, and the original
         # location of the jumping peg
         self.moves_taken: List[Tuple[Move, Peg, BoardLocation]] = []
 
-        # Initialize attributes of the optimal solution (not yet known)
+        # Initialize attributes of the optimal solution (not yet known), where
+        # the optimal moves are stored as move IDs (see jumps.py)
         self.optimal_result: Optional[int] = None
-        self.optimal_moves: Optional[List[Move]] = None
+        self.optimal_moves: Optional[List[MoveId]] = None
+
+        # Whether the optimal solution is proven, or is only the best found
+        # before the hint search was stopped
+        self.optimal_proven = True
 
         # Pointer to travere list optimal moves if user continues to make them
         self.optimal_moves_idx = 0
@@ -44,6 +96,7 @@ class Game:
         """Initiate and handle the game logic"""
 
         # Display New Game header
+        self.started = time.monotonic()
         self.print_new_game_header()
 
         # Print initial board
@@ -93,13 +146,41 @@ class Game:
 
             # Prompt user to choose a peg
             self.f.center("The game begins with one hole on the board empty.")
-            user_input = self.f.prompt("Choose a peg to remove to start")
+            self.f.center("Options: Hint ('>')", ["RED"])
+            user_input = self.b.parse_peg(
+                self.f.prompt("Choose a peg to remove to start")
+            )
 
             # Handle case of valid selection
             if user_input in self.b.peg_locations_map:
                 self.b.remove_peg(user_input)
+                self.start_state = self.b.bitmask()
+                full = (1 << self.b.num_holes) - 1
+                self.start_hole = (full ^ self.start_state).bit_length() - 1
+                self.speculate()
                 return
 
+            # Handle request for a hint of which peg to remove
+            if user_input == '>':
+                if self.executor is not None and self.b.tablebase is None:
+                    peg, result, proven = self.executor.submit(
+                        search_first_peg, self.b.num_rows, self.hint_time_limit
+                    ).result()
+                else:
+                    deadline = time.monotonic() + self.hint_time_limit
+                    peg, result, proven = self.b.best_first_peg(deadline)
+                self.hints_used += 1
+                self.b.print_board({peg}, "GREEN")
+                plural = "" if result == 1 else "s"
+                unproven = "" if proven else " (not proven optimal)"
+                self.f.center(
+                    f"* Hint: Remove '{peg}' to be able to leave {result}"
+                    f" peg{plural}{unproven} *",
+                    ["GREEN"],
+                    end="\n\n"
+                )
+                continue
+
             # Handle case of invalid selection
             self.invalid()
 
@@ -114,8 +195,8 @@ class Game:
                 "Options: Undo Last Move ('.') | Hint ('>') | Quit Game ('!')",
                 ["RED"],
             )
-            user_input = self.f.prompt(
-                "Input an option or choose a peg to move"
+            user_input = self.b.parse_peg(
+                self.f.prompt("Input an option or choose a peg to move")
             )
 
             # Handle special options
@@ -129,7 +210,7 @@ class Game:
             # Handle case of valid peg selection with possible moves
             elif (
                 user_input in self.b.peg_locations_map
-                and self.b.moves_map[user_input]
+                and self.b.moves_map.get(user_input)
             ):
                 return user_input
 
@@ -176,7 +257,9 @@ class Game:
 
             # Ask user to select the peg to be jumped over
             self.f.center(f"* {peg} can jump over the bold pegs *")
-            user_input = self.f.prompt("Choose the peg to jump over")
+            user_input = self.b.parse_peg(
+                self.f.prompt("Choose the peg to jump over")
+            )
 
             # Handle case of valid selection
             if user_input in possible_pegs_to_jump:
@@ -208,7 +291,8 @@ class Game:
         if self.optimal_moves:
 
             # Case: user is making next optimal move
-            if (peg, jump) == self.optimal_moves[self.optimal_moves_idx]:
+            next_move_id = self.optimal_moves[self.optimal_moves_idx]
+            if self.b.move_id(peg, jump) == next_move_id:
 
                 # Advance pointer for optimal_moves list
                 self.optimal_moves_idx += 1
@@ -225,13 +309,16 @@ class Game:
         # Append the details of this move to moves_taken
         self.moves_taken.append(((peg, jump), peg_jumped, jump_from))
 
+        # Start solving the new position in the background
+        self.speculate()
+
     def undo_move(self) -> None:
         """Reverse the last move taken and print the updated board"""
 
         # Handle case of no previous moves taken
         if not self.moves_taken:
             self.f.center("* Unable to go back *", end="\n\n")
-            time.sleep(self.msg_pause)
+            self.f.pause(self.msg_pause)
             self.b.print_board()
             return
 
@@ -247,6 +334,9 @@ class Game:
         # Clear any optimal solution that was stored
         self.clear_optimal_solution()
 
+        # Start solving the new position in the background
+        self.speculate()
+
         # Print updated board
         self.b.print_board()
 
@@ -259,44 +349,61 @@ class Game:
             # Get current number of pegs on the board to warn about run time
             num_pegs = self.b.number_of_pegs()
 
-            # Handle case of too many pegs to solve in under a minute
-            MAX = 13
-            if num_pegs > MAX:
-                msg = f"* Hints are disabled for over {MAX} pegs *"
-                self.f.center(msg)
-                time.sleep(self.msg_pause)
+            # Notify user right away if it is proven that 1 peg is no longer
+            # possible, which does not require solving the board
+            if not self.b.can_reach(1):
+                self.f.center("* 1 peg is no longer possible *", ["RED"])
+
+            # Only tell the user how long the search may take when it may
+            # take up to the time limit, and how to stop it early when the
+            # user plays in a terminal
+            if self.long_search(num_pegs):
+                msg = f"* Searching for up to {self.hint_time_limit} seconds."
+                if self.f.is_terminal():
+                    msg += " Press Ctrl-C to stop early."
+                self.f.center(msg + " *", ["RED"])
+
+            # Use the solution from the background thread if it is ready,
+            # otherwise stop the background thread to search right away for
+            # the best solution that can be found in the time limit
+            solution: Optional[Tuple[int, List[MoveId], bool]] = None
+            if self.speculator is not None:
+                speculated = self.speculator.result(
+                    self.b.num_rows, self.b.bitmask()
+                )
+                if speculated is not None:
+                    solution = speculated[0], speculated[1], True
+                else:
+                    self.speculator.cancel()
+            if solution is None and self.executor is not None and \
+                    self.b.tablebase is None:
+                solution = self.executor.submit(
+                    search_position, self.b.num_rows, self.b.bitmask(),
+                    self.hint_time_limit
+                ).result()
+            elif solution is None:
+                deadline = time.monotonic() + self.hint_time_limit
+                solution = self.b.solve_anytime(deadline)
+                if self.show_stats and self.b.search_stats is not None:
+                    self.f.center(self.b.search_stats.summary(), ["GRAY"])
+
+            # Handle case of the search being stopped before any line of
+            # moves was found
+            if not solution[1]:
+                self.f.center("* No hint found yet. Try again. *", ["RED"])
                 self.b.print_board()
                 return
 
-            # Handle case of long estimated time to solve
-            elif num_pegs > 11:
-
-                # Map number of remaining pegs to estimated time to solve
-                time_estimates = {
-                    13: 40,
-                    12: 10,
-                    11: 3,
-                }
-
-                seconds = time_estimates[num_pegs]
-                msg = f"* It may take up to {seconds} seconds to calculate" + \
-                      f" the optimal solution for {num_pegs} pegs *"
-                self.f.center(msg, ["RED"])
-                key = self.f.prompt(
-                    "Type 'x' to cancel hint request or any key to continue"
-                )
-                if key.lower() == 'x':
-                    self.b.print_board()
-                    return
-
-            # Request and save optimal solution from board instance and unpack
-            solution: Tuple[int, List[Move]] = self.b.solve()
+            # Save optimal solution and unpack
             self.optimal_result = solution[0]
             self.optimal_moves = solution[1]
+            self.optimal_proven = solution[2]
             self.optimal_moves_idx = 0
 
+        self.hints_used += 1
+
         # Next move is first in list of optimal moves
-        move: Move = self.optimal_moves[self.optimal_moves_idx]
+        move: Move = self.b.move(self.optimal_moves[self.optimal_moves_idx])
 
         # Unpack details to display hint to user
         peg: Peg = move[0]
@@ -305,7 +412,14 @@ class Game:
 
         # Display board and provide hint to user
         self.b.print_board({peg, peg_jumped}, "GREEN")
-        if self.optimal_result == 1:
+        if not self.optimal_proven:
+            plural = "" if self.optimal_result == 1 else "s"
+            self.f.center(
+                f"The best line found so far leaves {self.optimal_result}"
+                f" peg{plural} (not proven optimal).",
+                ["GREEN"],
+            )
+        elif self.optimal_result == 1:
             self.f.center(
                 "You still have a chance to leave just 1 peg!",
                 ["GREEN"],
@@ -315,50 +429,167 @@ class Game:
                 f"The best you can do is leave {self.optimal_result} pegs.",
                 ["GREEN"],
             )
+
+        # Rate how hard it is to reach the optimal result from here
+        outcomes = self.rate(self.b.bitmask())
+        if self.optimal_proven and self.optimal_result and outcomes:
+            share = percent(outcomes.get(self.optimal_result, 0), outcomes)
+            plural = "" if self.optimal_result == 1 else "s"
+            self.f.center(
+                f"{share} of the ways to finish from here leave"
+                f" {self.optimal_result} peg{plural}.",
+                ["GREEN"],
+            )
+
         self.f.center(
             f"* Hint: Jump '{peg}' over '{peg_jumped}' *",
             ["GREEN"],
             end="\n\n"
         )
 
+    def rate(self, state: State) -> Optional[Dict[int, int]]:
+        """
+        Return the number of ways to finish from state that end with each
+        number of pegs, or None if there are too many positions to count
+        them without a noticeable wait (see RATING_MAX_POSITIONS)
+        """
+        if self.executor is not None:
+            return self.executor.submit(
+                count_position_outcomes, self.b.num_rows, state,
+                self.RATING_MAX_POSITIONS
+            ).result()
+        return count_outcomes(self.b.solver, state, self.RATING_MAX_POSITIONS)
+
+    def long_search(self, num_pegs: int) -> bool:
+        """
+        Return whether a hint with num_pegs pegs on the board may take up to
+        the hint time limit to search for
+        """
+
+        # Every position of a board up to 6 rows can be solved right away,
+        # since there are at most 1.2 million of them (see analysis.py).
+        # Larger boards may take the whole time limit, even with as few pegs.
+        if self.b.tablebase is not None:
+            return False
+        return self.b.num_rows > MAX_COUNTED_ROWS or \
+            num_pegs > MAX_COUNTED_PEGS
+
+    def speculate(self) -> None:
+        """
+        Solve the current position and the positions one jump away from it
+        in the background, cancelling work on any other positions
+        """
+
+        # No need to solve anything if hints are looked up in a tablebase,
+        # and no use searching positions that can't be solved quickly while
+        # the user is thinking (see long_search)
+        if self.speculator is None or self.b.tablebase is not None:
+            return
+        if self.long_search(self.b.number_of_pegs()):
+            self.speculator.cancel()
+            return
+
+        if self.b.moves_map:
+            self.speculator.speculate_moves(self.b.num_rows, self.b.bitmask())
+        else:
+            self.speculator.cancel()
+
     def clear_optimal_solution(self) -> None:
         """Reset the attributes of an optimal solution for the game"""
         self.optimal_result = None
         self.optimal_moves = None
+        self.optimal_proven = True
         self.optimal_moves_idx = 0
 
     def invalid(self) -> None:
         """Print message notifying the user of an invalid selection"""
         self.f.center("* Invalid selection. Try again. *", end="\n\n")
-        time.sleep(self.msg_pause)
+        self.f.pause(self.msg_pause)
 
     @space
     def game_over(self) -> int:
         """Manage end of game and return points earned this game"""
 
         # Notify user that game is over
+        self.seconds = time.monotonic() - self.started
         self.f.center(" GAME OVER ", ["BOLD"], "*", end="\n\n")
 
-        # Get number of pegs left on board and handle each case
+        # Get number of pegs left on board and score it
         num_pegs = self.b.number_of_pegs()
-
-        if num_pegs == 1:
-            points = 50
-            result = "1 peg left. Wow! GENIUS!! 50 points!!"
-        elif num_pegs == 2:
-            points = 25
-            result = "2 pegs left. Above average! 25 points!"
-        elif num_pegs == 3:
-            points = 10
-            result = "3 pegs left. Just so-so. 10 points."
-        else:
-            points = 0
-            result = f"{num_pegs} pegs left. Not good. 0 points."
+        points, result = score(num_pegs)
 
         # Notify user of result
         self.f.center(result, ["GREEN"], end="\n\n")
-        print(("*" * self.f.width))
+
+        # Rate the result against every way the game could have been played
+        # from the same start
+        outcomes = None
+        if self.start_state is not None:
+            outcomes = self.rate(self.start_state)
+        if outcomes:
+            as_good = sum(
+                n for pegs, n in outcomes.items() if pegs <= num_pegs
+            )
+            plural = "" if num_pegs == 1 else "s"
+            self.f.center(
+                f"{percent(as_good, outcomes)} of the possible games from"
+                f" your start leave {num_pegs} peg{plural} or fewer.",
+                ["GREEN"],
+                end="\n\n"
+            )
+
+        self.f.write("*" * self.f.width + "\n")
 
         # Pause before returning number of points earned this game
-        time.sleep(self.game_over_pause)
+        self.f.pause(self.game_over_pause)
         return points
+
+    def result(self) -> Optional[GameResult]:
+        """Return the result of the game, or None if it isn't over"""
+
+        if self.seconds is None or self.start_hole is None:
+            return None
+        num_pegs = self.b.number_of_pegs()
+        return GameResult(
+            self.b.num_rows, self.start_hole, num_pegs, score(num_pegs)[0],
+            self.seconds, self.hints_used,
+        )
+
+    def record(self) -> Optional[bytes]:
+        """
+        Return the game record of the moves taken so far (see replay.py), or
+        None if the first peg hasn't been removed
+        """
+
+        if self.start_hole is None:
+            return None
+        table = self.b.jump_table
+        moves = [
+            table.ids[(hole_number(*jump_from), hole_number(*jump[1]))]
+            for (_, jump), _, jump_from in self.moves_taken
+        ]
+        return replay.encode(self.b.num_rows, self.start_hole, moves)
+
+
+def score(num_pegs: int) -> Tuple[int, str]:
+    """
+    Return the points earned for a game that ends with num_pegs pegs, and
+    the message shown for it
+    """
+
+    if num_pegs == 1:
+        return 50, "1 peg left. Wow! GENIUS!! 50 points!!"
+    elif num_pegs == 2:
+        return 25, "2 pegs left. Above average! 25 points!"
+    elif num_pegs == 3:
+        return 10, "3 pegs left. Just so-so. 10 points."
+    return 0, f"{num_pegs} pegs left. Not good. 0 points."
+
+
+def percent(count: int, outcomes: Dict[int, int]) -> str:
+    """
+    Return count as a percentage of the total of outcomes, to 2 significant
+    digits below 10% (e.g. "0.3%" or "5.2%") and to whole numbers above
+    """
+    value = 100 * count / sum(outcomes.values())
+    return f"{value:.2g}%" if value < 10 else f"{value:.0f}%"
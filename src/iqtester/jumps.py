@@ -0,0 +1,142 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+
+# === Type Aliases & Explanations ===
+
+# The holes of the board are numbered row by row, so the hole at row index i
+# and column index j is hole number i * (i + 1) // 2 + j. This is the same
+# order in which Board.initiate assigns the peg characters.
+
+# A location on the board as a tuple of row index and column index (the same
+# as BoardLocation in board.py)
+Location = Tuple[int, int]
+
+# Every jump that is possible on a board of a given size is identified by an
+# integer, its move ID. A move ID does not depend on which peg makes the
+# jump, only on the holes it jumps from, over and into.
+MoveId = int
+
+# Reference diagram of board indices:
+# Row Index  Column Index
+#     0           0
+#     1          0 1
+#     2         0 1 2
+#     3        0 1 2 3
+#     4       0 1 2 3 4
+
+# Define each "direction" from peg's location (i, j) as a tuple, such
+# that the adjacent hole location is: (i + row offset, j + col offset)
+DIRECTIONS = [
+    (1, 0),     # Down and left
+    (1, 1),     # Down and right
+    (-1, -1),   # Up and left
+    (-1, 0),    # Up and right
+    (0, -1),    # Left
+    (0, 1),     # Right
+]
+
+
+def hole_number(i: int, j: int) -> int:
+    """Return the hole number of the location at row i and column j"""
+    return i * (i + 1) // 2 + j
+
+
+class JumpTable:
+    """
+    Every jump that is possible on a board of a given size, by move ID
+
+    Move IDs are assigned in order of the hole the peg jumps from, then in
+    the order of DIRECTIONS, so the move IDs from a given hole are in the
+    same order that Board lists the jumps of a peg in that hole
+    """
+
+    def __init__(self, rows: int) -> None:
+
+        # Number of rows and holes of the board
+        self.rows = rows
+        self.num_holes = rows * (rows + 1) // 2
+
+        # Location of each hole by hole number
+        self.locations: List[Location] = [
+            (i, j) for i in range(rows) for j in range(i + 1)
+        ]
+
+        # For each move ID, the hole numbers the peg jumps from, over and
+        # into, and the jump as (jumped location, landing location)
+        self.src: List[int] = []
+        self.over: List[int] = []
+        self.dst: List[int] = []
+        self.jumps: List[Tuple[Location, Location]] = []
+
+        # For each move ID, the mask of the three holes involved and the
+        # mask of the holes that must have a peg (from and over). A jump is
+        # possible if state & mask == pattern, and the position after the
+        # jump is state ^ mask, since all three holes flip.
+        self.masks: List[int] = []
+        self.patterns: List[int] = []
+
+        # Move IDs of the jumps from each hole
+        self.from_hole: List[List[MoveId]] = []
+
+        # Map (from hole, landing hole) to move ID
+        self.ids: Dict[Tuple[int, int], MoveId] = {}
+
+        # For each hole, the holes up to two holes away from it in a line
+        # (including itself). A jump only depends on the holes it jumps
+        # from, over and into, so these are the only holes where a peg can
+        # gain or lose jumps when the hole changes.
+        self.nearby: List[List[int]] = []
+
+        for i, j in self.locations:
+            from_hole = []
+            for row_offset, col_offset in DIRECTIONS:
+
+                # Landing location must be on the board (if it is, then so
+                # is the location being jumped over)
+                landing = (i + row_offset * 2, j + col_offset * 2)
+                if not self.is_location_valid(*landing):
+                    continue
+                jumped = (i + row_offset, j + col_offset)
+
+                move_id = len(self.jumps)
+                src = hole_number(i, j)
+                over = hole_number(*jumped)
+                dst = hole_number(*landing)
+                self.src.append(src)
+                self.over.append(over)
+                self.dst.append(dst)
+                self.jumps.append((jumped, landing))
+                pattern = (1 << src) | (1 << over)
+                self.masks.append(pattern | (1 << dst))
+                self.patterns.append(pattern)
+                self.ids[(src, dst)] = move_id
+                from_hole.append(move_id)
+
+            self.from_hole.append(from_hole)
+
+            nearby = [hole_number(i, j)]
+            for row_offset, col_offset in DIRECTIONS:
+                for k in (1, 2):
+                    location = (i + row_offset * k, j + col_offset * k)
+                    if self.is_location_valid(*location):
+                        nearby.append(hole_number(*location))
+            self.nearby.append(nearby)
+
+    def is_location_valid(self, i: int, j: int) -> bool:
+        """Return True if i, j are valid row, column indices, respectively"""
+        return 0 <= i < self.rows and 0 <= j <= i
+
+    def __len__(self) -> int:
+        return len(self.jumps)
+
+
+@lru_cache(maxsize=None)
+def jump_table(rows: int) -> JumpTable:
+    """
+    Return the JumpTable for a board with rows rows
+
+    The board geometry never changes for a given number of rows, so the table
+    is computed once per size and shared, so it must not be modified
+    """
+    return JumpTable(rows)
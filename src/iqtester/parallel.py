@@ -0,0 +1,195 @@
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+)
+from multiprocessing import Value
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import time
+from .jumps import MoveId
+from .solver import Solver, State
+
+
+# === Type Aliases & Explanations ===
+
+# A task is a subtree of the search, represented as a tuple of the list of
+# move IDs that lead from the root to the subtree and the position there
+Task = Tuple[List[MoveId], State]
+
+# The outcome of a task, as whether its subtree was searched in full (or
+# proven unable to improve on the best result of every worker), and the
+# fewest pegs and move IDs of the best line found in it
+Outcome = Tuple[bool, int, List[MoveId]]
+
+
+# Seconds a worker searches a task before handing it back to be split into
+# smaller tasks. Work is split where the search turns out to be large, so
+# workers stay busy however uneven the subtrees are, while small subtrees
+# are searched in one task without the cost of splitting them.
+TASK_SECONDS = 0.5
+
+
+# Globals of each worker process (set by _init_worker)
+_best: Any = None
+_solvers: Dict[int, Solver] = {}
+
+
+def _init_worker(best: Any) -> None:
+    """Store the shared best result in the worker process"""
+    global _best
+    _best = best
+
+
+def _solve_task(rows: int, state: State, seconds: float) -> Outcome:
+    """
+    Search the subtree at state in a worker process for up to seconds and
+    return its outcome
+
+    The search stops as soon as the best result shared by all workers is
+    as low as the lower bound of state, since the subtree can't improve on
+    it any more, so workers don't keep searching once any of them has found
+    the best possible result
+    """
+
+    # Each worker process keeps one solver per board size
+    if rows not in _solvers:
+        _solvers[rows] = Solver(rows)
+    solver = _solvers[rows]
+    pegs = bin(state).count("1")
+
+    # The fewest pegs the subtree could possibly leave (1 or 2)
+    bound = min(pegs, solver.lower_bound(state))
+    if _best.value <= bound:
+        return True, pegs, []
+
+    # Subtrees share many positions, so keep the results of earlier tasks
+    result, path, proven = solver.solve_anytime(
+        state,
+        deadline=time.monotonic() + seconds,
+        cancel=lambda: _best.value <= bound,
+        keep_table=True,
+    )
+
+    # Share the best line found with the other workers, even if the search
+    # was stopped, since it can be played
+    with _best.get_lock():
+        if result < _best.value:
+            _best.value = result
+
+    return proven or _best.value <= bound, result, path
+
+
+def split(solver: Solver, state: State, min_tasks: int) -> List[Task]:
+    """
+    Split the search from state into at least min_tasks subtrees (if there
+    are that many), by expanding every position one jump at a time
+
+    Positions with no moves left are kept as they are, and subtrees whose
+    positions are symmetric to an earlier subtree are dropped, since they
+    have the same optimal result.
+    """
+
+    masks, patterns = solver.masks, solver.patterns
+    tasks: List[Task] = [([], state)]
+
+    while len(tasks) < min_tasks:
+        expanded: Dict[State, Task] = {}
+        any_moves = False
+        for prefix, position in tasks:
+            moves = [
+                k for k, (mask, pattern) in enumerate(zip(masks, patterns))
+                if position & mask == pattern
+            ]
+
+            # Keep positions with no moves left
+            if not moves:
+                expanded[solver.canonical(position)[0]] = (prefix, position)
+                continue
+
+            any_moves = True
+            for k in moves:
+                child = position ^ masks[k]
+                key = solver.canonical(child)[0]
+                if key not in expanded:
+                    expanded[key] = (prefix + [k], child)
+
+        # Stop once no position can be expanded any further
+        if not any_moves:
+            break
+        tasks = list(expanded.values())
+
+    return tasks
+
+
+def solve_parallel(
+    rows: int,
+    state: State,
+    workers: Optional[int] = None,
+    task_seconds: float = TASK_SECONDS,
+) -> Tuple[int, List[MoveId]]:
+    """
+    Return the fewest pegs that can be left starting from state and the list
+    of move IDs needed to get there, searching with a pool of processes
+
+    The search starts with a task per subtree one or a few jumps from state.
+    A task that isn't complete after task_seconds is split into the subtrees
+    one or a few jumps further, which are handed out to the workers as they
+    become free.
+
+    Parameters
+    ----------
+    rows : int
+        Number of rows of the board
+    state : State
+        Bitmask of the position to solve (see solver.py)
+    workers : int
+        Number of worker processes, which defaults to the number of CPUs
+    task_seconds : float
+        Seconds to search a task before splitting it (see TASK_SECONDS)
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    solver = Solver(rows)
+    pegs = bin(state).count("1")
+
+    # Best result found so far by any worker, shared between processes
+    best = Value("i", pegs)
+
+    # The fewest pegs that can possibly be left, to stop early
+    floor = 1 if solver.can_reach(state, 1) else 2
+
+    # Best line found so far, as the fewest pegs and the move IDs
+    optimal_result, optimal_moves = pegs, []
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(best,)
+    ) as executor:
+
+        pending: Dict[Future, Task] = {}
+
+        def submit(tasks: List[Task], prefix: List[MoveId]) -> None:
+            for moves, position in tasks:
+                future = executor.submit(
+                    _solve_task, rows, position, task_seconds
+                )
+                pending[future] = (prefix + moves, position)
+
+        submit(split(solver, state, workers), [])
+        while pending and optimal_result > floor:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                prefix, position = pending.pop(future)
+                complete, result, path = future.result()
+                if result < optimal_result:
+                    optimal_result, optimal_moves = result, prefix + path
+
+                # Split a task that is taking long between the workers
+                if not complete:
+                    submit(split(solver, position, workers), prefix)
+
+        # Nothing left can improve on the floor once it has been reached
+        for future in pending:
+            future.cancel()
+
+    return optimal_result, optimal_moves
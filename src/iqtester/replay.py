@@ -0,0 +1,215 @@
+from functools import lru_cache
+from typing import (
+    Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+)
+import argparse
+import mmap
+import struct
+import time
+from .board import Board
+from .jumps import MoveId, jump_table
+from .solver import State
+
+
+# === Type Aliases & Explanations ===
+
+# A game record is the whole of a game in a few bytes:
+#   - byte 0: the number of rows of the board
+#   - byte 1: the hole of the peg removed at the start (numbered row by row,
+#     see jumps.py)
+#   - byte 2: the number of moves
+#   - then the move ID of each move (see JumpTable), as 1 byte, or as 2
+#     bytes (little-endian) on boards with more than 256 jumps (11 rows or
+#     more)
+# So a game of 5 rows takes at most 16 bytes, and it is replayed on the
+# bitmask of the board (see solver.py) with the shared JumpTable, one mask
+# per move, without a Board.
+#
+# An archive file is a header of HEADER_SIZE bytes (MAGIC, the format
+# VERSION and padding) followed by game records, one after the other.
+
+# Buffers that game records are read from
+Data = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+MAGIC = b"IQGR"
+VERSION = 1
+HEADER_SIZE = 8
+RECORD_HEADER_SIZE = 3
+
+
+class InvalidRecord(ValueError):
+    """A game record that can't be read or replayed"""
+
+
+@lru_cache(maxsize=None)
+def id_size(rows: int) -> int:
+    """Return the number of bytes of each move ID of a board with rows rows"""
+    return 1 if len(jump_table(rows)) <= 256 else 2
+
+
+def encode(rows: int, start: int, moves: Sequence[MoveId]) -> bytes:
+    """
+    Return the game record of a game on a board with rows rows that started
+    by removing the peg of hole start and made moves, by move ID
+    """
+
+    header = bytes([rows, start, len(moves)])
+    if id_size(rows) == 1:
+        return header + bytes(moves)
+    return header + struct.pack(f"<{len(moves)}H", *moves)
+
+
+def decode(
+    data: Data,
+    offset: int = 0,
+) -> Tuple[int, int, List[MoveId], int]:
+    """
+    Return the rows, the start hole and the move IDs of the game record at
+    offset of data, and the offset after it
+    """
+
+    if len(data) < offset + RECORD_HEADER_SIZE:
+        raise InvalidRecord("The record is incomplete")
+    rows, start, count = data[offset:offset + RECORD_HEADER_SIZE]
+    if not Board.MIN_ROWS <= rows <= Board.MAX_ROWS:
+        raise InvalidRecord(f"The record has {rows} rows")
+
+    size = id_size(rows)
+    first = offset + RECORD_HEADER_SIZE
+    end = first + count * size
+    if len(data) < end:
+        raise InvalidRecord("The record is incomplete")
+    if size == 1:
+        moves = list(data[first:end])
+    else:
+        moves = list(struct.unpack_from(f"<{count}H", data, first))
+
+    return rows, start, moves, end
+
+
+def replay(
+    rows: int,
+    start: int,
+    moves: Iterable[MoveId],
+    complete: bool = False,
+) -> State:
+    """
+    Play moves from the board with the peg of hole start removed and return
+    the bitmask of the board at the end
+
+    Raise InvalidRecord if a move isn't possible, or if complete and there
+    are jumps left at the end
+    """
+
+    table = jump_table(rows)
+    masks, patterns = table.masks, table.patterns
+    if not 0 <= start < table.num_holes:
+        raise InvalidRecord(f"There is no hole {start} on {rows} rows")
+
+    state = ((1 << table.num_holes) - 1) ^ (1 << start)
+    try:
+        for n, move_id in enumerate(moves):
+            mask = masks[move_id]
+            if state & mask != patterns[move_id]:
+                raise InvalidRecord(f"Move {n} ({move_id}) is not possible")
+            state ^= mask
+    except IndexError:
+        raise InvalidRecord(f"Move {n} ({move_id}) is not a jump")
+
+    if complete:
+        for mask, pattern in zip(masks, patterns):
+            if state & mask == pattern:
+                raise InvalidRecord("The game is not over")
+
+    return state
+
+
+def write_archive(path: str, records: Iterable[bytes]) -> int:
+    """Write records to a new archive file at path and return their number"""
+
+    count = 0
+    with open(path, "wb") as f:
+        f.write(MAGIC + bytes([VERSION]) + bytes(HEADER_SIZE - 5))
+        for record in records:
+            f.write(record)
+            count += 1
+
+    return count
+
+
+class Archive:
+    """Read-only view of a memory-mapped archive of game records"""
+
+    def __init__(self, path: str) -> None:
+
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Check the header before reading any record
+        header = self.data[:HEADER_SIZE]
+        if header[:4] != MAGIC or header[4:5] != bytes([VERSION]):
+            self.data.close()
+            raise ValueError(f"{path} is not an archive of game records")
+
+    def __iter__(self) -> Iterator[Tuple[int, int, List[MoveId]]]:
+        """Yield the rows, start hole and move IDs of every record"""
+        offset = HEADER_SIZE
+        while offset < len(self.data):
+            rows, start, moves, offset = decode(self.data, offset)
+            yield rows, start, moves
+
+    def validate(self, complete: bool = True) -> Tuple[int, Optional[str]]:
+        """
+        Replay every record and return the number of valid records and the
+        error of the first invalid record, if any (see replay)
+
+        Records follow each other without an index, so nothing after an
+        invalid record is read
+        """
+
+        count = 0
+        offset = HEADER_SIZE
+        try:
+            while offset < len(self.data):
+                rows, start, moves, end = decode(self.data, offset)
+                replay(rows, start, moves, complete)
+                offset = end
+                count += 1
+        except InvalidRecord as e:
+            return count, f"{e} (record {count} at byte {offset})"
+
+        return count, None
+
+    def close(self) -> None:
+        self.data.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Validate archives of game records from the command line"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m iqtester.replay",
+        description="Replay every game of archives of game records and "
+                    "check that each move is possible",
+    )
+    parser.add_argument("paths", nargs="+", help="archive files")
+    parser.add_argument(
+        "--partial",
+        action="store_true",
+        help="accept games that were stopped before the end",
+    )
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        archive = Archive(path)
+        start = time.perf_counter()
+        count, error = archive.validate(not args.partial)
+        seconds = time.perf_counter() - start
+        archive.close()
+        print(f"{path}: {count:,} valid games in {seconds:.2f} seconds")
+        if error is not None:
+            print(f"{path}: {error}")
+
+
+if __name__ == "__main__":
+    main()
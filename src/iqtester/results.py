@@ -0,0 +1,385 @@
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional
+import json
+import math
+import os
+import struct
+import sys
+from .tablebase import DEFAULT_DIRECTORY
+
+
+# === Type Aliases & Explanations ===
+
+# Every completed game is appended to a log file as a record of RECORD_SIZE
+# bytes, after a header of HEADER_SIZE bytes (MAGIC, the format VERSION and
+# padding). Records are never changed once written.
+#
+# Alongside the log, a summary file keeps running totals of every game in
+# the log and a QuantileSketch of game durations, with the number of
+# records it covers. So lifetime stats are read from the summary without
+# scanning the log. If the summary is behind the log (e.g. the process was
+# stopped between the two writes), only the records after it are read, and
+# the log is only scanned in full if the summary is missing or doesn't
+# match it.
+#
+# Several processes may keep results in the same directory (e.g. two games
+# played in two terminals), so the log and summary are only changed while
+# holding a lock on LOCK_FILE, and each store catches its summary up with
+# the log before writing it, to count the games recorded by the others.
+
+MAGIC = b"IQRL"
+VERSION = 1
+HEADER_SIZE = 8
+
+# rows, start hole, pegs left, points, seconds, hints used (see GameResult)
+RECORD = struct.Struct("<BBBBfH")
+RECORD_SIZE = RECORD.size
+
+LOG_FILE = "results.log"
+
+# Suffix of a log that isn't a results log, e.g. an empty file left by a
+# creation that was stopped, which is kept aside when a new log is started
+BAD_SUFFIX = ".bad"
+SUMMARY_FILE = "results.json"
+LOCK_FILE = "results.lock"
+
+
+class GameResult(NamedTuple):
+    """The result of a completed game"""
+
+    rows: int
+    start: int
+    pegs_left: int
+    points: int
+    seconds: float
+    hints: int
+
+
+class QuantileSketch:
+    """
+    Streaming estimate of the quantiles of positive values, in a fixed
+    amount of memory however many values are added
+
+    Values are counted in bins whose bounds grow by a factor of gamma, so
+    any quantile is estimated to within relative_accuracy of a value that
+    was added. Durations from a millisecond to a day take fewer than 1,000
+    bins with the default accuracy of 1%.
+    """
+
+    # Values below this are counted together as 0
+    MIN_VALUE = 1e-3
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+
+        # Number of values in each bin k, which holds the values in
+        # (gamma ** (k - 1), gamma ** k], and of values that are about 0
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Count value"""
+        self.count += 1
+        if value < self.MIN_VALUE:
+            self.zeros += 1
+            return
+        k = math.ceil(math.log(value) / self.log_gamma)
+        self.bins[k] = self.bins.get(k, 0) + 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add the values of other, which must have the same accuracy"""
+        if other.gamma != self.gamma:
+            raise ValueError("Sketches of different accuracy can't merge")
+        self.count += other.count
+        self.zeros += other.zeros
+        for k, n in other.bins.items():
+            self.bins[k] = self.bins.get(k, 0) + n
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Return an estimate of the q quantile (between 0 and 1) of the values
+        added, or None if there are none
+        """
+
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for k in sorted(self.bins):
+            seen += self.bins[k]
+            if rank < seen:
+                # The value of the bin with the least relative error
+                return 2 * self.gamma ** k / (self.gamma + 1)
+
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zeros": self.zeros,
+            "bins": self.bins,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.zeros = data["zeros"]
+        sketch.bins = {int(k): n for k, n in data["bins"].items()}
+        sketch.count = sketch.zeros + sum(sketch.bins.values())
+        return sketch
+
+
+class ResultsSummary:
+    """Running totals of every game recorded"""
+
+    def __init__(self) -> None:
+
+        # Number of records of the log included in the totals
+        self.records = 0
+
+        self.total_points = 0
+        self.total_hints = 0
+        self.total_seconds = 0.0
+
+        # Number of games by points earned, by pegs left and by board size
+        self.points: Dict[int, int] = {}
+        self.pegs_left: Dict[int, int] = {}
+        self.rows: Dict[int, int] = {}
+
+        # Estimate of the quantiles of the seconds taken per game
+        self.seconds = QuantileSketch()
+
+    @property
+    def games(self) -> int:
+        return self.records
+
+    def add(self, result: GameResult) -> None:
+        """Add result to the totals"""
+        self.records += 1
+        self.total_points += result.points
+        self.total_hints += result.hints
+        self.total_seconds += result.seconds
+        self.points[result.points] = self.points.get(result.points, 0) + 1
+        self.pegs_left[result.pegs_left] = \
+            self.pegs_left.get(result.pegs_left, 0) + 1
+        self.rows[result.rows] = self.rows.get(result.rows, 0) + 1
+        self.seconds.add(result.seconds)
+
+    def average(self) -> float:
+        """Return the average points per game, like Session.get_average"""
+        if not self.records:
+            return 0.0
+        return round(self.total_points / self.records, 1)
+
+    def points_quantile(self, q: float) -> Optional[int]:
+        """
+        Return the q quantile (between 0 and 1) of the points per game, or
+        None if no games were recorded
+
+        Points only take a few values, so this is exact.
+        """
+
+        if not self.records:
+            return None
+        rank = q * (self.records - 1)
+        seen = 0
+        for points in sorted(self.points):
+            seen += self.points[points]
+            if rank < seen:
+                return points
+        return max(self.points)
+
+    def to_dict(self) -> dict:
+        return {
+            "records": self.records,
+            "total_points": self.total_points,
+            "total_hints": self.total_hints,
+            "total_seconds": self.total_seconds,
+            "points": self.points,
+            "pegs_left": self.pegs_left,
+            "rows": self.rows,
+            "seconds": self.seconds.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResultsSummary":
+        summary = cls()
+        summary.records = data["records"]
+        summary.total_points = data["total_points"]
+        summary.total_hints = data["total_hints"]
+        summary.total_seconds = data["total_seconds"]
+
+        # Keys of JSON objects are always strings
+        for name in ("points", "pegs_left", "rows"):
+            setattr(summary, name, {
+                int(k): n for k, n in data[name].items()
+            })
+        summary.seconds = QuantileSketch.from_dict(data["seconds"])
+        return summary
+
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def lock_file(file: BinaryIO) -> None:
+        """Wait for an exclusive lock on file"""
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def unlock_file(file: BinaryIO) -> None:
+        """Release the lock on file"""
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def lock_file(file: BinaryIO) -> None:
+        """Wait for an exclusive lock on file"""
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def unlock_file(file: BinaryIO) -> None:
+        """Release the lock on file"""
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+class ResultsStore:
+    """
+    Append-only log of the results of every game played, kept on disk
+    across sessions, with a summary of the log (see above)
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY) -> None:
+        """
+        Parameters
+        ----------
+        directory : str
+            Directory of the log and summary files, which is created if it
+            doesn't exist
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.summary_path = os.path.join(directory, SUMMARY_FILE)
+        self.lock_path = os.path.join(directory, LOCK_FILE)
+
+        with self.locked():
+            if not self.valid_log():
+                if os.path.exists(self.log_path):
+                    os.replace(self.log_path, self.log_path + BAD_SUFFIX)
+                self.create_log()
+
+            self.summary = self.load_summary()
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the lock of the directory inside the with block"""
+        with open(self.lock_path, "ab") as file:
+            lock_file(file)
+            try:
+                yield
+            finally:
+                unlock_file(file)
+
+    def valid_log(self) -> bool:
+        """Return whether the log exists and starts with a whole header"""
+        try:
+            with open(self.log_path, "rb") as log:
+                header = log.read(HEADER_SIZE)
+        except FileNotFoundError:
+            return False
+        return len(header) == HEADER_SIZE and \
+            header[:len(MAGIC) + 1] == MAGIC + bytes([VERSION])
+
+    def create_log(self) -> None:
+        """Write a new empty log, so it is never left without its header"""
+        temp = self.log_path + ".tmp"
+        with open(temp, "wb") as log:
+            log.write(MAGIC + bytes([VERSION]))
+            log.write(bytes(HEADER_SIZE - len(MAGIC) - 1))
+        os.replace(temp, self.log_path)
+
+    def records(self, start: int = 0) -> Iterator[GameResult]:
+        """Yield the results in the log, from record number start"""
+
+        with open(self.log_path, "rb") as log:
+            header = log.read(HEADER_SIZE)
+            if len(header) != HEADER_SIZE or \
+                    header[:len(MAGIC) + 1] != MAGIC + bytes([VERSION]):
+                raise ValueError(f"{self.log_path} is not a results log")
+
+            log.seek(HEADER_SIZE + start * RECORD_SIZE)
+            while True:
+                data = log.read(RECORD_SIZE * 4096)
+
+                # Ignore a partial record left by a write that was stopped
+                data = data[:len(data) - len(data) % RECORD_SIZE]
+                if not data:
+                    return
+                for fields in RECORD.iter_unpack(data):
+                    yield GameResult(*fields)
+
+    def count(self) -> int:
+        """Return the number of complete records in the log"""
+        return (os.path.getsize(self.log_path) - HEADER_SIZE) // RECORD_SIZE
+
+    def load_summary(self) -> ResultsSummary:
+        """
+        Return the summary of the log, reading only the records it doesn't
+        include yet, or every record if it is missing or doesn't match
+        """
+
+        summary: Optional[ResultsSummary] = None
+        try:
+            with open(self.summary_path) as file:
+                summary = ResultsSummary.from_dict(json.load(file))
+        except (OSError, ValueError, KeyError):
+            pass
+
+        count = self.count()
+        if summary is None or summary.records > count:
+            summary = ResultsSummary()
+        if summary.records == count:
+            return summary
+
+        for result in self.records(summary.records):
+            summary.add(result)
+        self.write_summary(summary)
+        return summary
+
+    def write_summary(self, summary: ResultsSummary) -> None:
+        """Replace the summary file, so it is never left half written"""
+        temp = self.summary_path + ".tmp"
+        with open(temp, "w") as file:
+            json.dump(summary.to_dict(), file)
+        os.replace(temp, self.summary_path)
+
+    def record(self, result: GameResult) -> None:
+        """Append result to the log and add it to the summary"""
+
+        data = RECORD.pack(*result)
+        with self.locked():
+            with open(self.log_path, "r+b") as log:
+
+                # Overwrite a partial record left by a write that was stopped
+                log.seek(HEADER_SIZE + self.count() * RECORD_SIZE)
+                log.write(data)
+                log.truncate()
+
+            # Read the result back from the log with any recorded by other
+            # stores since, so the summary is the same as one rebuilt from
+            # the log
+            self.summary = self.load_summary()
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    """Return seconds as minutes and seconds (e.g. '2:05'), or '-' if None"""
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(round(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
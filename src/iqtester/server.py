@@ -0,0 +1,318 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Set, TextIO, cast
+import argparse
+import asyncio
+import multiprocessing
+import socket
+from .formatter import Formatter
+from .session import Session
+
+
+# === Type Aliases & Explanations ===
+
+# Each connection plays its own Session, which reads each line sent by the
+# client as the answer to a prompt and sends everything the Session prints.
+# The Session and its Games are the same blocking code as in a terminal, so
+# each one runs in a thread of the server's executor, while the event loop
+# does all of the reading and writing of every connection. A Session that
+# waits only holds its own thread, so it never stalls the other connections:
+# - input is read, and output is sent and drained, by the event loop, so a
+#   slow client holds at most one frame of output on the server
+# - message pauses are an asyncio.sleep on the event loop
+# - hint searches and ratings that aren't looked up in a tablebase run in a
+#   shared pool of processes, so they don't hold the GIL that every session
+#   needs
+
+
+# Default port of the server
+PORT = 7878
+
+# Most sessions played at once. Further connections wait for a session to
+# end before they are greeted.
+MAX_SESSIONS = 256
+
+# Seconds to wait for a line of input, or for a client to take the output
+# sent to it, before a connection is closed
+IDLE_TIMEOUT = 600
+
+
+class StreamOutput:
+    """Text stream that sends what is written to a connection"""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self.loop = loop
+        self.writer = writer
+
+    def write(self, text: str) -> int:
+        """Send text from the thread of a session through the event loop"""
+        self.loop.call_soon_threadsafe(self._send, text.encode())
+        return len(text)
+
+    def flush(self) -> None:
+        """
+        Wait in the thread of a session until the client has taken enough of
+        the text sent so far, so the output of a slow client doesn't build
+        up on the server
+        """
+        future = asyncio.run_coroutine_threadsafe(self._drain(), self.loop)
+        future.result()
+
+    def _send(self, data: bytes) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    async def _drain(self) -> None:
+        if self.writer.is_closing():
+            raise ConnectionResetError("connection closed")
+        try:
+            await asyncio.wait_for(self.writer.drain(), IDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ConnectionResetError("client stopped reading") from None
+
+
+class StreamInput:
+    """Text stream that reads the lines sent by a connection"""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        reader: asyncio.StreamReader,
+    ) -> None:
+        self.loop = loop
+        self.reader = reader
+
+    def readline(self) -> str:
+        """
+        Wait in the thread of a session for the next line from the event
+        loop, and return "" once the connection is closed or idle
+        """
+        future = asyncio.run_coroutine_threadsafe(self._readline(), self.loop)
+        return future.result()
+
+    async def _readline(self) -> str:
+        try:
+            data = await asyncio.wait_for(self.reader.readline(), IDLE_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            return ""
+        return data.decode(errors="replace")
+
+
+class ConnectionFormatter(Formatter):
+    """Formatter that pauses on the event loop rather than in its thread"""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        width: int = 78,
+        plain: bool = True,
+    ) -> None:
+        super().__init__(
+            width,
+            output=cast(TextIO, StreamOutput(loop, writer)),
+            input_stream=cast(TextIO, StreamInput(loop, reader)),
+            plain=plain,
+        )
+        self.loop = loop
+
+    def pause(self, seconds: float) -> None:
+        """Send the text of the frame so far, then wait for seconds"""
+        self.flush()
+        if seconds > 0:
+            future = asyncio.run_coroutine_threadsafe(
+                asyncio.sleep(seconds), self.loop
+            )
+            future.result()
+
+
+class Server:
+    """Server that plays a Session of IQ Tester with each connection"""
+
+    def __init__(
+        self,
+        max_sessions: int = MAX_SESSIONS,
+        width: int = 78,
+        msg_pause: float = 0.75,
+        plain: bool = True,
+        solvers: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_sessions : int
+            Most sessions played at once
+        width : int
+            The max width for all lines sent (see Formatter)
+        msg_pause : float
+            Length (in seconds) of pause when certain messages are sent
+        plain : bool
+            Whether to send plain text, without ANSI formatting codes
+        solvers : Optional[int]
+            Number of processes to search for hints, or None for one per CPU
+        """
+
+        self.width = width
+        self.msg_pause = msg_pause
+        self.plain = plain
+
+        # Threads that run the Session of each connection
+        self.executor = ThreadPoolExecutor(
+            max_sessions, thread_name_prefix="iqtester-session"
+        )
+
+        # Processes that search for and rate the hints of every session that
+        # aren't looked up in a tablebase. Worker processes are started fresh
+        # rather than forked from a process with a thread per session.
+        self.solvers = ProcessPoolExecutor(
+            solvers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+        # Open connections, so they can be closed when the server stops
+        self.writers: Set[asyncio.StreamWriter] = set()
+
+        # Number of sessions played in full, and sessions being played
+        self.completed = 0
+        self.active = 0
+
+        self.server: Optional[asyncio.AbstractServer] = None
+
+        # Sockets the server listens on, e.g. to find the port it was given
+        self.sockets: List[socket.socket] = []
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = PORT,
+        path: Optional[str] = None,
+    ) -> asyncio.AbstractServer:
+        """
+        Start listening on host and port, or on the Unix socket at path if
+        it is given, and return the asyncio server
+        """
+
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        self.sockets = list(server.sockets or ())
+        self.server = server
+        return server
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Play a Session with a new connection until it quits or closes"""
+
+        loop = asyncio.get_running_loop()
+        f = ConnectionFormatter(loop, reader, writer, self.width, self.plain)
+        session = Session(self.width, self.msg_pause, f, speculate=False,
+                          executor=self.solvers)
+
+        self.writers.add(writer)
+        self.active += 1
+        try:
+            await loop.run_in_executor(self.executor, session.start)
+            self.completed += 1
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            self.active -= 1
+            self.writers.discard(writer)
+            writer.close()
+
+    async def stop(self) -> None:
+        """Stop listening and close every connection"""
+
+        if self.server is not None:
+            self.server.close()
+
+        # Closing a connection ends the input of its session, which ends it
+        for writer in list(self.writers):
+            writer.close()
+        while self.active:
+            await asyncio.sleep(0.01)
+        if self.server is not None:
+            await self.server.wait_closed()
+        self.executor.shutdown()
+        self.solvers.shutdown()
+
+
+async def serve(
+    host: str,
+    port: int,
+    path: Optional[str],
+    server: Server,
+) -> None:
+    """Run server until the process is stopped"""
+
+    asyncio_server = await server.start(host, port, path)
+    address = path or f"{host}:{port}"
+    print(f"Serving IQ Tester on {address} (Ctrl-C to stop)")
+    try:
+        await asyncio_server.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a server from the command line"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m iqtester serve",
+        description="Host games of IQ Tester for many players at once, "
+                    "one session per connection (see iqtester.client)",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="address to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=PORT,
+        help=f"port to listen on (default: {PORT})",
+    )
+    parser.add_argument(
+        "-u",
+        "--unix",
+        help="path of a Unix socket to listen on instead of a port",
+    )
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=MAX_SESSIONS,
+        help=f"most sessions played at once (default: {MAX_SESSIONS})",
+    )
+    parser.add_argument(
+        "--solvers",
+        type=int,
+        help="processes to search for hints (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--msg-pause",
+        type=float,
+        default=0.75,
+        help="seconds to pause after messages (default: 0.75)",
+    )
+    parser.add_argument(
+        "--ansi",
+        action="store_true",
+        help="send ANSI formatting codes for colors",
+    )
+    args = parser.parse_args(argv)
+
+    server = Server(args.max_sessions, msg_pause=args.msg_pause,
+                    plain=not args.ansi, solvers=args.solvers)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, server))
+    except KeyboardInterrupt:
+        pass
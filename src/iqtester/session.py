@@ -1,21 +1,52 @@
+from concurrent.futures import Executor
+from functools import lru_cache
 from typing import Generator, List, Optional, Sequence, Tuple
-import time
 from .formatter import Formatter, space
+from .analysis import MAX_COUNTED_ROWS, single_hole_starts
+from .board import Board
 from .game import Game
+from .results import ResultsStore, format_seconds
+from .speculation import Speculator
 
 
 class Session:
     """Manager of a session of play for the game IQ Tester"""
 
-    def __init__(self, width: int = 78, msg_pause: float = 0.75) -> None:
+    def __init__(
+        self,
+        width: int = 78,
+        msg_pause: float = 0.75,
+        f: Optional[Formatter] = None,
+        speculate: bool = True,
+        results: Optional[ResultsStore] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
 
         # Initialize the attribute to store instances of Game
         self.game: Optional[Game] = None
 
+        # Background thread to solve positions while the user is thinking,
+        # which is shared by every game of the session. Sessions of a server
+        # don't speculate, so each session only uses one thread.
+        self.speculator: Optional[Speculator] = None
+        if speculate:
+            self.speculator = Speculator()
+
         # Initialize session statistics
         self.played = 0
         self.total_score = 0
 
+        # Where the result of every game is kept across sessions, to show
+        # lifetime stats, or None to only keep the stats of this session.
+        # Only a session started from the command line keeps results (see
+        # __main__.py), so tests and servers never write to disk.
+        self.results = results
+
+        # Pool of processes shared with other sessions to search for hints
+        # that can't be solved right away, or None to search in the session
+        # itself (see Game)
+        self.executor = executor
+
         # Initialize session settings
         self.board_size = 5
         self.prompt_color = "BLUE"
@@ -24,6 +55,8 @@ class Session:
         self.menu_top_border = '-'
         self.game_over_pause = 1.25
         self.msg_pause = msg_pause
+        self.hint_time_limit = 10
+        self.search_stats = "off"
 
         # To make a setting customizable, add it to settings menu map and add
         # it to the settings_test_args_map in test_session_settings.py
@@ -32,19 +65,27 @@ class Session:
         colors = {"BLUE", "RED", "GREEN", "BLACK", "GRAY"}  # See formatter.py
         times = (0.0, 3.01, 0.01)
         chars = {'|', '*', '-', '.', '~', 'x'}
+        sizes = (4, Board.MAX_ROWS + 1, 1)
         self.settings_menu_map = {
-            "b": ('board_size', 'Board Size', int, (4, 7, 1)),
+            "b": ('board_size', 'Board Size', int, sizes),
             "c": ('prompt_color', 'Prompt Color', str, colors),
             "p": ('game_over_pause', 'Game Over Pause Time', float, times),
             "m": ('msg_pause', 'Message Pause Time', float, times),
+            "h": ('hint_time_limit', 'Hint Time Limit', int, (1, 61, 1)),
+            "d": ('search_stats', 'Search Stats', str, {"on", "off"}),
             "s": ('menu_side_border', 'Menu Side Borders', str, chars),
             "t": ('menu_top_border', 'Menu Top/Bottom Borders', str, chars),
             "w": ('menu_width', 'Menu Width', int, (40, 79, 1)),
         }
 
-        # Create a Formatter object to manage formats of statements to stdout
+        # Create a Formatter object to manage formats of statements to stdout,
+        # unless one is given to print and read somewhere else
         self.f_width = width
-        self.f = Formatter(self.f_width, self.prompt_color)
+        if f is None:
+            f = Formatter(self.f_width, self.prompt_color)
+        else:
+            f.prompt_color = self.prompt_color
+        self.f = f
 
     def get_average(self) -> float:
         """Return the average points per game for this session"""
@@ -61,6 +102,16 @@ class Session:
         selection_prompt = "Select a menu option"
         while True:
 
+            # Solve the start positions of the next game in the background,
+            # on boards where they can be solved quickly (see Game.long_search)
+            if self.speculator is not None:
+                if self.board_size <= MAX_COUNTED_ROWS:
+                    self.speculator.speculate(
+                        self.board_size, single_hole_starts(self.board_size)
+                    )
+                else:
+                    self.speculator.cancel()
+
             self.main_menu()
             main_choice = self.f.prompt(selection_prompt).lower()
 
@@ -68,7 +119,8 @@ class Session:
             if main_choice == "":
                 self.game = Game(
                     self.f, self.board_size, self.game_over_pause,
-                    self.msg_pause
+                    self.msg_pause, self.hint_time_limit, self.speculator,
+                    self.search_stats == "on", self.executor,
                 )
                 game_score = self.game.play()
 
@@ -80,6 +132,11 @@ class Session:
                 self.total_score += game_score
                 self.played += 1
 
+                # Keep the result of the game
+                result = self.game.result()
+                if self.results is not None and result is not None:
+                    self.results.record(result)
+
             # Handle selection to go to settings menu
             elif main_choice == "s":
 
@@ -92,13 +149,13 @@ class Session:
                     if setting in self.settings_menu_map:
                         self.update_setting(*self.settings_menu_map[setting])
 
-                        # Create new Formatter object in case settings changed
-                        self.f = Formatter(self.f_width, self.prompt_color)
+                        # Update the Formatter in case settings changed
+                        self.f.prompt_color = self.prompt_color
 
                     # Handle return to main menu
                     else:
                         self.f.center("Returning to Main Menu...")
-                        time.sleep(self.msg_pause)
+                        self.f.pause(self.msg_pause)
                         break
 
             # Treat any other input as choice to quit
@@ -106,6 +163,8 @@ class Session:
                 break
 
         # Handle quit
+        if self.speculator is not None:
+            self.speculator.stop()
         self.f.center("Thanks for playing!", ['BOLD'])
         self.print_footer()
 
@@ -125,16 +184,24 @@ class Session:
             ("AVERAGE SCORE: ", f"{self.get_average():,}"),
         ]
 
-        # Menu options
-        opts = [
-            ("New Game", "[ENTER]"),
-            ("Settings Menu", "[s]"),
-            ("Quit", "[q]"),
-        ]
-
-        # Find maximum label length and value length between both blocks
-        lens_stats = max_element_lens(stats)
-        lens_options = max_element_lens(opts)
+        # Lifetime statistics rows, from the running totals of every game
+        # kept, so they don't depend on the number of games
+        lifetime = []
+        if self.results is not None:
+            summary = self.results.summary
+            lifetime = [
+                ("LIFETIME GAMES: ", f"{summary.games:,}"),
+                ("LIFETIME AVERAGE: ", f"{summary.average():,}"),
+                ("MEDIAN SCORE: ", str(summary.points_quantile(0.5) or 0)),
+                ("MEDIAN GAME TIME: ",
+                 format_seconds(summary.seconds.quantile(0.5))),
+                ("90% OF GAMES IN: ",
+                 format_seconds(summary.seconds.quantile(0.9))),
+            ]
+
+        # Find maximum label length and value length between all blocks
+        lens_stats = max_element_lens(stats + lifetime)
+        lens_options = menu_lens(MAIN_MENU_OPTIONS)
         left, right = [max(x) for x in zip(lens_stats, lens_options)]
         left += 2
 
@@ -142,8 +209,15 @@ class Session:
         formats = ['BOLD', 'GREEN']
         self.print_menu_block(stats, formats, width, left, right, border)
         self.print_menu_space(width, border)
+        if lifetime:
+            self.print_menu_block(
+                lifetime, formats, width, left, right, border
+            )
+            self.print_menu_space(width, border)
         formats = ['BOLD', 'RED']
-        self.print_menu_block(opts, formats, width, left, right, border, '.')
+        self.print_menu_block(
+            MAIN_MENU_OPTIONS, formats, width, left, right, border, '.', True
+        )
 
         self.print_menu_bottom(width, border)
 
@@ -166,7 +240,7 @@ class Session:
 
         opts.append(("Return to Main Menu", "[r]"))
 
-        left, right = max_element_lens(opts)
+        left, right = menu_lens(tuple(opts))
         left += 2
 
         formats = ['BOLD', 'RED']
@@ -176,29 +250,32 @@ class Session:
 
     def print_menu_top(self, header: str, width: int, border: str) -> None:
         """Print the top of a menu including its header with a border"""
-        self.f.center("", [], self.menu_top_border, width - 2)
+        self.f.center("", [], self.menu_top_border, width - 2, cache=True)
         self.print_menu_space(width, border)
-        self.f.center(f"{header}", ['BOLD'], " ", width, border)
+        self.f.center(f"{header}", ['BOLD'], " ", width, border, cache=True)
         self.print_menu_space(width, border)
 
     def print_menu_bottom(self, width: int, border: str) -> None:
         """Print the top of a menu including its header with a border"""
         self.print_menu_space(width, border)
-        self.f.center("", [], self.menu_top_border, width - 2)
+        self.f.center("", [], self.menu_top_border, width - 2, cache=True)
 
     def print_menu_space(self, width: int, border: str) -> None:
         """Print a blank row of a menu box"""
-        self.f.center("", inner_width=width, inner_border_char=border)
+        self.f.center(
+            "", inner_width=width, inner_border_char=border, cache=True
+        )
 
     def print_menu_block(
         self,
-        rows_label_value: List[Tuple[str, str]],
+        rows_label_value: Sequence[Tuple[str, str]],
         formats: List[str],
         width: int,
         left_just: int,
         right_just: int,
         border: str,
         fill_char: str = " ",
+        cache: bool = False,
     ) -> None:
         """
         Print a block of menu options of a menu box with proper alignment
@@ -215,13 +292,15 @@ class Session:
             Border character for left and right sides of menu
         fill_char : str
             Fill character printed between right and left sides of row
+        cache : bool
+            Whether the rows are the same on every redraw (see Formatter)
         """
 
         # Print each row with formatting and proper alignment
         for label, value in rows_label_value:
             display = f"{label:{fill_char}<{left_just}}"
             display += f"{value:{fill_char}>{right_just}}"
-            self.f.center(display, formats, " ", width, border)
+            self.f.center(display, formats, " ", width, border, cache=cache)
 
     def update_setting(
         self,
@@ -288,7 +367,7 @@ class Session:
         # Update setting
         self.f.center(f"Updating {desc} to {user_input}...", end="\n\n")
         setattr(self, name, user_input)
-        time.sleep(self.msg_pause)
+        self.f.pause(self.msg_pause)
 
     @space
     def print_new_session_header(self) -> None:
@@ -309,6 +388,14 @@ class Session:
         self.f.center("Follow me: https://www.github.com/andrewt110216")
 
 
+# Options of the main menu, as rows of (label, value)
+MAIN_MENU_OPTIONS = (
+    ("New Game", "[ENTER]"),
+    ("Settings Menu", "[s]"),
+    ("Quit", "[q]"),
+)
+
+
 def max_element_lens(sequences: Sequence[Sequence[str]]) -> List[int]:
     """
     For a sequence of sequences of strings, return the lengths of the
@@ -334,6 +421,17 @@ def max_element_lens(sequences: Sequence[Sequence[str]]) -> List[int]:
     return out
 
 
+@lru_cache(maxsize=64)
+def menu_lens(rows: Tuple[Tuple[str, str], ...]) -> List[int]:
+    """
+    Return max_element_lens of the rows of a menu, which is only calculated
+    once for each menu layout
+
+    The result is cached, so it must not be modified
+    """
+    return max_element_lens(rows)
+
+
 def frange(start: float, stop: float = None, step: float = 1.0) -> Generator:
     """Generator like built-in range but allowing for floating point values"""
 
@@ -0,0 +1,374 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+)
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type
+import argparse
+import json
+import random
+from .board import Board, peg_label
+from .game import score
+from .jumps import MoveId, jump_table
+from .solver import Solver, State
+
+
+# === Type Aliases & Explanations ===
+
+# Number of games that ended with each number of pegs, by the hole that was
+# emptied at the start (numbered row by row, see jumps.py)
+Outcomes = Dict[int, Dict[int, int]]
+
+
+# Number of games played by a worker at a time, and the number of batches
+# waiting for each worker, so results are merged as they complete
+BATCH_SIZE = 1_000
+BATCHES_PER_WORKER = 2
+
+
+class Strategy(ABC):
+    """
+    A player that chooses the hole to empty and each jump of a game
+
+    Strategies play on the bitmask of the board (see solver.py) with the
+    jumps of the shared JumpTable, so games are played without a Board
+    """
+
+    def __init__(self, rows: int) -> None:
+        self.rows = rows
+        self.table = jump_table(rows)
+        self.moves = list(zip(self.table.masks, self.table.patterns))
+
+    def legal_moves(self, state: State) -> List[MoveId]:
+        """Return the move IDs of every jump possible from state"""
+        return [
+            k for k, (mask, pattern) in enumerate(self.moves)
+            if state & mask == pattern
+        ]
+
+    def choose_start(self, rng: random.Random) -> int:
+        """Return the hole to empty at the start of a game"""
+        return rng.randrange(self.table.num_holes)
+
+    @abstractmethod
+    def choose_move(
+        self,
+        state: State,
+        moves: List[MoveId],
+        rng: random.Random,
+    ) -> MoveId:
+        """Return the move ID of the jump to make from state, out of moves"""
+
+
+class RandomStrategy(Strategy):
+    """Player that makes any possible jump at random"""
+
+    def choose_move(
+        self,
+        state: State,
+        moves: List[MoveId],
+        rng: random.Random,
+    ) -> MoveId:
+        return rng.choice(moves)
+
+
+class GreedyStrategy(Strategy):
+    """
+    Player that makes the jump that leaves the most possible jumps, to keep
+    the game going as long as it can see, choosing at random between ties
+    """
+
+    def choose_move(
+        self,
+        state: State,
+        moves: List[MoveId],
+        rng: random.Random,
+    ) -> MoveId:
+        masks = self.table.masks
+        counts = [len(self.legal_moves(state ^ masks[k])) for k in moves]
+        most = max(counts)
+        return rng.choice([k for k, n in zip(moves, counts) if n == most])
+
+
+class SolverStrategy(Strategy):
+    """Player that makes the first jump of an optimal solution"""
+
+    def __init__(self, rows: int) -> None:
+        super().__init__(rows)
+
+        # Results are kept for every game, which all start from one of the
+        # same few positions
+        self.solver = Solver(rows)
+
+    def choose_move(
+        self,
+        state: State,
+        moves: List[MoveId],
+        rng: random.Random,
+    ) -> MoveId:
+        return self.solver.solve(state, keep_table=True)[1][0]
+
+
+# Strategies by the name used on the command line
+STRATEGIES: Dict[str, Type[Strategy]] = {
+    "random": RandomStrategy,
+    "greedy": GreedyStrategy,
+    "solver": SolverStrategy,
+}
+
+# Strategies of the current process, by name and number of rows
+_strategies: Dict[Tuple[str, int], Strategy] = {}
+
+
+def play_game(
+    strategy: Strategy,
+    rng: random.Random,
+    start: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Play a game with strategy, emptying hole start (or the hole chosen by
+    the strategy), and return the start hole and the number of pegs left
+    """
+
+    if start is None:
+        start = strategy.choose_start(rng)
+    state = ((1 << strategy.table.num_holes) - 1) ^ (1 << start)
+    pegs = strategy.table.num_holes - 1
+
+    masks = strategy.table.masks
+    moves = strategy.legal_moves(state)
+    while moves:
+        state ^= masks[strategy.choose_move(state, moves, rng)]
+        pegs -= 1
+        moves = strategy.legal_moves(state)
+
+    return start, pegs
+
+
+class SimulationStats:
+    """Distribution of the results of simulated games"""
+
+    def __init__(self, rows: int) -> None:
+        self.rows = rows
+        self.outcomes: Outcomes = {}
+
+    @property
+    def games(self) -> int:
+        return sum(sum(pegs.values()) for pegs in self.outcomes.values())
+
+    def add(self, start: int, pegs: int) -> None:
+        """Count a game from start that ended with pegs pegs"""
+        counts = self.outcomes.setdefault(start, {})
+        counts[pegs] = counts.get(pegs, 0) + 1
+
+    def merge(self, other: "SimulationStats") -> None:
+        """Add the games of other to these stats"""
+        for start, counts in other.outcomes.items():
+            for pegs, n in counts.items():
+                totals = self.outcomes.setdefault(start, {})
+                totals[pegs] = totals.get(pegs, 0) + n
+
+    def pegs_left(self) -> Dict[int, int]:
+        """Return the number of games that ended with each number of pegs"""
+        totals: Dict[int, int] = {}
+        for counts in self.outcomes.values():
+            for pegs, n in counts.items():
+                totals[pegs] = totals.get(pegs, 0) + n
+        return totals
+
+    def scores(self) -> Dict[int, int]:
+        """Return the number of games that earned each number of points"""
+        totals: Dict[int, int] = {}
+        for pegs, n in self.pegs_left().items():
+            points = score(pegs)[0]
+            totals[points] = totals.get(points, 0) + n
+        return totals
+
+    def mean_score(self) -> float:
+        games = self.games
+        if not games:
+            return 0.0
+        return sum(p * n for p, n in self.scores().items()) / games
+
+    def to_dict(self) -> dict:
+        """Return the stats as a dict that can be written as JSON"""
+        return {
+            "rows": self.rows,
+            "games": self.games,
+            "mean_score": self.mean_score(),
+            "scores": self.scores(),
+            "pegs_left": self.pegs_left(),
+            "by_start": {
+                peg_label(start): counts
+                for start, counts in sorted(self.outcomes.items())
+            },
+        }
+
+    def report(self) -> str:
+        """Return a report of the distributions of the games"""
+
+        games = self.games
+        lines = [f"=== {games:,} games on {self.rows} rows ==="]
+        lines.append(f"Average score: {self.mean_score():.2f}")
+        lines.append("Games by score:")
+        for points, n in sorted(self.scores().items(), reverse=True):
+            lines.append(f"  {points:>3} points: {n:>10,} ({n / games:.1%})")
+        lines.append("Games by pegs left:")
+        for pegs, n in sorted(self.pegs_left().items()):
+            lines.append(f"  {pegs:>3} pegs: {n:>10,} ({n / games:.1%})")
+        lines.append("Average pegs left by start hole:")
+        for start, counts in sorted(self.outcomes.items()):
+            total = sum(counts.values())
+            mean = sum(p * n for p, n in counts.items()) / total
+            lines.append(f"  {peg_label(start):>3}: {mean:.2f} ({total:,})")
+
+        return "\n".join(lines)
+
+
+def run_batch(
+    rows: int,
+    strategy: str,
+    games: int,
+    seed: str,
+    start: Optional[int] = None,
+) -> SimulationStats:
+    """Play games with the named strategy and return their stats"""
+
+    key = (strategy, rows)
+    if key not in _strategies:
+        _strategies[key] = STRATEGIES[strategy](rows)
+    player = _strategies[key]
+
+    rng = random.Random(seed)
+    stats = SimulationStats(rows)
+    for _ in range(games):
+        stats.add(*play_game(player, rng, start))
+
+    return stats
+
+
+def simulate(
+    rows: int,
+    strategy: str,
+    games: int,
+    workers: int = 1,
+    seed: int = 0,
+    start: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Callable[[SimulationStats], None]] = None,
+) -> SimulationStats:
+    """
+    Play games with the named strategy (see STRATEGIES) on a board with rows
+    rows, emptying hole start or a hole chosen by the strategy, and return
+    the stats of every game
+
+    Games are played in batches of batch_size, each with its own seed, so
+    the results only depend on seed and not on the number of workers. With
+    more than 1 worker, batches are played by a pool of processes. The
+    stats are merged as each batch completes and passed to progress.
+    """
+
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}")
+
+    batches = [
+        (rows, strategy, min(batch_size, games - i), f"{seed}-{n}", start)
+        for n, i in enumerate(range(0, games, batch_size))
+    ]
+    total = SimulationStats(rows)
+
+    def merge(stats: SimulationStats) -> None:
+        total.merge(stats)
+        if progress is not None:
+            progress(total)
+
+    if workers <= 1:
+        for batch in batches:
+            merge(run_batch(*batch))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Set[Future] = set()
+        for batch in batches:
+
+            # Wait for a batch to complete before queueing too many more
+            if len(pending) >= workers * BATCHES_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(future.result())
+
+            pending.add(executor.submit(run_batch, *batch))
+
+        for future in pending:
+            merge(future.result())
+
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Simulate games from the command line"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m iqtester simulate",
+        description="Play games without any input or output and report the "
+                    "distribution of the results",
+    )
+    parser.add_argument(
+        "strategy",
+        choices=sorted(STRATEGIES),
+        help="how the player chooses each jump",
+    )
+    parser.add_argument(
+        "-n",
+        "--games",
+        type=int,
+        default=10_000,
+        help="number of games to play (default: 10000)",
+    )
+    parser.add_argument(
+        "-r",
+        "--rows",
+        type=int,
+        default=5,
+        help="number of rows of the board (default: 5)",
+    )
+    parser.add_argument(
+        "-s",
+        "--start",
+        help="peg to remove at the start of every game (default: random)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the random choices (default: 0)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the stats as JSON",
+    )
+    args = parser.parse_args(argv)
+
+    if not Board.MIN_ROWS <= args.rows <= Board.MAX_ROWS:
+        parser.error(f"rows must be in [{Board.MIN_ROWS}:{Board.MAX_ROWS}]")
+    start = None
+    if args.start is not None:
+        labels = [peg_label(k) for k in range(jump_table(args.rows).num_holes)]
+        if args.start.lower() not in labels:
+            parser.error(f"{args.start!r} is not a peg on {args.rows} rows")
+        start = labels.index(args.start.lower())
+
+    stats = simulate(
+        args.rows, args.strategy, args.games, args.workers, args.seed, start
+    )
+    if args.json:
+        print(json.dumps(stats.to_dict()))
+    else:
+        print(stats.report())
@@ -0,0 +1,744 @@
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import permutations
+from operator import xor
+from typing import Callable, List, Optional, Tuple
+import time
+import tracemalloc
+from .jumps import MoveId, hole_number, jump_table
+
+
+# === Type Aliases & Explanations ===
+
+# A position is an integer bitmask where bit k is set if hole k has a peg,
+# where holes are numbered row by row (see jumps.py)
+State = int
+
+# A symmetry of the board is a permutation of its holes, where the hole at
+# index k is the hole that hole k is mapped to
+Symmetry = Tuple[int, ...]
+
+# The images of a position under each symmetry of the board, in the same
+# order as the symmetries function, so index 0 is the position itself
+Images = Tuple[State, ...]
+
+# A pagoda function assigns a weight to each hole such that for every jump,
+# the weight of the landing hole is at most the sum of the weights of the
+# two holes the pegs leave. The total weight of the pegs on the board (the
+# pagoda value) therefore never increases, so a position can only reach
+# positions with a pagoda value at most its own.
+Pagoda = Tuple[int, ...]
+
+# An entry of the transposition table is a tuple of the optimal result that
+# can be reached from a position and the move ID of the jump that leads to it
+Entry = Tuple[int, MoveId]
+
+
+@lru_cache(maxsize=None)
+def symmetries(rows: int) -> Tuple[Symmetry, ...]:
+    """
+    Return the six symmetries of a board with rows rows (three rotations,
+    each with or without a reflection), starting with the identity
+    """
+
+    # Reference diagram of barycentric coordinates (a, b, c) for 3 rows:
+    #           (2, 0, 0)
+    #       (1, 0, 1) (0, 1, 1)
+    #   (0, 0, 2) (1, 1, 0) (0, 2, 0)
+    # Where a = i - j, b = j and c = rows - 1 - i, so a + b + c = rows - 1.
+    # Every symmetry of the triangle permutes the three coordinates.
+    coordinates = [
+        (i - j, j, rows - 1 - i) for i in range(rows) for j in range(i + 1)
+    ]
+
+    syms: List[Symmetry] = []
+    for order in permutations(range(3)):
+        sym = []
+        for coordinate in coordinates:
+            _, b, c = (coordinate[k] for k in order)
+            sym.append(hole_number(rows - 1 - c, b))
+        syms.append(tuple(sym))
+
+    return tuple(syms)
+
+
+def hole_colors(rows: int) -> List[int]:
+    """
+    Return the color (0, 1 or 2) of each hole, colored so that every three
+    holes in a line have three different colors
+    """
+    return [(i + j) % 3 for i in range(rows) for j in range(i + 1)]
+
+
+@lru_cache(maxsize=None)
+def pagodas(rows: int) -> Tuple[Tuple[int, Pagoda], ...]:
+    """
+    Return a pagoda function centered on each hole as tuples of the hole
+    number and the weights of the pagoda function
+
+    The weight of each hole is a Fibonacci number that is largest at the
+    center and shrinks with the distance from the center. Because the
+    distance along a line changes by at most 1 per hole, the weight of the
+    landing hole is never more than the sum of the other two.
+    """
+
+    locations = [(i, j) for i in range(rows) for j in range(i + 1)]
+
+    def distance(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+        """Return the number of steps between two locations"""
+        di, dj = b[0] - a[0], b[1] - a[1]
+        if di * dj > 0:
+            return max(abs(di), abs(dj))
+        return abs(di) + abs(dj)
+
+    # Fibonacci numbers, so fibonacci[d + 2] = fibonacci[d + 1] + fibonacci[d]
+    fibonacci = [0, 1]
+    while len(fibonacci) < rows + 2:
+        fibonacci.append(fibonacci[-1] + fibonacci[-2])
+
+    # The distance between any two holes is at most rows - 1
+    result = []
+    for center, location in enumerate(locations):
+        weights = tuple(
+            fibonacci[rows - distance(location, other)] for other in locations
+        )
+        result.append((center, weights))
+
+    # Check that every jump satisfies the pagoda condition
+    table = jump_table(rows)
+    for _, weights in result:
+        for src, over, dst in zip(table.src, table.over, table.dst):
+            assert weights[dst] <= weights[src] + weights[over]
+
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def byte_sums(values: Tuple[int, ...]) -> List[List[int]]:
+    """
+    For each byte of a state, map each value of the byte to the sum of the
+    values of the holes with a peg, so that a sum over the pegs of a state
+    takes one lookup per 8 holes
+
+    The result is cached, so it must not be modified
+    """
+
+    byte_maps = []
+    for start in range(0, len(values), 8):
+        byte_map = []
+        for byte in range(256):
+            total = 0
+            for bit in range(8):
+                if byte >> bit & 1 and start + bit < len(values):
+                    total += values[start + bit]
+            byte_map.append(total)
+        byte_maps.append(byte_map)
+
+    return byte_maps
+
+
+class TranspositionTable:
+    """
+    Cache of the optimal result and best jump for positions already searched
+
+    The number of entries is capped, and once the cap is reached the least
+    recently used entry is evicted to make room for each new entry
+    """
+
+    # Approximate memory used by each entry (key, value and dict slot)
+    ENTRY_BYTES = 200
+
+    # Default cap on the number of entries (about 200 MB)
+    MAX_ENTRIES = 1_000_000
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_entries : int
+            Maximum number of positions stored in the table
+        max_bytes : int
+            Approximate maximum memory used by the table, which is converted
+            into a number of entries. The smaller of the two caps is used.
+        """
+
+        caps = [self.MAX_ENTRIES if max_entries is None else max_entries]
+        if max_bytes is not None:
+            caps.append(max_bytes // self.ENTRY_BYTES)
+        self.max_entries = max(1, min(caps))
+
+        # Positions ordered from least to most recently used
+        self.entries: "OrderedDict[State, Entry]" = OrderedDict()
+
+        # Counters of lookups that found an entry, lookups that did not and
+        # entries removed to stay within max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, state: State) -> Optional[Entry]:
+        """Return the entry for state (or None) and count the hit or miss"""
+
+        entry = self.entries.get(state)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(state)
+        return entry
+
+    def peek(self, state: State) -> Optional[Entry]:
+        """Return the entry for state without counting or reordering it"""
+        return self.entries.get(state)
+
+    def put(self, state: State, result: int, jump: int) -> None:
+        """Store the optimal result and best jump for state"""
+
+        self.entries[state] = (result, jump)
+        self.entries.move_to_end(state)
+
+        # Evict the least recently used entry if the table is over its cap
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class SolverStats:
+    """Counters and timings of the most recent search of a Solver"""
+
+    def __init__(self, depths: int) -> None:
+
+        # Number of positions expanded, and the deepest level reached (the
+        # number of jumps from the position searched)
+        self.nodes = 0
+        self.max_depth = 0
+
+        # Seconds spent expanding the positions at each depth
+        self.depth_times = [0.0] * depths
+
+        # Seconds from the start to the end of the search
+        self.elapsed = 0.0
+
+        # Each improvement of the best result found, as a tuple of the
+        # seconds since the start and the number of pegs left
+        self.improvements: List[Tuple[float, int]] = []
+
+        # Lookups of the transposition table that found a result and
+        # lookups that did not
+        self.hits = 0
+        self.misses = 0
+
+        # Peak memory (in bytes) allocated during the search, if it was
+        # traced (see Solver.trace_memory)
+        self.peak_memory: Optional[int] = None
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        """Return the stats as a single line of text"""
+
+        lookups = self.hits + self.misses
+        hit_rate = 100 * self.hits / lookups if lookups else 0.0
+        line = (
+            f"{self.nodes} nodes in {self.elapsed:.3f}s"
+            f" ({self.nodes_per_second:,.0f}/s), depth {self.max_depth},"
+            f" {len(self.improvements)} improvements,"
+            f" cache {hit_rate:.0f}% of {lookups}"
+        )
+        if self.peak_memory is not None:
+            line += f", peak {self.peak_memory / 2 ** 20:.1f} MB"
+        return line
+
+
+class Interrupted(Exception):
+    """Raised inside a search that is stopped before it is complete"""
+
+
+class Solver:
+    """Search engine that finds the optimal result for a board position"""
+
+    # Number of positions expanded between checks of whether an anytime
+    # search should stop (must be a power of 2)
+    CHECK_INTERVAL = 1024
+
+    def __init__(
+        self,
+        rows: int,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> None:
+
+        # Number of rows of the boards this solver can search
+        self.rows = rows
+
+        # Table of every possible jump for this board size, and the mask
+        # and pattern of each jump for the search loop
+        self.jump_table = jump_table(rows)
+        self.masks = self.jump_table.masks
+        self.patterns = self.jump_table.patterns
+
+        # For each symmetry, map each byte of a state to the bits it is
+        # mapped to, so a whole state can be mapped with one lookup per byte
+        self.byte_maps = [
+            byte_sums(tuple(1 << hole for hole in sym))
+            for sym in symmetries(rows)
+        ]
+
+        # For each symmetry, map each move ID to the move ID of its image
+        # under the symmetry and map each image back to the move ID
+        ids = self.jump_table.ids
+        self.jump_maps: List[List[MoveId]] = []
+        self.inverse_jump_maps: List[List[MoveId]] = []
+        for sym in symmetries(rows):
+            jump_map = [
+                ids[(sym[src], sym[dst])]
+                for src, dst in zip(self.jump_table.src, self.jump_table.dst)
+            ]
+            inverse_jump_map = [0] * len(jump_map)
+            for k, image in enumerate(jump_map):
+                inverse_jump_map[image] = k
+            self.jump_maps.append(jump_map)
+            self.inverse_jump_maps.append(inverse_jump_map)
+
+        # For each jump, the mask of its image under each symmetry, so the
+        # images of a position can be updated by a jump without mapping
+        # the whole position again
+        self.image_masks: List[Images] = [
+            tuple(self.masks[jump_map[k]] for jump_map in self.jump_maps)
+            for k in range(len(self.masks))
+        ]
+
+        # Mask of the holes of each color
+        self.color_masks = [0, 0, 0]
+        for hole, color in enumerate(hole_colors(rows)):
+            self.color_masks[color] |= 1 << hole
+
+        # For each color, the pagoda functions centered on holes of that
+        # color, as tuples of the weight of the center and the byte maps to
+        # calculate the pagoda value of a state
+        colors = hole_colors(rows)
+        self.pagodas: List[List[Tuple[int, List[List[int]]]]] = [[], [], []]
+        for center, weights in pagodas(rows):
+            self.pagodas[colors[center]].append(
+                (weights[center], byte_sums(weights))
+            )
+
+        # Positions searched by the most recent solve (or by every solve
+        # with keep_table), so the same position reached by different orders
+        # of moves is only searched once. Each position is stored in its
+        # canonical form (see canonical method), so symmetric positions share
+        # one entry.
+        self.table = TranspositionTable(max_entries, max_bytes)
+
+        # Number of positions expanded by the most recent solve
+        self.nodes = 0
+
+        # Best line found so far by the current search, as the fewest pegs
+        # and the move IDs from the root, and the function that returns True
+        # once an anytime search should stop (see solve_anytime method)
+        self.incumbent: Tuple[int, List[MoveId]] = (0, [])
+        self._should_stop: Optional[Callable[[], bool]] = None
+
+        # Buffers for each depth of the search (see _search method). A search
+        # can be at most one level deeper than there are holes on the board.
+        depths = rows * (rows + 1) // 2 + 1
+        self._stack: List[Images] = [()] * depths
+        self._cursors = [0] * depths
+        self._bests = [0] * depths
+        self._best_jumps = [0] * depths
+        self._path = [0] * depths
+        self._root: State = 0
+
+        # Counters and timings of the most recent search, and whether to
+        # trace its peak memory with tracemalloc, which slows it down
+        self.stats = SolverStats(depths)
+        self.trace_memory = False
+        self._start_time = 0.0
+        self._tracing = False
+
+    def images(self, state: State) -> Images:
+        """Return the images of state under each symmetry of the board"""
+
+        images = []
+        for byte_maps in self.byte_maps:
+            image = 0
+            shifted = state
+            for byte_map in byte_maps:
+                image |= byte_map[shifted & 255]
+                shifted >>= 8
+            images.append(image)
+
+        return tuple(images)
+
+    def canonical(self, state: State) -> Tuple[State, int]:
+        """
+        Return the canonical form of state, which is the smallest of its
+        images under the symmetries of the board, and the index of the
+        symmetry that maps state to it
+        """
+
+        images = self.images(state)
+        key = min(images)
+        return key, images.index(key)
+
+    def lower_bound(self, state: State) -> int:
+        """
+        Return a lower bound on the optimal result for state, which is 2 if
+        it is proven that state cannot be reduced to 1 peg, or else 1
+
+        Time Complexity: O(n) where n is the number of holes on the board,
+        which is constant for a given board size
+        """
+
+        # Every jump changes the number of pegs of each color by 1, so the
+        # parity of the three counts flip together. A single peg has one odd
+        # count, so it can only be reached if exactly one count differs in
+        # parity from the others, and the peg must be of that color.
+        a, b, c = (bin(state & mask).count("1") & 1 for mask in
+                   self.color_masks)
+        if a == b == c:
+            return 2
+        color = 0 if b == c else 1 if a == c else 2
+
+        # A single peg at a hole can only be reached if the pagoda value of
+        # state, for the pagoda function centered on that hole, is at least
+        # the weight of that hole
+        for weight, byte_maps in self.pagodas[color]:
+            total = 0
+            shifted = state
+            for byte_map in byte_maps:
+                total += byte_map[shifted & 255]
+                shifted >>= 8
+            if total >= weight:
+                return 1
+
+        return 2
+
+    def can_reach(self, state: State, k: int) -> bool:
+        """
+        Return False if it is proven that state can never be reduced to k
+        pegs or fewer, otherwise True (which does not guarantee that it can)
+        """
+        return bin(state).count("1") <= k or k >= self.lower_bound(state)
+
+    def _has_jump(self, state: State) -> bool:
+        """Return True if any jump is possible from state"""
+        return any(
+            state & mask == pattern
+            for mask, pattern in zip(self.masks, self.patterns)
+        )
+
+    def _search(self, images: Images, pegs: int) -> int:
+        """
+        Return the optimal result for a position with pegs, where images are
+        the images of the position under each symmetry
+
+        The search is depth first, but uses an explicit stack of buffers
+        allocated once per solver rather than recursion. The buffers at
+        index d describe the position reached after d jumps.
+        """
+
+        masks = self.masks
+        patterns = self.patterns
+        image_masks = self.image_masks
+        jump_maps = self.jump_maps
+        table = self.table
+        lower_bound = self.lower_bound
+        num_jumps = len(masks)
+        should_stop = self._should_stop
+        check_mask = self.CHECK_INTERVAL - 1
+        stats = self.stats
+        depth_times = stats.depth_times
+        clock = time.perf_counter
+
+        # Preallocated buffers for each depth of the search
+        stack = self._stack        # images of the position
+        cursors = self._cursors    # index of the next jump to try
+        bests = self._bests        # best result found so far
+        best_jumps = self._best_jumps  # jump that leads to best result
+        path = self._path          # jump taken to go one level deeper
+
+        # Position (or a symmetric position) has been searched already
+        key = min(images)
+        entry = table.get(key)
+        if entry is not None:
+            return entry[0]
+
+        self.nodes += 1
+        depth = 0
+        last_time = clock()
+        stack[0] = images
+        cursors[0] = 0
+        bests[0] = pegs
+        best_jumps[0] = -1
+
+        # Result of the position one level deeper than depth, or 0 if there
+        # is no result to pass up to depth
+        value = 0
+
+        while True:
+
+            state = stack[depth][0]
+            best = bests[depth]
+
+            # Handle the result of the last jump searched from depth
+            if value:
+                if value < self.incumbent[0]:
+                    self._improve(value, depth)
+                if value < best:
+                    best = bests[depth] = value
+                    best_jumps[depth] = path[depth]
+
+                    # It is not possible to do better than the lower bound,
+                    # which is only calculated once it could end the search
+                    if best == 1 or best == 2 and lower_bound(state) == 2:
+                        cursors[depth] = num_jumps
+                value = 0
+
+            # Find the next possible jump from the position at depth. Once 2
+            # pegs can be reached, skip jumps that are proven not to reach 1.
+            for k in range(cursors[depth], num_jumps):
+                if state & masks[k] == patterns[k] and (
+                    best != 2 or lower_bound(state ^ masks[k]) != 2
+                ):
+                    break
+            else:
+                k = num_jumps
+
+            if k < num_jumps:
+                cursors[depth] = k + 1
+                path[depth] = k
+                images = tuple(map(xor, stack[depth], image_masks[k]))
+
+                # Position (or a symmetric position) has been searched
+                key = min(images)
+                entry = table.get(key)
+                if entry is not None:
+                    value = entry[0]
+                    continue
+
+                # Go one level deeper to search the new position, unless an
+                # anytime search has been told to stop
+                self.nodes += 1
+                if (
+                    should_stop is not None
+                    and not self.nodes & check_mask
+                    and should_stop()
+                ):
+                    raise Interrupted
+                now = clock()
+                depth_times[depth] += now - last_time
+                last_time = now
+                depth += 1
+                if depth > stats.max_depth:
+                    stats.max_depth = depth
+                stack[depth] = images
+                cursors[depth] = 0
+                bests[depth] = pegs - depth
+                best_jumps[depth] = -1
+                continue
+
+            # Every jump from the position at depth has been searched. If
+            # there were any, store the best jump mapped onto the canonical
+            # form (positions with no moves left are not worth storing).
+            if best_jumps[depth] >= 0:
+                images = stack[depth]
+                key = min(images)
+                sym = images.index(key)
+                table.put(key, best, jump_maps[sym][best_jumps[depth]])
+
+            # Pass the result up one level
+            now = clock()
+            depth_times[depth] += now - last_time
+            last_time = now
+            if depth == 0:
+                return best
+            depth -= 1
+            value = best
+
+    def _improve(self, value: int, depth: int) -> None:
+        """
+        Record the line that leaves value pegs as the best found so far,
+        where the jump at depth leads to a position that has been searched
+        """
+
+        line = self._path[:depth + 1]
+        state = self._root
+        for k in line:
+            state ^= self.masks[k]
+
+        # The rest of the line is stored in the table, unless an entry on
+        # the way has been evicted
+        rest, state = self._line(state)
+        if bin(state).count("1") == value:
+            self.incumbent = (value, line + rest)
+            self.stats.improvements.append(
+                (time.perf_counter() - self._start_time, value)
+            )
+
+    def _line(self, state: State) -> Tuple[List[MoveId], State]:
+        """
+        Follow the best jump stored for each position from state, and return
+        the move IDs of the jumps and the position where the line ends
+        """
+
+        path: List[MoveId] = []
+        while True:
+            key, sym = self.canonical(state)
+            entry = self.table.peek(key)
+            if entry is None:
+                return path, state
+
+            # Map the stored jump back from the canonical form
+            k = self.inverse_jump_maps[sym][entry[1]]
+            path.append(k)
+            state ^= self.masks[k]
+
+    def _start(self, state: State, keep_table: bool) -> None:
+        """Reset the table (unless keep_table) and counters for a new search"""
+        if not keep_table:
+            self.table.clear()
+        self.nodes = 0
+        self._root = state
+        self.incumbent = (bin(state).count("1"), [])
+
+        # Count the lookups of this search only, even if the table is kept
+        self.stats = SolverStats(len(self._path))
+        self.stats.hits = -self.table.hits
+        self.stats.misses = -self.table.misses
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._start_time = time.perf_counter()
+
+    def _stop(self) -> None:
+        """Complete the stats of a search that has ended"""
+
+        stats = self.stats
+        stats.elapsed = time.perf_counter() - self._start_time
+        stats.nodes = self.nodes
+        stats.hits += self.table.hits
+        stats.misses += self.table.misses
+
+        # Peak since tracing started, which is the start of the search
+        # unless memory was already being traced
+        if self.trace_memory and tracemalloc.is_tracing():
+            stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def _finish(self, state: State) -> List[MoveId]:
+        """Return the path of a search from state that has completed"""
+
+        # Lines found while searching evicted positions again would start
+        # from the wrong root, so they are not recorded
+        self.incumbent = (0, [])
+
+        path: List[MoveId] = []
+        while True:
+            line, state = self._line(state)
+            path += line
+
+            # Position is either the end of the path or it has been evicted,
+            # in which case it is searched again (which stores it again)
+            if not self._has_jump(state):
+                return path
+            self._search(self.images(state), bin(state).count("1"))
+
+    def solve(
+        self,
+        state: State,
+        keep_table: bool = False
+    ) -> Tuple[int, List[MoveId]]:
+        """
+        Return the fewest pegs that can be left starting from state and the
+        list of move IDs of the jumps needed to get there
+
+        Every entry of the table is the exact result of its position, no
+        matter where the search started, so with keep_table the results of
+        earlier searches are reused rather than cleared
+
+        The counters and timings of the search are kept in the stats
+        attribute until the next search (see SolverStats)
+        """
+
+        self._start(state, keep_table)
+        pegs = bin(state).count("1")
+        try:
+            optimal_result = self._search(self.images(state), pegs)
+            path = self._finish(state)
+        finally:
+            self._stop()
+        self.incumbent = (optimal_result, path)
+        return optimal_result, path
+
+    def solve_anytime(
+        self,
+        state: State,
+        deadline: Optional[float] = None,
+        cancel: Optional[Callable[[], bool]] = None,
+        keep_table: bool = False,
+    ) -> Tuple[int, List[MoveId], bool]:
+        """
+        Search state until the search is complete, the deadline passes or
+        cancel returns True, and return the fewest pegs found, the move IDs
+        needed to get there and whether the result is proven optimal
+
+        Parameters
+        ----------
+        state : State
+            Bitmask of the position to solve
+        deadline : float
+            Time (as time.monotonic) by which the search must stop
+        cancel : Callable[[], bool]
+            Function that returns True once the search should stop, such as
+            the is_set method of a threading.Event
+        keep_table : bool
+            Whether to reuse the results of earlier searches (see solve)
+
+        The search can also be stopped with Ctrl-C (KeyboardInterrupt). The
+        best line found so far is available as the incumbent attribute while
+        the search runs.
+        """
+
+        def should_stop() -> bool:
+            return (
+                deadline is not None and time.monotonic() >= deadline
+                or cancel is not None and cancel()
+            )
+
+        self._start(state, keep_table)
+        pegs = bin(state).count("1")
+        self._should_stop = should_stop
+        try:
+            optimal_result = self._search(self.images(state), pegs)
+        except (Interrupted, KeyboardInterrupt):
+            self._stop()
+            return self.incumbent[0], list(self.incumbent[1]), False
+        finally:
+            self._should_stop = None
+
+        try:
+            path = self._finish(state)
+        finally:
+            self._stop()
+        self.incumbent = (optimal_result, path)
+        return optimal_result, list(path), True
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from .jumps import MoveId, jump_table
+from .solver import Solver, State
+
+
+# === Type Aliases & Explanations ===
+
+# A job for the background thread is a tuple of the number of rows of the
+# board and the position to solve
+Job = Tuple[int, State]
+
+# A solution is a tuple of the fewest pegs that can be left and the move IDs
+# needed to get there, as returned by Solver.solve
+Solution = Tuple[int, List[MoveId]]
+
+
+class Speculator:
+    """
+    Background thread that solves positions before they are asked for
+
+    While the player is thinking, the game asks the speculator to solve the
+    current position and the positions one jump away from it, so a hint is
+    usually ready by the time it is requested. Positions are solved one at a
+    time in the order they were asked for, and asking for a new list of
+    positions cancels the work on any position that is no longer in it.
+    """
+
+    # Most solutions to keep, dropping the least recently used
+    MAX_RESULTS = 10_000
+
+    # Most seconds to search each position, after which it is left to be
+    # searched when a hint is asked for, so a position that can't be solved
+    # quickly doesn't keep a core busy and the table growing while idle
+    JOB_SECONDS = 5.0
+
+    def __init__(self) -> None:
+
+        # Solved positions, by job
+        self.results: "OrderedDict[Job, Solution]" = OrderedDict()
+
+        # Positions waiting to be solved, in order
+        self.queue: List[Job] = []
+
+        # Position being solved by the thread, if any
+        self.current: Optional[Job] = None
+
+        # Set to stop the search of the current position
+        self.cancelled = threading.Event()
+
+        # One solver per board size, only used by the thread
+        self.solvers: Dict[int, Solver] = {}
+
+        # Guards every attribute above, and is notified when they change
+        self.condition = threading.Condition()
+
+        self.thread: Optional[threading.Thread] = None
+        self.stopped = False
+
+    def speculate(self, rows: int, states: List[State]) -> None:
+        """
+        Replace the positions waiting to be solved with states, on a board
+        with rows rows, cancelling the current search if it is not needed
+        """
+
+        with self.condition:
+            jobs = [(rows, state) for state in states]
+            self.queue = [job for job in jobs if job not in self.results]
+            if self.current is not None and self.current not in jobs:
+                self.cancelled.set()
+
+            # Start the thread the first time there is work to do
+            if self.thread is None and self.queue:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def speculate_moves(self, rows: int, state: State) -> None:
+        """
+        Solve state and then every position one jump away from it, on a board
+        with rows rows
+        """
+        table = jump_table(rows)
+        children = [
+            state ^ mask
+            for mask, pattern in zip(table.masks, table.patterns)
+            if state & mask == pattern
+        ]
+        self.speculate(rows, [state] + children)
+
+    def cancel(self) -> None:
+        """Cancel every position waiting to be solved and the current search"""
+        self.speculate(0, [])
+
+    def result(self, rows: int, state: State) -> Optional[Solution]:
+        """Return the solution of state if it has been solved, or else None"""
+        with self.condition:
+            job = (rows, state)
+            if job not in self.results:
+                return None
+            self.results.move_to_end(job)
+            result, moves = self.results[job]
+            return result, list(moves)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until there are no positions left to solve, and return False if
+        the timeout (in seconds) passed first
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: not self.queue and self.current is None, timeout
+            )
+
+    def stop(self) -> None:
+        """Cancel all work and stop the thread"""
+        with self.condition:
+            self.stopped = True
+            self.queue = []
+            self.cancelled.set()
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self) -> None:
+        """Solve positions from the queue until the speculator is stopped"""
+
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or self.stopped)
+                if self.stopped:
+                    return
+                job = self.current = self.queue.pop(0)
+                self.cancelled.clear()
+
+            rows, state = job
+            if rows not in self.solvers:
+                self.solvers[rows] = Solver(rows)
+            solver = self.solvers[rows]
+            deadline = time.monotonic() + self.JOB_SECONDS
+            result, moves, proven = solver.solve_anytime(
+                state, deadline, self.cancelled.is_set, keep_table=True
+            )
+
+            with self.condition:
+                self.current = None
+                if proven:
+                    self._store(solver, job, result, moves)
+                self.condition.notify_all()
+
+    def _store(
+        self,
+        solver: Solver,
+        job: Job,
+        result: int,
+        moves: List[MoveId],
+    ) -> None:
+        """
+        Store the solution of job, and of every position along its moves,
+        which are solved by the rest of the same line
+        """
+
+        rows, state = job
+        for i in range(len(moves) + 1):
+            self.results[(rows, state)] = (result, moves[i:])
+            self.results.move_to_end((rows, state))
+            if (rows, state) in self.queue:
+                self.queue.remove((rows, state))
+            if i < len(moves):
+                state ^= solver.masks[moves[i]]
+
+        while len(self.results) > self.MAX_RESULTS:
+            self.results.popitem(last=False)
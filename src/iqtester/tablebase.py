@@ -0,0 +1,204 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import argparse
+import mmap
+import os
+from .analysis import layers, single_hole_starts
+from .jumps import MoveId, jump_table
+from .solver import State
+
+
+# === Type Aliases & Explanations ===
+
+# A tablebase file stores the optimal result and a best move for every
+# position that can be reached from a board with a single hole. It starts
+# with a header of HEADER_SIZE bytes (MAGIC, the format VERSION, the number
+# of rows and padding), followed by an entry of ENTRY_SIZE bytes for every
+# possible State (see solver.py), in order of State:
+#   - byte 0: the fewest pegs that can be left, or 0 if the position can't
+#     be reached from a single hole start
+#   - byte 1: the move ID of a jump that leads to the fewest pegs, or
+#     NO_MOVE if there are no jumps left
+# So the entry of a position is found with a single lookup at a fixed
+# offset, without any search.
+
+MAGIC = b"IQTB"
+VERSION = 1
+HEADER_SIZE = 8
+ENTRY_SIZE = 2
+NO_MOVE = 255
+
+# The file has an entry for every possible State, so it doubles in size with
+# every hole (4 MB for 6 rows, but 512 MB for 7 rows)
+MIN_ROWS = 4
+MAX_ROWS = 6
+
+# Default directory of the tablebase files
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".iqtester")
+
+
+def file_name(rows: int) -> str:
+    """Return the name of the tablebase file for a board with rows rows"""
+    return f"tablebase-{rows}.bin"
+
+
+def build(rows: int, path: str) -> int:
+    """
+    Solve every position that can be reached on a board with rows rows and
+    write the tablebase file to path, returning the number of positions
+    """
+
+    if not MIN_ROWS <= rows <= MAX_ROWS:
+        raise ValueError(
+            f"Tablebases are only supported for {MIN_ROWS} to {MAX_ROWS} rows"
+        )
+
+    table = jump_table(rows)
+    moves = list(enumerate(zip(table.masks, table.patterns)))
+    entries = bytearray(ENTRY_SIZE << table.num_holes)
+
+    # Solve the layers in order of the number of pegs, so that every jump
+    # leads to a position that has already been solved
+    count = 0
+    for pegs, layer in reversed(list(layers(rows, single_hole_starts(rows)))):
+        for state in layer:
+            best, best_move = pegs, NO_MOVE
+            for move_id, (mask, pattern) in moves:
+                if state & mask == pattern:
+                    result = entries[(state ^ mask) * ENTRY_SIZE]
+                    if result < best:
+                        best, best_move = result, move_id
+            offset = state * ENTRY_SIZE
+            entries[offset] = best
+            entries[offset + 1] = best_move
+        count += len(layer)
+
+    # Write to a temporary file that replaces path once it is complete, so
+    # a build that is stopped never leaves a partial tablebase behind
+    header = MAGIC + bytes([VERSION, rows]) + bytes(HEADER_SIZE - 6)
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(header)
+        f.write(entries)
+    os.replace(temp, path)
+
+    return count
+
+
+class Tablebase:
+    """Read-only view of a memory-mapped tablebase file"""
+
+    def __init__(self, path: str) -> None:
+
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Check the header before trusting any entry
+        header = self.data[:HEADER_SIZE]
+        if header[:4] != MAGIC or header[4] != VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not a tablebase file")
+        self.rows = header[5]
+        num_holes = self.rows * (self.rows + 1) // 2
+        if len(self.data) != HEADER_SIZE + (ENTRY_SIZE << num_holes):
+            self.data.close()
+            raise ValueError(f"{path} is incomplete")
+
+    def lookup(self, state: State) -> Optional[Tuple[int, MoveId]]:
+        """
+        Return the optimal result and best move ID of state (the move ID is
+        NO_MOVE if there are no jumps), or None if it is not in the table
+        """
+        offset = HEADER_SIZE + state * ENTRY_SIZE
+        result, move_id = self.data[offset], self.data[offset + 1]
+        if not result:
+            return None
+        return result, move_id
+
+    def solve(self, state: State) -> Optional[Tuple[int, List[MoveId]]]:
+        """
+        Return the optimal result of state and the list of move IDs needed to
+        get there, or None if state is not in the table
+        """
+
+        entry = self.lookup(state)
+        if entry is None:
+            return None
+        optimal_result, move_id = entry
+
+        # Follow the best move of each position until there are no jumps
+        masks = jump_table(self.rows).masks
+        path: List[MoveId] = []
+        while move_id != NO_MOVE:
+            path.append(move_id)
+            state ^= masks[move_id]
+            move_id = self.data[HEADER_SIZE + state * ENTRY_SIZE + 1]
+
+        return optimal_result, path
+
+    def close(self) -> None:
+        self.data.close()
+
+
+@lru_cache(maxsize=None)
+def load(rows: int, directory: Optional[str] = None) -> Optional[Tablebase]:
+    """
+    Return the Tablebase for a board with rows rows from directory (by
+    default DEFAULT_DIRECTORY), or None if it has not been built or can't
+    be read
+
+    The file is only mapped once per process and shared by every board
+    """
+
+    if directory is None:
+        directory = DEFAULT_DIRECTORY
+    path = os.path.join(directory, file_name(rows))
+    if not os.path.exists(path):
+        return None
+
+    # A file that is damaged or can't be read only means slower hints, so
+    # play goes on without it
+    try:
+        tb = Tablebase(path)
+    except (OSError, ValueError):
+        return None
+
+    # A table for another board size (e.g. a renamed file) would give wrong
+    # hints rather than slower ones
+    if tb.rows != rows:
+        tb.close()
+        return None
+    return tb
+
+
+def main() -> None:
+    """Build tablebase files from the command line"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m iqtester.tablebase",
+        description="Solve every reachable position of a board and save the "
+                    "results for instant hints",
+    )
+    parser.add_argument(
+        "rows",
+        type=int,
+        nargs="+",
+        help=f"number of rows of the board ({MIN_ROWS} to {MAX_ROWS})",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=DEFAULT_DIRECTORY,
+        help=f"directory to write the files to (default: {DEFAULT_DIRECTORY})",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for rows in args.rows:
+        path = os.path.join(args.output, file_name(rows))
+        count = build(rows, path)
+        print(f"Solved {count} positions for {rows} rows: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from functools import lru_cache
+from typing import Iterable, Iterator, Tuple
+import numpy as np
+from .jumps import jump_table
+
+
+# === Type Aliases & Explanations ===
+
+# A batch of positions is a 1D NumPy array of uint64, where each element is a
+# State (see solver.py), so every operation on the batch is a single NumPy
+# operation rather than a Python loop over positions. This module needs the
+# optional numpy dependency (`pip install iqtester[fast]`).
+Batch = np.ndarray
+
+# The most holes a State can have to fit in a uint64 (10 rows)
+MAX_HOLES = 64
+
+
+@lru_cache(maxsize=None)
+def jump_arrays(rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the masks and patterns of every jump on a board with rows rows
+    (see JumpTable) as uint64 arrays indexed by move ID
+    """
+
+    table = jump_table(rows)
+    if table.num_holes > MAX_HOLES:
+        raise ValueError(
+            f"States of {table.num_holes} holes don't fit in a uint64"
+        )
+    masks = np.array(table.masks, dtype=np.uint64)
+    patterns = np.array(table.patterns, dtype=np.uint64)
+    return masks, patterns
+
+
+def as_batch(states: Iterable[int]) -> Batch:
+    """Return states as a batch of positions"""
+    return np.fromiter(states, dtype=np.uint64)
+
+
+def legal_moves(rows: int, states: Batch) -> np.ndarray:
+    """
+    Return a boolean array with a row for each position of states and a
+    column for each move ID, which is True where the jump is possible
+    """
+
+    masks, patterns = jump_arrays(rows)
+
+    # One operation over the whole batch per jump, which keeps the temporary
+    # arrays the size of the batch rather than 8 times the size of the
+    # result. Each jump fills a contiguous row, and the transpose is a view.
+    legal = np.empty((len(masks), len(states)), dtype=bool)
+    for k in range(len(masks)):
+        np.equal(states & masks[k], patterns[k], out=legal[k])
+
+    return legal.T
+
+
+def successors(rows: int, states: Batch) -> Batch:
+    """
+    Return every position one jump away from the positions of states, in
+    order of move ID, including duplicates
+    """
+
+    masks, _ = jump_arrays(rows)
+    legal = legal_moves(rows, states).T
+    children = [states[legal[k]] ^ masks[k] for k in range(len(masks))]
+    if not children:
+        return np.empty(0, dtype=np.uint64)
+    return np.concatenate(children)
+
+
+def unique(states: Batch) -> Batch:
+    """Return the sorted, distinct positions of states"""
+
+    # Sort and keep each position that differs from the one before it, which
+    # is several times faster than np.unique on some versions of NumPy
+    states = np.sort(states)
+    if not len(states):
+        return states
+    keep = np.empty(len(states), dtype=bool)
+    keep[0] = True
+    np.not_equal(states[1:], states[:-1], out=keep[1:])
+    return states[keep]
+
+
+def expand(rows: int, states: Batch) -> Batch:
+    """
+    Return the sorted, distinct positions one jump away from the positions
+    of states
+    """
+    return unique(successors(rows, states))
+
+
+def layers(rows: int, starts: Iterable[int]) -> Iterator[Tuple[int, Batch]]:
+    """
+    Yield the number of pegs and the sorted batch of positions reachable
+    from starts, one layer at a time from the most pegs to the fewest (see
+    analysis.layers)
+
+    Every position in starts must have the same number of pegs.
+    """
+
+    layer = unique(as_batch(starts))
+    pegs = bin(int(layer[0])).count("1") if len(layer) else 0
+    while len(layer):
+        yield pegs, layer
+        layer = expand(rows, layer)
+        pegs -= 1
@@ -0,0 +1,277 @@
+"""
+Benchmarks of the hot paths of Board, Solver and Formatter
+
+Run from the root of the repository (with iqtester installed, e.g. with
+`pip install -e .`):
+
+    python tests/benchmarks/bench.py -o bench.json
+    python tests/benchmarks/bench.py -o new.json --compare bench.json
+
+Every run uses the same seeded corpus of positions, so the results of two
+runs on the same machine can be compared. With --compare, any timing that
+is slower than the baseline by more than the threshold is reported and the
+exit code is 1.
+"""
+
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from iqtester.board import Board
+from iqtester.formatter import Formatter
+
+
+# === Type Aliases & Explanations ===
+
+# A corpus maps the number of pegs to a list of positions with that many
+# pegs, each as the peg removed at the start followed by the moves
+# (peg, jump) that reach the position
+Corpus = Dict[int, List[List[Any]]]
+
+# Results of a benchmark run, as written to the output file
+Results = Dict[str, Any]
+
+
+SIZES = [4, 5, 6, 7, 8]
+SEED = 2022
+POSITIONS_PER_PEG_COUNT = 3
+
+
+def build_corpus(rows: int, seed: int, per_count: int) -> Corpus:
+    """
+    Return per_count positions for each number of pegs that random games on
+    a board with rows rows reach, starting with a random peg removed
+    """
+
+    rng = random.Random(f"{seed}-{rows}")
+    corpus: Corpus = {}
+
+    # Play random games until every peg count has enough positions (or no
+    # more games are left to try)
+    for _ in range(per_count * 20):
+        b = Board(rows)
+        start = rng.choice(sorted(b.peg_locations_map))
+        b.remove_peg(start)
+        moves: List[Any] = [start]
+        while True:
+            pegs = b.number_of_pegs()
+            positions = corpus.setdefault(pegs, [])
+            if len(positions) < per_count:
+                positions.append(list(moves))
+            if not b.moves_map:
+                break
+            peg = rng.choice(sorted(b.moves_map))
+            jump = rng.choice(b.moves_map[peg])
+            b.make_move(peg, jump)
+            moves.append((peg, jump))
+        if all(len(p) >= per_count for p in corpus.values()):
+            break
+
+    return corpus
+
+
+def board_at(rows: int, moves: List[Any]) -> Board:
+    """Return a board with the first peg of moves removed and moves made"""
+    b = Board(rows)
+    b.tablebase = None
+    b.remove_peg(moves[0])
+    for peg, jump in moves[1:]:
+        b.make_move(peg, jump)
+    return b
+
+
+def timed(func: Callable[[], Any], min_time: float = 0.01) -> float:
+    """Return the time in seconds of one call of func, timing many calls"""
+
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def bench_board(b: Board, solve_time_limit: float) -> Dict[str, Any]:
+    """Return the timings of the hot paths of Board for the position b"""
+
+    results: Dict[str, Any] = {}
+
+    # Solve with a fresh table, so earlier positions don't help, and stop
+    # hard positions at the time limit (their result is then not proven)
+    solver = b.solver
+    start = time.perf_counter()
+    result, _, proven = solver.solve_anytime(
+        b.bitmask(), time.monotonic() + solve_time_limit
+    )
+    results["solve"] = time.perf_counter() - start
+    results["nodes"] = solver.nodes
+    results["result"] = result
+    results["proven"] = proven
+
+    # Rebuild the moves map from scratch
+    results["update_moves_map"] = timed(b._update_moves_map)
+
+    # Make and undo every possible move
+    moves = [(peg, jump) for peg, jumps in b.moves_map.items()
+             for jump in jumps]
+
+    def make_undo() -> None:
+        for peg, jump in moves:
+            peg_jumped = b.board[jump[0][0]][jump[0][1]]
+            jump_from = b.peg_locations_map[peg]
+            b.make_move(peg, jump)
+            b.undo_move((peg, jump), peg_jumped, jump_from)
+
+    if moves:
+        results["make_undo"] = timed(make_undo) / len(moves)
+
+    # Print the board into a buffer rather than the terminal
+    def print_board() -> None:
+        with redirect_stdout(StringIO()):
+            b.print_board()
+
+    results["print_board"] = timed(print_board)
+
+    return results
+
+
+def bench_formatter() -> float:
+    """Return the time in seconds of one call of Formatter.center"""
+
+    f = Formatter()
+
+    def center() -> None:
+        with redirect_stdout(StringIO()):
+            f.center("a b c d e ", inner_width=30, inner_border_char="|")
+
+    return timed(center)
+
+
+def run(
+    sizes: List[int],
+    seed: int,
+    per_count: int,
+    solve_time_limit: float,
+) -> Results:
+    """Run every benchmark and return the results"""
+
+    results: Results = {
+        "meta": {
+            "seed": seed,
+            "positions_per_peg_count": per_count,
+            "solve_time_limit": solve_time_limit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "boards": [],
+        "formatter_center": bench_formatter(),
+    }
+
+    for rows in sizes:
+        corpus = build_corpus(rows, seed, per_count)
+        for pegs in sorted(corpus, reverse=True):
+            timings = [
+                bench_board(board_at(rows, moves), solve_time_limit)
+                for moves in corpus[pegs]
+            ]
+            entry: Dict[str, Any] = {
+                "rows": rows,
+                "pegs": pegs,
+                "positions": len(timings),
+                "nodes": sum(t["nodes"] for t in timings),
+                "proven": all(t["proven"] for t in timings),
+            }
+            for key in ["solve", "update_moves_map", "make_undo",
+                        "print_board"]:
+                values = [t[key] for t in timings if key in t]
+                if values:
+                    entry[key] = sum(values) / len(values)
+            results["boards"].append(entry)
+            print(
+                f"{rows} rows, {pegs:>2} pegs: solve {entry['solve']:.4f} s,"
+                f" {entry['nodes']} nodes",
+                file=sys.stderr,
+            )
+
+    return results
+
+
+def compare(
+    baseline: Results,
+    results: Results,
+    threshold: float,
+) -> List[str]:
+    """
+    Return a description of each timing in results that is slower than the
+    same timing in baseline by more than threshold (e.g. 0.2 for 20%)
+    """
+
+    regressions = []
+
+    def check(name: str, old: Optional[float], new: Optional[float]) -> None:
+        if old and new and new > old * (1 + threshold):
+            regressions.append(f"{name}: {old:.6f} s -> {new:.6f} s")
+
+    check(
+        "formatter_center",
+        baseline.get("formatter_center"),
+        results.get("formatter_center"),
+    )
+    old_boards = {(e["rows"], e["pegs"]): e for e in baseline["boards"]}
+    for entry in results["boards"]:
+        old = old_boards.get((entry["rows"], entry["pegs"]))
+        if old is None:
+            continue
+        for key in ["solve", "update_moves_map", "make_undo", "print_board"]:
+            name = f"{entry['rows']} rows, {entry['pegs']} pegs, {key}"
+            check(name, old.get(key), entry.get(key))
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks from the command line"""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-o", "--output", default="bench.json",
+                        help="file to write the results to")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="board sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--positions", type=int,
+                        default=POSITIONS_PER_PEG_COUNT,
+                        help="positions per board size and peg count")
+    parser.add_argument("--solve-time-limit", type=float, default=5.0,
+                        help="most seconds to search each position")
+    parser.add_argument("--compare",
+                        help="results file of an earlier run to compare to")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown to report as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.seed, args.positions,
+                  args.solve_time_limit)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
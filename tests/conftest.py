@@ -0,0 +1,15 @@
+import pytest
+from iqtester import tablebase
+
+
+@pytest.fixture(autouse=True)
+def no_user_tablebases(tmp_path_factory, monkeypatch):
+    """
+    Load tablebases from an empty directory rather than ~/.iqtester, so
+    tests don't depend on the tablebases the user has built
+    """
+    directory = str(tmp_path_factory.mktemp("tablebases"))
+    monkeypatch.setattr(tablebase, "DEFAULT_DIRECTORY", directory)
+    tablebase.load.cache_clear()
+    yield
+    tablebase.load.cache_clear()
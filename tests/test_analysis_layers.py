@@ -0,0 +1,65 @@
+import random
+from typing import Dict
+from iqtester.analysis import (
+    REACHABLE_POSITIONS, count_layers, fewest_pegs, layers
+)
+from iqtester.board import Board
+from test_board_solve import random_board
+
+
+def test_count_layers_matches_recorded_counts():
+
+    for rows in (4, 5):
+        assert count_layers(rows) == REACHABLE_POSITIONS[rows]
+
+
+def test_layers_are_sorted_and_unique():
+
+    for pegs, layer in layers(5, [(1 << 15) - 2]):
+        assert list(layer) == sorted(set(layer))
+        assert all(bin(state).count("1") == pegs for state in layer)
+
+
+def test_fewest_pegs_matches_solver():
+
+    for rows in (4, 5):
+        expected = []
+        for peg in sorted(Board(rows).peg_locations_map):
+            b = Board(rows)
+            b.remove_peg(peg)
+            expected.append(b.solve()[0])
+        assert fewest_pegs(rows) == expected
+
+
+def count_paths(b: Board) -> Dict[int, int]:
+    """Return the outcomes of b by walking every sequence of moves"""
+    if not b.moves_map:
+        return {b.number_of_pegs(): 1}
+    outcomes: Dict[int, int] = {}
+    for peg, jumps in list(b.moves_map.items()):
+        for jump in list(jumps):
+            jump_from = b.peg_locations_map[peg]
+            peg_jumped = b.board[jump[0][0]][jump[0][1]]
+            b.make_move(peg, jump)
+            for pegs, count in count_paths(b).items():
+                outcomes[pegs] = outcomes.get(pegs, 0) + count
+            b.undo_move((peg, jump), peg_jumped, jump_from)
+    return outcomes
+
+
+def test_count_outcomes():
+
+    # The classic board with the top corner empty has 568,630 possible games,
+    # of which 29,760 leave 1 peg
+    b = Board(5)
+    b.remove_peg('a')
+    outcomes = b.count_outcomes()
+    assert outcomes is not None
+    assert sum(outcomes.values()) == 568630
+    assert outcomes[1] == 29760
+    assert b.count_outcomes(max_positions=10) is None
+
+    rng = random.Random(14)
+    for _ in range(10):
+        b = random_board(rng.choice([4, 5]), rng.randrange(4, 8), rng)
+        assert b.count_outcomes() == count_paths(b)
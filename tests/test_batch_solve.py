@@ -0,0 +1,76 @@
+import json
+from io import StringIO
+from iqtester.__main__ import main
+from iqtester.batch import run
+from iqtester.board import Board
+
+
+def test_batch_solve(monkeypatch, capsys):
+
+    lines = [
+        json.dumps({"id": 1, "rows": 5, "pegs": list("bcdefghijklmno")}),
+        json.dumps({"id": 2, "rows": 4, "pegs": ["a", "j"]}),
+        "",
+        json.dumps({"id": 3, "rows": 4, "pegs": ["a", "zz"]}),
+        "not json",
+        "[1, 2]",
+        '"x"',
+        json.dumps({"id": 4, "rows": True, "pegs": ["a"]}),
+        json.dumps({"id": 5, "rows": 4, "pegs": "bcd"}),
+        json.dumps({"id": 6, "rows": 4, "pegs": [["a"]]}),
+        json.dumps({"id": 7, "rows": 5}),
+        json.dumps({"id": 8, "rows": 5, "pegs": []}),
+    ]
+    monkeypatch.setattr('sys.stdin', StringIO("\n".join(lines) + "\n"))
+    main(["solve"])
+    output, _ = capsys.readouterr()
+    records = [json.loads(line) for line in output.splitlines()]
+
+    assert len(records) == 11
+    assert records[0]["result"] == 1 and len(records[0]["moves"]) == 13
+    assert records[1]["result"] == 2 and records[1]["moves"] == []
+    assert "error" in records[2] and records[2]["id"] == 3
+    assert "error" in records[3]
+
+    # Lines that aren't objects, or have the wrong types, are errors too
+    for record in records[4:6]:
+        assert record == {"id": None, "error": "line must be a JSON object"}
+    for record, id in zip(records[6:], [4, 5, 6, 7, 8]):
+        assert "error" in record and record["id"] == id
+        assert "result" not in record
+
+    # A position needs pegs, rather than being solved as an empty board
+    for record in records[9:]:
+        assert record["error"] == \
+            "pegs must be a non-empty list of peg labels"
+
+    # Replay the moves on a board to check them
+    b = Board(5)
+    b.remove_peg("a")
+    for src, over, dst in records[0]["moves"]:
+        i, j = b.jump_table.locations[ord(src) - 97]
+        jump = (
+            b.jump_table.locations[ord(over) - 97],
+            b.jump_table.locations[ord(dst) - 97],
+        )
+        b.make_move(b.board[i][j], jump)
+    assert b.number_of_pegs() == 1
+
+
+def test_batch_solve_workers():
+
+    lines = [
+        json.dumps({"id": k, "rows": 5, "pegs": [
+            peg for peg in "abcdefghijklmno" if peg != chr(97 + k)
+        ]})
+        for k in range(15)
+    ]
+    serial, parallel = StringIO(), StringIO()
+    assert run(lines, serial) == 15
+    assert run(lines, parallel, workers=2) == 15
+
+    def results(output):
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        return sorted((r["id"], r["result"]) for r in records)
+
+    assert results(serial) == results(parallel)
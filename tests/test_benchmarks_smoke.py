@@ -0,0 +1,32 @@
+import json
+from benchmarks import bench
+
+
+def test_build_corpus_is_seeded():
+    corpus = bench.build_corpus(4, seed=1, per_count=2)
+    assert corpus == bench.build_corpus(4, seed=1, per_count=2)
+    assert 9 in corpus and len(corpus[9]) == 2
+    for pegs, positions in corpus.items():
+        for moves in positions:
+            assert bench.board_at(4, moves).number_of_pegs() == pegs
+
+
+def test_run_and_compare(tmp_path):
+    output = tmp_path / "bench.json"
+    args = ["-o", str(output), "--sizes", "4", "--positions", "1"]
+    assert bench.main(args) == 0
+    results = json.loads(output.read_text())
+    assert results["boards"][0]["pegs"] == 9
+    for entry in results["boards"]:
+        assert entry["proven"]
+        assert entry["nodes"] > 0
+        assert entry["solve"] > 0
+
+    # Any timing slower than the baseline is a regression
+    baseline = json.loads(output.read_text())
+    baseline["formatter_center"] /= 10
+    assert bench.compare(baseline, results, 0.2) == [
+        f"formatter_center: {baseline['formatter_center']:.6f} s -> "
+        f"{results['formatter_center']:.6f} s"
+    ]
+    assert bench.compare(results, results, 0.2) == []
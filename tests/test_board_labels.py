@@ -0,0 +1,64 @@
+import random
+from io import StringIO
+from iqtester.board import Board, peg_label
+from iqtester.formatter import Formatter
+from iqtester.game import Game
+from iqtester.solver import Solver
+
+
+def test_peg_labels():
+
+    assert [peg_label(k) for k in (0, 25, 26, 51, 52, 77)] == [
+        "a", "z", "aa", "az", "ba", "bz"
+    ]
+
+    # Labels are unique letters on every board size
+    for rows in range(Board.MIN_ROWS, Board.MAX_ROWS + 1):
+        b = Board(rows)
+        assert len(b.peg_locations_map) == b.num_holes
+        assert all(peg.isalpha() for peg in b.peg_locations_map)
+
+
+def test_print_large_board(capsys):
+
+    b = Board(12)
+    b.remove_peg("bz")
+    b.print_board()
+    output, _ = capsys.readouterr()
+
+    # Every line of the box has the same printed width
+    lines = [line.rstrip() for line in output.split("\n") if "|" in line]
+    assert len(lines) == 12 + 4
+    assert len({len(line) for line in lines}) == 1
+    assert "bo bp bq br bs bt bu bv bw bx by .  " in output
+
+
+def test_parse_peg(monkeypatch):
+
+    g = Game(Formatter(), 10, game_over_pause=0, msg_pause=0)
+    monkeypatch.setattr('sys.stdin', StringIO(' AB \n'))
+    g.remove_one_peg()
+    assert "ab" not in g.b.peg_locations_map
+    assert g.b.number_of_pegs() == 54
+
+
+def test_solve_beyond_64_bits():
+
+    # Build a position that can be solved to 1 peg by making random jumps
+    # backwards from a single peg on a 12 row board (78 holes)
+    solver = Solver(12)
+    table = solver.jump_table
+    rng = random.Random(12)
+    state = 1 << 70
+    for _ in range(12):
+        state ^= table.masks[rng.choice([
+            k for k in range(len(table))
+            if state & table.masks[k] == 1 << table.dst[k]
+        ])]
+
+    result, moves = solver.solve(state)
+    assert result == 1
+    for k in moves:
+        assert state & solver.masks[k] == solver.patterns[k]
+        state ^= solver.masks[k]
+    assert bin(state).count("1") == 1
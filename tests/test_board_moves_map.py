@@ -0,0 +1,45 @@
+import random
+from typing import List, Tuple
+from iqtester.board import Board, BoardLocation, Move, MovesMap, Peg
+
+
+def rebuilt_moves_map(b: Board) -> MovesMap:
+    """Return the moves map of b rebuilt from scratch"""
+    incremental = b.moves_map
+    b._update_moves_map()
+    rebuilt = b.moves_map
+    b.moves_map = incremental
+    return dict(rebuilt)
+
+
+def test_moves_map_incremental_matches_rebuild():
+    """Replay random games, checking moves map after every change"""
+
+    rng = random.Random(6)
+    for _ in range(50):
+        b = Board(rng.choice([4, 5, 6, 7, 8]))
+        b.remove_peg(rng.choice(sorted(b.peg_locations_map)))
+        assert dict(b.moves_map) == rebuilt_moves_map(b)
+
+        moves_taken: List[Tuple[Move, Peg, BoardLocation]] = []
+        while b.moves_map:
+
+            # Undo the last move some of the time
+            if moves_taken and rng.random() < 0.25:
+                b.undo_move(*moves_taken.pop())
+
+            # Otherwise make a random move
+            else:
+                peg = rng.choice(sorted(b.moves_map))
+                jump = rng.choice(b.moves_map[peg])
+                peg_jumped = b.board[jump[0][0]][jump[0][1]]
+                jump_from = b.peg_locations_map[peg]
+                b.make_move(peg, jump)
+                moves_taken.append(((peg, jump), peg_jumped, jump_from))
+
+            assert dict(b.moves_map) == rebuilt_moves_map(b)
+
+        # Remove the remaining pegs one at a time
+        for peg in sorted(b.peg_locations_map):
+            b.remove_peg(peg)
+            assert dict(b.moves_map) == rebuilt_moves_map(b)
@@ -0,0 +1,269 @@
+import random
+import time
+from typing import List
+from iqtester.board import Board, Move
+from iqtester import parallel
+from iqtester.parallel import solve_parallel
+from iqtester.solver import Solver
+
+
+def brute_force(b: Board) -> int:
+    """Return the optimal result for b by trying every sequence of moves"""
+    if not b.moves_map:
+        return b.number_of_pegs()
+    best = b.number_of_pegs()
+    for peg, jumps in list(b.moves_map.items()):
+        for jump in list(jumps):
+            jump_from = b.peg_locations_map[peg]
+            peg_jumped = b.board[jump[0][0]][jump[0][1]]
+            b.make_move(peg, jump)
+            best = min(best, brute_force(b))
+            b.undo_move((peg, jump), peg_jumped, jump_from)
+    return best
+
+
+def random_board(rows: int, moves: int, rng: random.Random) -> Board:
+    """Return a board after removing a random peg and making random moves"""
+    b = Board(rows)
+    b.remove_peg(rng.choice(sorted(b.peg_locations_map)))
+    for _ in range(moves):
+        if not b.moves_map:
+            break
+        peg = rng.choice(sorted(b.moves_map))
+        b.make_move(peg, rng.choice(b.moves_map[peg]))
+    return b
+
+
+def replay(b: Board, moves: List[Move]) -> None:
+    """Make each move in moves on b, checking that each one is possible"""
+    for peg, jump in moves:
+        assert jump in b.moves_map[peg]
+        b.make_move(peg, jump)
+
+
+def test_solve_full_board():
+
+    # Every start on a 5 row board can be solved down to 1 peg
+    for peg in "abcdefghijklmno":
+        b = Board(5)
+        b.remove_peg(peg)
+        result, moves = b.solve()
+        assert result == 1
+        assert len(moves) == 13
+
+        # Solving must leave the board unchanged
+        assert b.number_of_pegs() == 14
+
+        replay(b, moves)
+        assert b.number_of_pegs() == 1
+        assert not b.moves_map
+
+
+def test_solve_no_moves():
+
+    b = Board(4)
+    assert b.solve() == (10, [])
+
+
+def test_solve_matches_brute_force():
+
+    rng = random.Random(2022)
+    for _ in range(40):
+        rows = rng.choice([4, 5])
+        b = random_board(rows, rng.randrange(2, rows * 2), rng)
+        result, moves = b.solve()
+        assert result == brute_force(b)
+
+        # The moves returned must lead to the optimal result
+        replay(b, moves)
+        assert b.number_of_pegs() == result
+        assert not b.moves_map
+
+
+def test_solve_transposition_table_eviction():
+
+    # A table too small for the search must evict but still find the optimum
+    b = Board(5)
+    b.remove_peg('e')
+    expected = b.solve()[0]
+    assert b.solver.table.hits > 0
+    assert b.solver.table.evictions == 0
+
+    b.solver = Solver(5, max_entries=8)
+    result, moves = b.solve()
+    assert result == expected
+    assert len(b.solver.table) <= 8
+    assert b.solver.table.evictions > 0
+
+    replay(b, moves)
+    assert b.number_of_pegs() == result
+
+
+def test_solve_symmetric_positions():
+
+    # Boards that are reflections or rotations of each other are solved
+    # once and share one entry in the transposition table
+    solver = Solver(5)
+    keys = set()
+    for hole in [0, 10, 14]:
+        state = (1 << 15) - 1 ^ 1 << hole
+        key, sym = solver.canonical(state)
+        assert solver.images(state)[sym] == key
+        assert solver.images(state)[0] == state
+        keys.add(key)
+    assert len(keys) == 1
+
+    # Moves are mapped back to the real pegs for each of the symmetric boards
+    for peg in "ako":
+        b = Board(5)
+        b.remove_peg(peg)
+        result, moves = b.solve()
+        replay(b, moves)
+        assert b.number_of_pegs() == result == 1
+
+
+def test_can_reach():
+
+    # Three pegs of different colors can never be reduced to 1 peg
+    b = Board(5)
+    for peg in "defghijklmno":
+        b.remove_peg(peg)
+    assert not b.can_reach(1)
+    assert b.can_reach(2)
+    assert b.can_reach(3)
+    assert b.solve()[0] == 2
+
+    # The check must never rule out a result that solve can reach
+    rng = random.Random(7)
+    for _ in range(100):
+        rows = rng.choice([4, 5, 6])
+        b = random_board(rows, rng.randrange(rows * (rows + 1) // 2), rng)
+        result = b.solve()[0]
+        for k in range(result, b.number_of_pegs() + 1):
+            assert b.can_reach(k)
+
+
+def test_solve_parallel_matches_serial():
+
+    rng = random.Random(8)
+    for rows, moves in [(5, 0), (5, 3), (6, 2), (4, 5)]:
+        b = random_board(rows, moves, rng)
+        result, _ = b.solve()
+        parallel_result, parallel_moves = b.solve(workers=2)
+        assert parallel_result == result
+
+        # The moves returned must lead to the optimal result
+        replay(b, parallel_moves)
+        assert b.number_of_pegs() == result
+        assert not b.moves_map
+
+
+def test_solve_parallel_splits_tasks(monkeypatch):
+
+    # Count the times the search is split, which is once at the start
+    splits = []
+    original = parallel.split
+
+    def split(*args):
+        splits.append(args[1])
+        return original(*args)
+
+    monkeypatch.setattr(parallel, "split", split)
+
+    # A task that isn't complete right away is split into smaller tasks.
+    # With one worker, tasks are searched in a fixed order, so the splits
+    # don't depend on timing.
+    b = Board(7)
+    b.remove_peg("d")
+    result, _ = solve_parallel(7, b.bitmask(), workers=1, task_seconds=0)
+    assert result == 1
+    assert len(splits) > 1
+
+    # Split tasks must still find the optimal result with many workers
+    rng = random.Random(9)
+    for rows, moves in [(7, 0), (6, 1)]:
+        b = random_board(rows, moves, rng)
+        result, _ = b.solve()
+        parallel_result, parallel_moves = solve_parallel(
+            rows, b.bitmask(), workers=2, task_seconds=0
+        )
+        assert parallel_result == result
+        for k in parallel_moves:
+            replay(b, [b.move(k)])
+        assert b.number_of_pegs() == result
+        assert not b.moves_map
+
+
+def test_solve_anytime():
+
+    rng = random.Random(11)
+    stopped = 0
+    for _ in range(10):
+        b = random_board(6, rng.randrange(0, 4), rng)
+        expected, _ = b.solve()
+
+        # Without a deadline, the search completes and is proven
+        result, moves, proven = b.solve_anytime()
+        assert (result, proven) == (expected, True)
+
+        # A search stopped early returns a line of possible jumps that leaves
+        # as many pegs as it says, which can't be better than the optimal
+        solver = Solver(6)
+        solver.CHECK_INTERVAL = 4
+        result, moves, proven = solver.solve_anytime(
+            b.bitmask(), cancel=lambda: True
+        )
+        stopped += not proven
+        assert result >= expected
+        state = b.bitmask()
+        for k in moves:
+            assert state & solver.masks[k] == solver.patterns[k]
+            state ^= solver.masks[k]
+        assert bin(state).count("1") == result
+
+    assert stopped
+
+
+def test_solve_stats():
+
+    b = random_board(6, 2, random.Random(12))
+    b.tablebase = None
+    b.solver.trace_memory = True
+    result, _ = b.solve()
+    stats = b.search_stats
+    assert stats is not None
+    assert stats.nodes == b.solver.nodes > 0
+    assert 0 < stats.max_depth < b.num_holes
+    assert sum(stats.depth_times) <= stats.elapsed
+    assert stats.nodes_per_second > 0
+    assert stats.hits + stats.misses > 0
+    assert stats.peak_memory is not None and stats.peak_memory > 0
+
+    # Each improvement leaves fewer pegs than the one before, ending with
+    # the optimal result
+    times = [t for t, _ in stats.improvements]
+    pegs = [p for _, p in stats.improvements]
+    assert times == sorted(times)
+    assert pegs == sorted(pegs, reverse=True) and pegs[-1] == result
+
+    # Searching the same position again only looks up the table
+    b.solver.trace_memory = False
+    b.solve()
+    assert b.search_stats.nodes == 0
+    assert b.search_stats.misses == 0
+    assert b.search_stats.peak_memory is None
+
+
+def test_best_first_peg_deadline():
+
+    # On a large board, the starts share the time left
+    b = Board(12)
+    start = time.monotonic()
+    peg, result, proven = b.best_first_peg(start + 0.5)
+    assert time.monotonic() - start < 1.5
+    assert peg in b.peg_locations_map
+    assert 1 <= result < b.num_holes - 1
+
+    # A result other than 1 peg from a search that was cut short isn't
+    # proven to be the fewest
+    assert proven == (result == 1)
@@ -0,0 +1,95 @@
+from io import StringIO
+from iqtester.board import Board
+from iqtester.formatter import Formatter
+from iqtester.session import Session
+
+
+class CountingStream(StringIO):
+    """Text stream that counts the calls to write and flush"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        return super().write(text)
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+def test_print_board_is_one_write(monkeypatch):
+
+    stream = CountingStream()
+    monkeypatch.setattr('sys.stdout', stream)
+    b = Board(5)
+    b.remove_peg("a")
+    b.print_board({"b", "d"}, "GREEN")
+    assert (stream.writes, stream.flushes) == (1, 1)
+    assert "IQ Tester Board" in stream.getvalue()
+    assert "14 pegs" in stream.getvalue()
+
+    # Printing again reuses the cached borders, and prints the same frame
+    first = stream.getvalue()
+    b.print_board({"b", "d"}, "GREEN")
+    assert stream.getvalue() == first * 2
+    assert (stream.writes, stream.flushes) == (2, 2)
+
+
+def test_menus_are_one_write(monkeypatch):
+
+    stream = CountingStream()
+    monkeypatch.setattr('sys.stdout', stream)
+    s = Session()
+    for menu in (s.main_menu, s.settings_menu):
+        stream.writes = stream.flushes = 0
+        menu()
+        assert (stream.writes, stream.flushes) == (1, 1)
+
+    # The borders and options are only formatted the first time
+    cached = len(s.f.line_cache)
+    s.main_menu()
+    assert len(s.f.line_cache) == cached
+
+
+def test_frames_nest_and_pause_flushes(monkeypatch):
+
+    stream = CountingStream()
+    monkeypatch.setattr('sys.stdout', stream)
+    f = Formatter()
+    with f.frame():
+        f.center("outer")
+        with f.frame():
+            f.center("inner")
+        assert stream.writes == 0
+
+        # Pausing sends what was written so far, so it shows while waiting
+        f.pause(0)
+        assert stream.writes == 1
+        f.center("after")
+    assert stream.writes == 2
+    output = stream.getvalue()
+    positions = [output.index(msg) for msg in ("outer", "inner", "after")]
+    assert positions == sorted(positions)
+
+    # Outside of a frame, text is written right away
+    f.center("now")
+    assert stream.writes == 3
+
+
+def test_cached_lines_follow_width_and_plain_mode():
+
+    output = StringIO()
+    f = Formatter(20, output=output)
+    f.center("x", ["BOLD"], "-", cache=True)
+    f.width = 30
+    f.center("x", ["BOLD"], "-", cache=True)
+    f.plain = True
+    f.center("x", ["BOLD"], "-", cache=True)
+
+    first, wider, plain = output.getvalue().splitlines()
+    assert len(wider) == len(first) + 10
+    assert "\033" in wider
+    assert plain == "-" * 14 + "x" + "-" * 15
@@ -0,0 +1,68 @@
+from io import StringIO
+import pytest
+from iqtester.board import Board
+from iqtester.formatter import Formatter
+from iqtester.session import Session
+
+
+def test_formatter_writes_to_stream(capsys):
+
+    output = StringIO()
+    f = Formatter(40, output=output)
+    f.center("hello", ["BOLD", "RED"])
+    b = Board(4, f)
+    b.print_board({"a"}, "GREEN")
+
+    # Nothing is written to standard output
+    assert capsys.readouterr().out == ""
+    assert "hello" in output.getvalue()
+    assert "\033[91m" in output.getvalue()
+    assert "IQ Tester Board" in output.getvalue()
+
+
+def test_plain_formatter_has_no_ansi_codes():
+
+    output = StringIO()
+    plain = Formatter(40, output=output, plain=True)
+    plain.center("hello", ["BOLD", "RED"], inner_width=20,
+                 inner_border_char="|")
+    Board(4, plain).print_board({"a", "b"}, "GREEN")
+    assert "\033" not in output.getvalue()
+
+    # Lines are as wide as with formatting, once the codes are removed
+    formatted = StringIO()
+    f = Formatter(40, output=formatted)
+    f.center("hello", ["BOLD", "RED"], inner_width=20, inner_border_char="|")
+    line = formatted.getvalue()
+    for code, _ in f.format_codes_map.values():
+        line = line.replace(code, "")
+    assert output.getvalue().splitlines()[0] == line.rstrip("\n")
+
+    with pytest.raises(NotImplementedError):
+        plain.apply_formatting("hello", ["PINK"])
+
+
+def test_formatter_reads_input_stream():
+
+    output = StringIO()
+    f = Formatter(output=output, input_stream=StringIO("a\r\n b\n"))
+    assert f.prompt("First") == "a"
+    assert f.input() == " b"
+    assert ">> First >>" in output.getvalue()
+    with pytest.raises(EOFError):
+        f.input()
+
+
+def test_session_with_streams(capsys):
+
+    output = StringIO()
+    f = Formatter(output=output, input_stream=StringIO("s\nr\nq\n"),
+                  plain=True)
+    s = Session(msg_pause=0, f=f)
+    s.start()
+
+    text = output.getvalue()
+    assert capsys.readouterr().out == ""
+    assert "\033" not in text
+    assert "MAIN MENU" in text and "SETTINGS MENU" in text
+    assert "Thanks for playing!" in text
@@ -0,0 +1,200 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from iqtester.formatter import Formatter
+from iqtester.game import Game
+from iqtester.speculation import Speculator
+
+
+def test_game_hint_follow_to_end(monkeypatch, capsys):
+    """Follow every hint from the start and finish with 1 peg"""
+
+    g = Game(Formatter(), 5, game_over_pause=0, msg_pause=0)
+    monkeypatch.setattr('sys.stdin', StringIO('a\n'))
+    g.remove_one_peg()
+
+    while g.b.moves_map:
+        g.show_hint()
+        assert g.optimal_moves is not None
+        peg, jump = g.b.move(g.optimal_moves[g.optimal_moves_idx])
+        g.make_move(peg, jump)
+
+        # Making the hinted move keeps the rest of the solution
+        assert g.optimal_moves is not None
+
+    assert g.b.number_of_pegs() == g.optimal_result == 1
+    output, _ = capsys.readouterr()
+    assert "* Hint: Jump" in output
+    assert "of the ways to finish from here leave 1 peg." in output
+
+    # Of the 568,630 possible games, 29,760 leave 1 peg
+    assert g.game_over() == 50
+    output, _ = capsys.readouterr()
+    assert "5.2% of the possible games from your start leave 1 peg" in output
+
+
+def test_game_hint_cleared_by_other_move(monkeypatch):
+
+    g = Game(Formatter(), 5, game_over_pause=0, msg_pause=0)
+    monkeypatch.setattr('sys.stdin', StringIO('a\n'))
+    g.remove_one_peg()
+    g.show_hint()
+    assert g.optimal_moves is not None
+    hint = g.optimal_moves[0]
+
+    # Make a move other than the hint
+    for peg, jumps in g.b.moves_map.items():
+        for jump in jumps:
+            if g.b.move_id(peg, jump) != hint:
+                g.make_move(peg, jump)
+                assert g.optimal_moves is None
+                return
+
+
+def test_game_hint_first_peg(monkeypatch, capsys):
+
+    g = Game(Formatter(), 5, game_over_pause=0, msg_pause=0)
+    monkeypatch.setattr('sys.stdin', StringIO('>\na\n'))
+    g.remove_one_peg()
+    output, _ = capsys.readouterr()
+    assert "* Hint: Remove 'a' to be able to leave 1 peg *" in output
+    assert g.b.number_of_pegs() == 14
+
+
+def test_game_hint_time_limit(monkeypatch, capsys):
+
+    g = Game(Formatter(), 5, game_over_pause=0, msg_pause=0)
+    monkeypatch.setattr('sys.stdin', StringIO('a\n'))
+    g.remove_one_peg()
+
+    # Stop the search as soon as the time limit is checked
+    g.b.tablebase = None
+    g.hint_time_limit = 0
+    g.b.solver.CHECK_INTERVAL = 16
+    g.show_stats = True
+    g.show_hint()
+    output, _ = capsys.readouterr()
+    assert not g.optimal_proven
+    assert "(not proven optimal)" in output
+    assert f"{g.b.solver.nodes} nodes in" in output
+    assert "* Hint: Jump" in output
+
+    # Other moves clear the unproven solution
+    g.clear_optimal_solution()
+    assert g.optimal_proven
+
+
+def test_game_hint_speculated(monkeypatch):
+
+    s = Speculator()
+    g = Game(Formatter(), 5, game_over_pause=0, msg_pause=0, speculator=s)
+    g.b.tablebase = None
+    monkeypatch.setattr('sys.stdin', StringIO('a\n'))
+    g.remove_one_peg()
+    assert s.wait(10)
+
+    # The hint comes from the background thread without another search
+    def fail(*args):
+        raise AssertionError("searched again")
+    monkeypatch.setattr(g.b, "solve_anytime", fail)
+    g.show_hint()
+    assert g.optimal_result == 1 and g.optimal_proven
+    s.stop()
+
+
+def test_game_hint_after_undo_reuses_results(monkeypatch):
+
+    g = Game(Formatter(), 5, game_over_pause=0, msg_pause=0)
+    g.b.tablebase = None
+    monkeypatch.setattr('sys.stdin', StringIO('a\n'))
+    g.remove_one_peg()
+    g.show_hint()
+    assert g.optimal_moves is not None
+    first_hint = g.optimal_moves[0]
+
+    # Follow the hint, then undo it, which clears the solution
+    g.make_move(*g.b.move(first_hint))
+    g.undo_move()
+    assert g.optimal_moves is None
+
+    # The position was solved for the first hint, so no search is needed
+    g.show_hint()
+    assert g.b.solver.nodes == 0
+    assert g.optimal_moves[0] == first_hint
+
+
+def test_game_hint_long_search_warning(monkeypatch, capsys):
+
+    # Every position of a 5 row board is solved right away
+    g = Game(Formatter(), 5, game_over_pause=0, msg_pause=0)
+    g.b.tablebase = None
+    assert not g.long_search(14)
+
+    # A search on a larger board may take up to the time limit, however few
+    # pegs are left
+    g = Game(Formatter(), 8, game_over_pause=0, msg_pause=0)
+    assert g.long_search(14)
+    g.hint_time_limit = 0.2
+    monkeypatch.setattr('sys.stdin', StringIO('a\n'))
+    g.remove_one_peg()
+    g.show_hint()
+    output, _ = capsys.readouterr()
+    assert "* Searching for up to 0.2 seconds" in output
+    assert "* Hint: Jump" in output
+
+
+class TerminalOutput(StringIO):
+    """Text stream that reports that it is a terminal"""
+
+    def isatty(self) -> bool:
+        return True
+
+
+def test_game_hint_in_executor(monkeypatch):
+
+    # Every search and rating without a tablebase is sent to the executor
+    submitted = []
+
+    class Recorder(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(fn.__name__)
+            return super().submit(fn, *args, **kwargs)
+
+    with Recorder(1) as executor:
+        f = Formatter(output=StringIO())
+        g = Game(f, 5, game_over_pause=0, msg_pause=0, executor=executor)
+        g.b.tablebase = None
+        monkeypatch.setattr('sys.stdin', StringIO('>\na\n'))
+        g.remove_one_peg()
+        g.show_hint()
+        assert g.b.solver.nodes == 0
+    assert submitted == ["search_first_peg", "search_position",
+                         "count_position_outcomes"]
+    output = f.output.getvalue()
+    assert "* Hint: Remove 'a' to be able to leave 1 peg *" in output
+    assert "of the ways to finish from here leave 1 peg." in output
+
+
+def test_game_hint_ctrl_c_only_in_terminal(monkeypatch):
+
+    for output, shown in ((StringIO(), False), (TerminalOutput(), True)):
+        f = Formatter(output=output, plain=True)
+        g = Game(f, 8, game_over_pause=0, msg_pause=0)
+        g.hint_time_limit = 0.1
+        monkeypatch.setattr('sys.stdin', StringIO('a\n'))
+        g.remove_one_peg()
+        g.show_hint()
+        assert ("Press Ctrl-C" in output.getvalue()) == shown
+
+
+def test_game_hint_first_peg_not_proven(monkeypatch, capsys):
+
+    # A first peg found by a search that was cut short is only the best
+    # found so far
+    g = Game(Formatter(), 12, game_over_pause=0, msg_pause=0)
+    monkeypatch.setattr(g.b, "best_first_peg",
+                        lambda deadline: ("am", 2, False))
+    monkeypatch.setattr('sys.stdin', StringIO('>\na\n'))
+    g.remove_one_peg()
+    output, _ = capsys.readouterr()
+    assert "* Hint: Remove 'am' to be able to leave 2 pegs" \
+        " (not proven optimal) *" in output
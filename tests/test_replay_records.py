@@ -0,0 +1,133 @@
+from io import StringIO
+import os
+import random
+import tempfile
+import pytest
+from iqtester.board import Board
+from iqtester.formatter import Formatter
+from iqtester.game import Game
+from iqtester.jumps import jump_table
+from iqtester.replay import (
+    HEADER_SIZE, Archive, InvalidRecord, decode, encode, id_size, replay,
+    write_archive,
+)
+
+
+def random_game(rows, rng):
+    """Return the start hole and move IDs of a random game"""
+    table = jump_table(rows)
+    start = rng.randrange(table.num_holes)
+    state = ((1 << table.num_holes) - 1) ^ (1 << start)
+    moves = []
+    while True:
+        legal = [
+            k for k, (mask, pattern) in enumerate(zip(table.masks,
+                                                      table.patterns))
+            if state & mask == pattern
+        ]
+        if not legal:
+            return start, moves
+        k = rng.choice(legal)
+        moves.append(k)
+        state ^= table.masks[k]
+
+
+def test_records_round_trip():
+
+    rng = random.Random(0)
+    for rows in (4, 5, 8, 11, 12):
+        start, moves = random_game(rows, rng)
+        record = encode(rows, start, moves)
+
+        # One byte per move, or two on boards with more than 256 jumps
+        assert id_size(rows) == (1 if rows <= 10 else 2)
+        assert len(record) == 3 + len(moves) * id_size(rows)
+
+        assert decode(b"xy" + record, 2) == (rows, start, moves,
+                                             2 + len(record))
+        state = replay(rows, start, moves, complete=True)
+        assert bin(state).count("1") == \
+            jump_table(rows).num_holes - 1 - len(moves)
+
+
+def test_invalid_records():
+
+    start, moves = random_game(5, random.Random(1))
+    record = encode(5, start, moves)
+
+    with pytest.raises(InvalidRecord):
+        decode(record[:-1])
+    with pytest.raises(InvalidRecord):
+        decode(bytes([0, 0, 0]))
+    with pytest.raises(InvalidRecord):
+        replay(5, 15, [])
+    with pytest.raises(InvalidRecord):
+        replay(5, start, moves + moves[-1:])
+    with pytest.raises(InvalidRecord):
+        replay(5, start, [len(jump_table(5))])
+    with pytest.raises(InvalidRecord):
+        replay(5, start, moves[:-1], complete=True)
+    replay(5, start, moves[:-1])
+
+
+def test_game_record():
+
+    # Play the best moves from a corner of a 4 row board, with an undo
+    script = ["a"]
+    b = Board(4, Formatter(output=StringIO()))
+    b.remove_peg("a")
+    while b.moves_map:
+        peg, jump = b.solve()[1][0]
+        inputs = [peg]
+        if len(b.moves_map[peg]) > 1:
+            inputs.append(b.board[jump[0][0]][jump[0][1]])
+        if len(script) == 1:
+            inputs += ["."] + inputs
+        script += inputs
+        b.make_move(peg, jump)
+
+    f = Formatter(output=StringIO(), input_stream=StringIO("\n".join(script)),
+                  plain=True)
+    game = Game(f, 4, 0, 0)
+    assert game.record() is None
+    game.play()
+
+    assert "Unable to go back" not in f.output.getvalue()
+    rows, start, moves, _ = decode(game.record())
+    assert (rows, start) == (4, 0)
+    assert len(moves) == len(game.moves_taken)
+    assert replay(rows, start, moves, complete=True) == game.b.bitmask()
+
+
+def test_archive():
+
+    rng = random.Random(2)
+    games = [(rows,) + random_game(rows, rng)
+             for rows in (5, 11) for _ in range(200)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.iqgr")
+        assert write_archive(
+            path, (encode(*game) for game in games)
+        ) == len(games)
+
+        archive = Archive(path)
+        assert [tuple(game) for game in archive] == \
+            [(rows, start, moves) for rows, start, moves in games]
+        assert archive.validate() == (len(games), None)
+        archive.close()
+
+        # Validation stops at the first invalid record
+        with open(path, "r+b") as f:
+            f.seek(HEADER_SIZE)
+            f.write(bytes([5, 15]))
+        archive = Archive(path)
+        count, error = archive.validate()
+        archive.close()
+        assert count == 0
+        assert "no hole 15" in error
+
+        with open(path, "wb") as f:
+            f.write(b"not an archive")
+        with pytest.raises(ValueError):
+            Archive(path)
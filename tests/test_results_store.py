@@ -0,0 +1,201 @@
+from io import StringIO
+import os
+import random
+import re
+import pytest
+from iqtester.board import Board
+from iqtester.formatter import Formatter
+from iqtester.results import (
+    BAD_SUFFIX, HEADER_SIZE, LOCK_FILE, LOG_FILE, RECORD_SIZE, SUMMARY_FILE,
+    GameResult, QuantileSketch, ResultsStore, format_seconds,
+)
+from iqtester.session import Session
+
+
+def results(n, seed=0):
+    """Return n random game results"""
+    rng = random.Random(seed)
+    return [
+        GameResult(5, rng.randrange(15), pegs, [0, 50, 25, 10][min(pegs, 3)],
+                   rng.uniform(5, 300), rng.randrange(3))
+        for pegs in (rng.randrange(1, 8) for _ in range(n))
+    ]
+
+
+def test_sketch_quantiles():
+
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+
+    rng = random.Random(1)
+    values = sorted(rng.expovariate(1 / 60) for _ in range(10_000))
+    for value in values:
+        sketch.add(value)
+
+    # Each quantile is within the relative accuracy of the exact quantile
+    for q in (0.01, 0.25, 0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+
+    # Memory doesn't grow with the number of values
+    assert len(sketch.bins) < 1_000
+
+    # Merged sketches are the same as one sketch of every value
+    a, b = QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        (a if i % 2 else b).add(value)
+    a.merge(b)
+    assert a.bins == sketch.bins
+    assert QuantileSketch.from_dict(a.to_dict()).bins == sketch.bins
+
+
+def test_store_keeps_results_across_sessions(tmp_path):
+
+    games = results(500)
+    store = ResultsStore(str(tmp_path))
+    assert store.summary.games == 0
+    assert store.summary.points_quantile(0.5) is None
+    for result in games:
+        store.record(result)
+
+    # Records are read back as they were written, up to float precision
+    reopened = ResultsStore(str(tmp_path))
+    assert reopened.count() == 500
+    for read, written in zip(reopened.records(), games):
+        assert read[:4] == written[:4]
+        assert read.hints == written.hints
+        assert read.seconds == pytest.approx(written.seconds)
+
+    summary = reopened.summary
+    assert summary.games == 500
+    assert summary.total_points == sum(r.points for r in games)
+    assert summary.average() == round(summary.total_points / 500, 1)
+    assert sum(summary.pegs_left.values()) == 500
+    assert summary.rows == {5: 500}
+    points = sorted(r.points for r in games)
+    assert summary.points_quantile(0.5) == points[249]
+    seconds = sorted(r.seconds for r in games)
+    assert summary.seconds.quantile(0.9) == \
+        pytest.approx(seconds[449], rel=0.011)
+
+
+def test_store_catches_up_with_log(tmp_path):
+
+    games = results(100)
+    store = ResultsStore(str(tmp_path))
+    for result in games[:60]:
+        store.record(result)
+    summary_path = os.path.join(str(tmp_path), SUMMARY_FILE)
+    with open(summary_path) as file:
+        stale = file.read()
+    for result in games[60:]:
+        store.record(result)
+    expected = store.summary.to_dict()
+
+    # A summary that is behind the log only reads the records after it
+    with open(summary_path, "w") as file:
+        file.write(stale)
+    reopened = ResultsStore(str(tmp_path))
+    assert reopened.summary.to_dict() == expected
+
+    # A missing summary is rebuilt from the whole log
+    os.remove(summary_path)
+    assert ResultsStore(str(tmp_path)).summary.to_dict() == expected
+
+    # A partial record left by a stopped write is ignored, then overwritten
+    log_path = os.path.join(str(tmp_path), LOG_FILE)
+    with open(log_path, "ab") as log:
+        log.write(b"\x05\x01")
+    reopened = ResultsStore(str(tmp_path))
+    assert reopened.count() == 100
+    reopened.record(games[0])
+    assert os.path.getsize(log_path) == HEADER_SIZE + 101 * RECORD_SIZE
+    assert list(reopened.records(100)) == list(reopened.records())[:1]
+
+
+@pytest.mark.parametrize("data", [b"", b"IQR", b"not a results log"])
+def test_store_starts_over_bad_log(tmp_path, data):
+
+    games = results(10)
+    store = ResultsStore(str(tmp_path))
+    for result in games:
+        store.record(result)
+
+    # A log without a whole header is kept aside, and a new log is started
+    # with a summary that no longer counts the games of the old log
+    log_path = os.path.join(str(tmp_path), LOG_FILE)
+    with open(log_path, "wb") as log:
+        log.write(data)
+    reopened = ResultsStore(str(tmp_path))
+    with open(log_path + BAD_SUFFIX, "rb") as bad:
+        assert bad.read() == data
+    assert os.path.getsize(log_path) == HEADER_SIZE
+    assert reopened.count() == 0
+    assert reopened.summary.games == 0
+
+    reopened.record(games[0])
+    assert ResultsStore(str(tmp_path)).summary.games == 1
+    assert sorted(os.listdir(str(tmp_path))) == \
+        sorted([LOCK_FILE, LOG_FILE, LOG_FILE + BAD_SUFFIX, SUMMARY_FILE])
+
+
+def test_stores_share_a_directory(tmp_path):
+
+    # Each store counts the games recorded by the other, e.g. when two
+    # games are played in two terminals at once
+    first = ResultsStore(str(tmp_path))
+    second = ResultsStore(str(tmp_path))
+    first.record(GameResult(5, 0, 1, 50, 60.0, 0))
+    second.record(GameResult(5, 3, 4, 0, 30.0, 2))
+    assert second.summary.games == 2
+    first.record(GameResult(5, 0, 2, 25, 45.0, 1))
+    assert first.summary.to_dict() == second.load_summary().to_dict()
+
+    summary = ResultsStore(str(tmp_path)).summary
+    assert summary.games == 3
+    assert summary.points == {50: 1, 0: 1, 25: 1}
+    assert summary.total_hints == 3
+
+
+def test_format_seconds():
+    assert format_seconds(None) == "-"
+    assert format_seconds(5.4) == "0:05"
+    assert format_seconds(125) == "2:05"
+
+
+def test_session_records_games(tmp_path):
+
+    # Script a 4 row session that plays the best moves from a corner
+    script = ["s", "b", "4", "r", "", "a"]
+    b = Board(4, Formatter(output=StringIO()))
+    b.remove_peg("a")
+    while b.moves_map:
+        peg, jump = b.solve()[1][0]
+        script.append(peg)
+        if len(b.moves_map[peg]) > 1:
+            script.append(b.board[jump[0][0]][jump[0][1]])
+        b.make_move(peg, jump)
+    script.append("q")
+
+    output = StringIO()
+    f = Formatter(output=output, input_stream=StringIO("\n".join(script)),
+                  plain=True)
+    store = ResultsStore(str(tmp_path))
+    s = Session(msg_pause=0, f=f, speculate=False, results=store)
+    s.game_over_pause = 0
+    s.start()
+
+    assert s.played == 1
+    [result] = list(store.records())
+    assert result[:4] == (4, 0, b.number_of_pegs(), s.total_score)
+    assert result.hints == 0
+
+    # The main menu shows the lifetime stats of every game kept
+    menus = output.getvalue().split("MAIN MENU")
+    assert re.search(r"LIFETIME GAMES: +0 ", menus[1])
+    assert re.search(r"LIFETIME GAMES: +1 ", menus[-1])
+    assert ResultsStore(str(tmp_path)).summary.games == 1
+
+
+def test_session_keeps_no_results_by_default():
+    assert Session().results is None
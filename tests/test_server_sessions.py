@@ -0,0 +1,130 @@
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+from typing import List
+import pytest
+from iqtester.client import load_test, play
+from iqtester.server import Server
+
+
+async def serve_clients(connections: int):
+    """Play the default script with many clients while one client idles"""
+
+    server = Server(msg_pause=0)
+    await server.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    # A connection that never answers its first prompt only holds its own
+    # session, so it doesn't stall any other connection
+    _, idle = await asyncio.open_connection("127.0.0.1", port)
+    transcripts = await asyncio.gather(
+        *(play(port=port) for _ in range(connections))
+    )
+    results = await load_test(5, port=port)
+    assert server.active == 1
+
+    idle.close()
+    await server.stop()
+    return server, transcripts, results
+
+
+def test_server_plays_sessions_at_once():
+
+    server, transcripts, results = asyncio.run(serve_clients(20))
+    for transcript in transcripts:
+        assert "MAIN MENU" in transcript
+        assert "* Hint: Jump" in transcript
+        assert "Thanks for playing!" in transcript
+        assert "\033" not in transcript
+    assert [error for _, error in results] == [None] * 5
+    assert server.completed == 25
+    assert server.active == 0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs Unix sockets")
+def test_server_unix_socket():
+
+    async def run(path: str) -> str:
+        server = Server(msg_pause=0)
+        await server.start(path=path)
+        transcript = await play(["q"], path=path)
+        await server.stop()
+        return transcript
+
+    # Keep the path short, since Unix socket paths are limited in length
+    with tempfile.TemporaryDirectory(dir="/tmp") as directory:
+        path = os.path.join(directory, "iqtester.sock")
+        assert "Thanks for playing!" in asyncio.run(run(path))
+
+
+async def serve_long_hint(connections: int):
+    """Play the default script with many clients while one client searches"""
+
+    server = Server(msg_pause=0, solvers=2)
+    await server.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    # A hint on a 12 row board is searched for up to the time limit by one
+    # of the solvers, so it doesn't stall the sessions that play meanwhile,
+    # whose hints are searched by the other
+    script = ["s", "b", "12", "h", "3", "r", "", "a", ">", "!", "q"]
+    searching = asyncio.ensure_future(play(script, port=port))
+    while server.active < 1:
+        await asyncio.sleep(0.01)
+    transcripts = await asyncio.gather(
+        *(play(port=port) for _ in range(connections))
+    )
+    assert not searching.done()
+    transcripts.append(await searching)
+
+    await server.stop()
+    return transcripts
+
+
+def test_server_searches_hints_in_processes():
+
+    transcripts = asyncio.run(serve_long_hint(5))
+    for transcript in transcripts:
+        assert "* Hint: Jump" in transcript
+        assert "Thanks for playing!" in transcript
+    assert "* Searching for up to 3 seconds" in transcripts[-1]
+
+
+async def serve_slow_client() -> int:
+    """Return the most output held for a client that stops reading"""
+
+    server = Server(msg_pause=0)
+    await server.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    # Each visit to the settings menu redraws both menus, which is much more
+    # output than the client takes with a small receive buffer
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(("127.0.0.1", port))
+    _, writer = await asyncio.open_connection(sock=sock)
+    writer.write(b"s\nr\n" * 20000)
+    while not server.active:
+        await asyncio.sleep(0.01)
+
+    # Once the buffers of the sockets are full, the server starts to hold
+    # the output, until the session waits for the client
+    held: List[int] = []
+    while len(held) < 50 and server.active:
+        await asyncio.sleep(0.02)
+        for session_writer in server.writers:
+            size = session_writer.transport.get_write_buffer_size()
+            if size or held:
+                held.append(size)
+
+    writer.close()
+    await server.stop()
+    return max(held)
+
+
+def test_server_holds_output_of_slow_clients():
+
+    # The session waits for the client rather than keeping all of its output
+    assert 0 < asyncio.run(serve_slow_client()) < 256 * 1024
@@ -90,11 +90,11 @@ def test_session_update_settings_all(monkeypatch, capsys):
                 'a\n'       # invalid type
                 '\r\n'      # invalid type
                 '3\n'       # out of range
-                '7\n'       # out of range
-                '6\n'       # valid
+                '13\n'      # out of range
+                '12\n'      # valid
             ),
             'expected_counts': [5, 2, 2, 1, 7],
-            'new_val': 6,
+            'new_val': 12,
         },
         "c": {
             'user_inputs': StringIO(
@@ -129,6 +129,28 @@ def test_session_update_settings_all(monkeypatch, capsys):
             'expected_counts': [5, 2, 2, 1, 7],
             'new_val': 0.0,
         },
+        "h": {
+            'user_inputs': StringIO(
+                'a\n'       # invalid type
+                '\r\n'      # invalid type
+                '0\n'       # out of range
+                '61\n'      # out of range
+                '5\n'       # valid
+            ),
+            'expected_counts': [5, 2, 2, 1, 7],
+            'new_val': 5,
+        },
+        "d": {
+            'user_inputs': StringIO(
+                'a\n'       # out of range
+                '\r\n'      # out of range
+                '1\n'       # out of range
+                'ON\n'      # out of range
+                'on\n'      # valid
+            ),
+            'expected_counts': [5, 4, 0, 1, 7],
+            'new_val': 'on',
+        },
         "s": {
             'user_inputs': StringIO(
                 'a\n'       # out of range
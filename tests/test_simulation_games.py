@@ -0,0 +1,80 @@
+import json
+import random
+import pytest
+from iqtester.__main__ import main
+from iqtester.analysis import fewest_pegs
+from iqtester.game import score
+from iqtester.simulation import (
+    STRATEGIES, SimulationStats, Strategy, play_game, simulate
+)
+
+
+def test_strategies_play_legal_games():
+
+    rng = random.Random(22)
+    for name, strategy in STRATEGIES.items():
+        player = strategy(5)
+        for _ in range(20):
+            start, pegs = play_game(player, rng)
+            assert 0 <= start < 15
+            assert 1 <= pegs <= 13
+
+    # The solver always leaves the fewest pegs possible from its start
+    player = STRATEGIES["solver"](4)
+    expected = fewest_pegs(4)
+    for start in range(10):
+        assert play_game(player, rng, start) == (start, expected[start])
+
+
+def test_strategy_must_choose_moves():
+
+    # A strategy without choose_move fails when it is created
+    class Incomplete(Strategy):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(5)
+
+
+def test_simulate_is_seeded_and_merged():
+
+    stats = simulate(4, "random", 250, seed=3, batch_size=100)
+    assert stats.games == 250
+    again = simulate(4, "random", 250, seed=3, batch_size=100)
+    assert again.outcomes == stats.outcomes
+
+    # Worker processes play the same batches
+    progress = []
+    parallel = simulate(4, "random", 250, workers=2, seed=3, batch_size=100,
+                        progress=lambda s: progress.append(s.games))
+    assert parallel.outcomes == stats.outcomes
+    assert sorted(progress) == progress and progress[-1] == 250
+
+    # Scores are the points of game_over for the pegs left
+    scores = {}
+    for pegs, n in stats.pegs_left().items():
+        scores[score(pegs)[0]] = scores.get(score(pegs)[0], 0) + n
+    assert stats.scores() == scores
+    assert sum(stats.scores().values()) == 250
+
+
+def test_stats_merge():
+
+    a, b = SimulationStats(5), SimulationStats(5)
+    a.add(0, 1)
+    a.add(0, 3)
+    b.add(0, 1)
+    b.add(4, 2)
+    a.merge(b)
+    assert a.outcomes == {0: {1: 2, 3: 1}, 4: {2: 1}}
+    assert a.scores() == {50: 2, 25: 1, 10: 1}
+    assert a.mean_score() == 135 / 4
+
+
+def test_simulate_command(capsys):
+
+    main(["simulate", "greedy", "-n", "50", "-r", "4", "-s", "A", "--json"])
+    output, _ = capsys.readouterr()
+    record = json.loads(output)
+    assert record["games"] == 50
+    assert list(record["by_start"]) == ["a"]
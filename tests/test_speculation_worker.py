@@ -0,0 +1,75 @@
+from io import StringIO
+import time
+from iqtester.board import Board
+from iqtester.formatter import Formatter
+from iqtester.game import Game
+from iqtester.speculation import Speculator
+
+
+def test_speculate_moves():
+
+    b = Board(5)
+    b.tablebase = None
+    b.remove_peg('e')
+    s = Speculator()
+    s.speculate_moves(5, b.bitmask())
+    assert s.wait(10)
+
+    # The position and every position one jump away are solved
+    assert s.result(5, b.bitmask()) == b.solve_ids()
+    for peg, jumps in list(b.moves_map.items()):
+        for jump in jumps:
+            jump_from = b.peg_locations_map[peg]
+            peg_jumped = b.board[jump[0][0]][jump[0][1]]
+            b.make_move(peg, jump)
+            solution = s.result(5, b.bitmask())
+            assert solution is not None
+            assert solution[0] == b.solve()[0]
+            b.undo_move((peg, jump), peg_jumped, jump_from)
+
+    s.stop()
+    assert s.thread is None
+
+
+def test_speculate_cancel():
+
+    # A full 8 row board minus one peg takes a long time to solve
+    b = Board(8)
+    b.remove_peg('e')
+    s = Speculator()
+    s.speculate(8, [b.bitmask()])
+    time.sleep(0.05)
+
+    start = time.monotonic()
+    s.cancel()
+    assert s.wait(5)
+    assert time.monotonic() - start < 1
+    assert s.result(8, b.bitmask()) is None
+    s.stop()
+
+
+def test_speculate_time_budget(monkeypatch):
+
+    # A position that can't be solved in the budget is left unsolved, so
+    # the thread is idle again rather than searching until a hint
+    monkeypatch.setattr(Speculator, "JOB_SECONDS", 0.2)
+    b = Board(10)
+    b.remove_peg('a')
+    s = Speculator()
+    s.speculate(10, [b.bitmask()])
+    assert s.wait(5)
+    assert s.result(10, b.bitmask()) is None
+    s.stop()
+
+
+def test_game_skips_long_speculation(monkeypatch):
+
+    # Positions on boards over 6 rows are only searched when a hint is
+    # asked for
+    s = Speculator()
+    g = Game(Formatter(output=StringIO()), 8, game_over_pause=0,
+             msg_pause=0, speculator=s)
+    monkeypatch.setattr('sys.stdin', StringIO('e\n'))
+    g.remove_one_peg()
+    assert s.thread is None
+    s.stop()
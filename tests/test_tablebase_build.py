@@ -0,0 +1,85 @@
+import random
+import pytest
+from iqtester.board import Board
+from iqtester import tablebase
+from iqtester.tablebase import Tablebase, build, file_name, load
+from test_board_solve import random_board, replay
+
+
+@pytest.mark.parametrize("rows,count", [(4, 332), (5, 13935)])
+def test_tablebase_matches_solver(tmp_path, rows, count):
+
+    path = str(tmp_path / file_name(rows))
+    assert build(rows, path) == count
+    tb = Tablebase(path)
+    assert tb.rows == rows
+
+    rng = random.Random(rows)
+    for _ in range(30):
+        b = random_board(rows, rng.randrange(0, rows * 3), rng)
+        expected, _ = b.solver.solve(b.bitmask())
+
+        # A board with the tablebase attached answers from the tablebase
+        b.tablebase = tb
+        result, moves = b.solve()
+        assert result == expected
+        replay(b, moves)
+        assert b.number_of_pegs() == result
+        assert not b.moves_map
+
+    # A full board can't be reached from a single hole start
+    assert tb.lookup((1 << Board(rows).num_holes) - 1) is None
+    tb.close()
+
+
+def test_tablebase_invalid_file(tmp_path):
+
+    path = tmp_path / file_name(5)
+    path.write_bytes(b"not a tablebase")
+    with pytest.raises(ValueError):
+        Tablebase(str(path))
+    with pytest.raises(ValueError):
+        build(7, str(path))
+
+
+def test_best_first_peg(tmp_path):
+
+    # On 4 rows, only some starts can be solved down to 1 peg
+    path = str(tmp_path / file_name(4))
+    build(4, path)
+    b = Board(4)
+    b.tablebase = None
+    peg, result, proven = b.best_first_peg()
+    assert proven
+    b.tablebase = Tablebase(path)
+    assert b.best_first_peg() == (peg, result, True)
+
+    b.remove_peg(peg)
+    assert b.solve()[0] == result
+
+
+def test_load_skips_damaged_files(tmp_path, monkeypatch):
+
+    # A build writes the whole file at once
+    path = tmp_path / file_name(4)
+    build(4, str(path))
+    assert [p.name for p in tmp_path.iterdir()] == [file_name(4)]
+
+    # Boards play on without an empty or partial tablebase file
+    for data in (b"", path.read_bytes()[:100]):
+        path.write_bytes(data)
+        load.cache_clear()
+        assert load(4, str(tmp_path)) is None
+
+    # or with a tablebase for another board size in its place
+    build(5, str(path))
+    load.cache_clear()
+    assert load(4, str(tmp_path)) is None
+
+    # Boards look for tablebases in the default directory
+    monkeypatch.setattr(tablebase, "DEFAULT_DIRECTORY", str(tmp_path))
+    load.cache_clear()
+    assert Board(4).tablebase is None
+    build(4, str(path))
+    load.cache_clear()
+    assert Board(4).tablebase is not None
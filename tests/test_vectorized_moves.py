@@ -0,0 +1,62 @@
+import random
+import pytest
+from iqtester import analysis
+from test_board_solve import random_board
+
+np = pytest.importorskip("numpy")
+vectorized = pytest.importorskip("iqtester.vectorized")
+
+
+def test_legal_moves_match_board():
+
+    rng = random.Random(19)
+    for rows in (4, 5, 6, 8, 10):
+        boards = [random_board(rows, rng.randrange(6), rng) for _ in range(20)]
+        states = vectorized.as_batch(b.bitmask() for b in boards)
+        legal = vectorized.legal_moves(rows, states)
+        assert legal.shape == (len(boards), len(boards[0].jump_table.masks))
+
+        for b, row in zip(boards, legal):
+            expected = {
+                b.move_id(peg, jump)
+                for peg, jumps in b.moves_map.items()
+                for jump in jumps
+            }
+            assert set(np.flatnonzero(row)) == expected
+
+
+def test_expand_matches_python():
+
+    rng = random.Random(20)
+    rows = 7
+    table = random_board(rows, 0, rng).jump_table
+    states = [random_board(rows, rng.randrange(8), rng).bitmask()
+              for _ in range(50)]
+    children = [
+        state ^ mask
+        for state in states
+        for mask, pattern in zip(table.masks, table.patterns)
+        if state & mask == pattern
+    ]
+
+    batch = vectorized.as_batch(states)
+    successors = vectorized.successors(rows, batch)
+    assert sorted(successors.tolist()) == sorted(children)
+    assert vectorized.expand(rows, batch).tolist() == sorted(set(children))
+
+
+def test_layers_match_recorded_counts():
+
+    for rows in (4, 5):
+        starts = analysis.single_hole_starts(rows)
+        counts = [0] * (rows * (rows + 1) // 2 + 1)
+        for pegs, layer in vectorized.layers(rows, starts):
+            assert layer.dtype == np.uint64
+            counts[pegs] = len(layer)
+        assert counts == analysis.REACHABLE_POSITIONS[rows]
+
+
+def test_states_must_fit_in_uint64():
+
+    with pytest.raises(ValueError):
+        vectorized.jump_arrays(11)